@@ -10,6 +10,6 @@ setup(
     url="https://github.com/Key-Technology/opc-explorer",
     packages=["uaclient", "uaclient.theme"],
     license="GNU General Public License",
-    install_requires=["asyncua", "opcua-widgets>=0.6.0", "PyQt5"],
+    install_requires=["asyncua>=1.1.5,<1.2", "opcua-widgets>=0.6.0", "PyQt5"],
     entry_points={"console_scripts": ["opc-explorer = uaclient.mainwindow:main"]},
 )
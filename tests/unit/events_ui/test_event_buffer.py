@@ -0,0 +1,53 @@
+import pytest
+
+from uaclient.events_ui import EventBuffer
+
+
+def test_extend():
+    buffer = EventBuffer(3)
+
+    assert buffer.extend([1, 2]) == 0
+    assert len(buffer) == 2
+    assert [buffer[i] for i in range(len(buffer))] == [1, 2]
+
+    assert buffer.extend([3, 4, 5]) == 2
+    assert len(buffer) == 3
+    assert [buffer[i] for i in range(len(buffer))] == [3, 4, 5]
+
+
+def test_index_out_of_range():
+    buffer = EventBuffer(3)
+    buffer.extend([1])
+
+    with pytest.raises(IndexError):
+        buffer[1]
+    with pytest.raises(IndexError):
+        buffer[-1]
+
+
+def test_discard_oldest():
+    buffer = EventBuffer(3)
+    buffer.extend([1, 2, 3, 4])
+
+    buffer.discard_oldest(2)
+    assert [buffer[i] for i in range(len(buffer))] == [4]
+
+    buffer.extend([5, 6])
+    assert [buffer[i] for i in range(len(buffer))] == [4, 5, 6]
+
+    buffer.discard_oldest(5)
+    assert len(buffer) == 0
+
+
+def test_clear():
+    buffer = EventBuffer(3)
+    buffer.extend([1, 2])
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.capacity == 3
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        EventBuffer(0)
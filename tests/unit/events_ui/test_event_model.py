@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+
+from unittest import mock
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QTableView
+
+from asyncua import ua
+
+from uaclient.events_ui import EventModel, EventRecord
+
+_FIELDS = ("Severity", "Message")
+
+
+@pytest.fixture
+def table_view(application):
+    view = QTableView()
+    yield view
+    view.deleteLater()
+
+
+def _records(*severities):
+    return [
+        EventRecord(
+            "Server", _FIELDS, (severity, ua.LocalizedText(f"Event {severity}"))
+        )
+        for severity in severities
+    ]
+
+
+def _column(model, column):
+    return [model.index(row, column).data() for row in range(model.rowCount())]
+
+
+def test_init(table_view):
+    with mock.patch.object(table_view, "setModel") as mock_set_model:
+        model = EventModel(table_view, capacity=10)
+
+    mock_set_model.assert_called_with(model)
+    assert model.columns() == ["Source"]
+    assert model.rowCount() == 0
+
+
+def test_add_events(table_view):
+    model = EventModel(table_view, capacity=10)
+    model.add_events(_records(100, 200))
+
+    assert model.columns() == ["Source", "Severity", "Message"]
+    assert model.headerData(1, Qt.Orientation.Horizontal) == "Severity"
+    assert _column(model, 0) == ["Server", "Server"]
+    assert _column(model, 1) == ["100", "200"]
+    assert _column(model, 2) == ["Event 100", "Event 200"]
+
+
+def test_add_events_when_full(table_view):
+    model = EventModel(table_view, capacity=3)
+    model.add_events(_records(1, 2))
+
+    with mock.patch.object(model, "beginResetModel") as mock_reset:
+        model.add_events(_records(3, 4))
+    mock_reset.assert_not_called()
+    assert _column(model, 1) == ["2", "3", "4"]
+
+    # Too many to keep any of the old ones, which are still removed row-wise
+    removed = []
+    inserted = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last))
+    )
+    with mock.patch.object(model, "beginResetModel") as mock_reset:
+        model.add_events(_records(*range(5, 10)))
+    mock_reset.assert_not_called()
+    assert removed == [(0, 2)]
+    assert inserted == [(0, 2)]
+    assert _column(model, 1) == ["7", "8", "9"]
+
+
+def test_fields_of_other_subscriptions(table_view):
+    model = EventModel(table_view, capacity=10)
+    time = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    model.add_events(_records(100))
+    model.add_events([EventRecord("Line 1", ("Time",), (time,))])
+
+    assert model.columns() == ["Source", "Severity", "Message", "Time"]
+    assert model.index(0, 3).data() is None
+    assert model.index(1, 1).data() is None
+    assert model.index(1, 3).data() == "2024-01-02 03:04:05"
+
+
+def test_clear(table_view):
+    model = EventModel(table_view, capacity=10)
+    model.add_events(_records(100))
+    model.clear()
+
+    assert model.rowCount() == 0
+    assert model.columns() == ["Source", "Severity", "Message"]
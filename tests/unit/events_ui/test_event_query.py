@@ -0,0 +1,38 @@
+from asyncua import ua
+
+from uaclient.events_ui import EventQuery, event_filter, field_path
+
+
+def test_field_path():
+    assert field_path("Severity") == [ua.QualifiedName("Severity", 0)]
+    assert field_path("2:Line/2:Station") == [
+        ua.QualifiedName("Line", 2),
+        ua.QualifiedName("Station", 2),
+    ]
+
+
+def test_event_filter():
+    event_filter_ = event_filter(EventQuery(["Time", "2:Line/2:Station"]))
+
+    assert [clause.BrowsePath for clause in event_filter_.SelectClauses] == [
+        [ua.QualifiedName("Time", 0)],
+        [ua.QualifiedName("Line", 2), ua.QualifiedName("Station", 2)],
+    ]
+    assert event_filter_.WhereClause.Elements == []
+
+
+def test_event_filter_where_clause():
+    alarm_type = ua.NodeId(ua.ObjectIds.AlarmConditionType)
+    event_filter_ = event_filter(EventQuery(["Time"], alarm_type, 500))
+
+    operators = [
+        element.FilterOperator for element in event_filter_.WhereClause.Elements
+    ]
+    assert operators == [
+        ua.FilterOperator.And,
+        ua.FilterOperator.OfType,
+        ua.FilterOperator.GreaterThanOrEqual,
+    ]
+    of_type, severity = event_filter_.WhereClause.Elements[1:]
+    assert of_type.FilterOperands[0].Value.Value == alarm_type
+    assert severity.FilterOperands[1].Value.Value == 500
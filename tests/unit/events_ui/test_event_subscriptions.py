@@ -0,0 +1,97 @@
+import pytest
+
+from asyncua import ua
+
+from uaclient.events_ui import EventQuery, EventSubscriptions, notifies_events
+
+
+class _Client:
+    """Create subscriptions on the server itself, as if it were a client"""
+
+    def __init__(self, server):
+        self._server = server
+
+    async def create_subscription(self, period, handler):
+        return await self._server.create_subscription(period, handler)
+
+
+@pytest.fixture
+async def subscriptions(application, async_server):
+    subscriptions = EventSubscriptions(publishing_interval=10, capacity=5)
+    subscriptions.start(_Client(async_server))
+    yield subscriptions
+    subscriptions.stop()
+    subscriptions.deleteLater()
+
+
+async def _trigger(server, *severities):
+    generator = await server.get_event_generator()
+    for severity in severities:
+        generator.event.Severity = severity
+        await generator.trigger(message=f"Event {severity}")
+
+
+async def test_notifies_events(async_server):
+    assert await notifies_events(async_server.nodes.server)
+    assert not await notifies_events(async_server.nodes.objects)
+    assert not await notifies_events(async_server.nodes.server_state)
+
+
+async def test_subscribe(subscriptions, async_server, wait_for_signal):
+    server_node = async_server.nodes.server
+    await subscriptions.subscribe(server_node, EventQuery(["Severity", "Message"]))
+    assert subscriptions.is_subscribed(server_node.nodeid)
+
+    received = []
+    subscriptions.events_received.connect(received.extend)
+    async with wait_for_signal(
+        subscriptions.events_received,
+        check_params_callback=lambda _records: len(received) == 2,
+    ):
+        await _trigger(async_server, 100, 200)
+
+    assert [record.source for record in received] == ["Server", "Server"]
+    assert [record.values for record in received] == [
+        (100, ua.LocalizedText("Event 100")),
+        (200, ua.LocalizedText("Event 200")),
+    ]
+
+
+async def test_subscribe_min_severity(subscriptions, async_server, wait_for_signal):
+    server_node = async_server.nodes.server
+    query = EventQuery(["Severity"], min_severity=500)
+    await subscriptions.subscribe(server_node, query)
+
+    received = []
+    subscriptions.events_received.connect(received.extend)
+    async with wait_for_signal(
+        subscriptions.events_received,
+        check_params_callback=lambda _records: len(received) == 2,
+    ):
+        await _trigger(async_server, 100, 700, 300, 500)
+
+    assert [record.values for record in received] == [(700,), (500,)]
+
+
+async def test_unsubscribe(subscriptions, async_server):
+    server_node = async_server.nodes.server
+    await subscriptions.subscribe(server_node)
+    await subscriptions.unsubscribe(server_node.nodeid)
+
+    assert not subscriptions.is_subscribed(server_node.nodeid)
+
+
+async def test_events_are_batched(subscriptions, async_server, wait_for_signal):
+    server_node = async_server.nodes.server
+    await subscriptions.subscribe(server_node, EventQuery(["Severity"]))
+    handle = subscriptions._sources[server_node.nodeid].handle
+
+    batches = []
+    subscriptions.events_received.connect(batches.append)
+    async with wait_for_signal(subscriptions.events_received):
+        for severity in range(8):
+            subscriptions._handle_event(handle, [ua.Variant(severity)])
+
+    # Only as many as the view can show are kept
+    assert len(batches) == 1
+    assert [record.values for record in batches[0]] == [(3,), (4,), (5,), (6,), (7,)]
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import patch
+from PyQt5.QtWidgets import QMessageBox
+
+from asyncua import ua
+
+from uaclient.event_filter_dialog import EventFilterDialog
+from uaclient.events_ui import EventQuery
+
+_QUERY = EventQuery(
+    ["Time", "Severity"], ua.NodeId(ua.ObjectIds.AlarmConditionType), 200
+)
+
+
+@pytest.fixture
+def dialog(application):
+    dialog = EventFilterDialog(None, _QUERY)
+    yield dialog
+    dialog.deleteLater()
+
+
+def test_unchanged(dialog):
+    dialog.accept()
+    assert dialog.query == _QUERY
+
+
+def test_edit(dialog):
+    dialog._ui.fieldsEdit.setText("Message, 2:Line/2:Station,")
+    dialog._ui.eventTypeEdit.setText("i=2041")
+    dialog._ui.minSeveritySpinBox.setValue(0)
+    dialog.accept()
+
+    assert dialog.query == EventQuery(
+        ["Message", "2:Line/2:Station"], ua.NodeId(ua.ObjectIds.BaseEventType), 0
+    )
+
+
+@pytest.mark.parametrize(
+    "fields,event_type", [("", "i=2041"), ("x:Time", "i=2041"), ("Time", "nonsense")]
+)
+def test_invalid(dialog, fields, event_type):
+    dialog._ui.fieldsEdit.setText(fields)
+    dialog._ui.eventTypeEdit.setText(event_type)
+    with patch.object(QMessageBox, "warning") as mock_warning:
+        dialog.accept()
+
+    mock_warning.assert_called_once()
+    assert dialog.query == _QUERY
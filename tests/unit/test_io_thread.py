@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from uaclient.io_thread import IoThread, ThreadedSession
+
+
+class _Session:
+    protocol = "protocol"
+
+    async def read(self, value):
+        return value, threading.current_thread().name
+
+    async def fail(self):
+        raise ValueError("failed")
+
+
+@pytest.fixture
+def io_thread():
+    io_thread = IoThread("test I/O")
+    io_thread.start()
+    yield io_thread
+    io_thread.stop()
+
+
+async def test_run(io_thread):
+    async def current_thread():
+        return threading.current_thread().name
+
+    assert await io_thread.run(current_thread()) == "test I/O"
+
+
+async def test_run_not_started():
+    io_thread = IoThread()
+    coroutine = _Session().fail()
+    with pytest.raises(RuntimeError):
+        io_thread.run(coroutine)
+    coroutine.close()
+
+
+async def test_threaded_session(io_thread):
+    session = ThreadedSession(_Session(), io_thread)
+
+    assert await session.read(42) == (42, "test I/O")
+    assert session.protocol == "protocol"
+    with pytest.raises(ValueError):
+        await session.fail()
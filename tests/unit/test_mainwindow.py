@@ -1,5 +1,12 @@
+import asyncio
+
 from PyQt5.QtCore import Qt
 
+from asyncua import Node
+from asyncua.ua import ObjectIds
+
+from uaclient.events_ui import EventQuery
+
 
 async def test_model_columns(mainwindow):
     assert mainwindow._model.columnCount() == 4
@@ -60,6 +67,15 @@ async def test_model_is_updated_when_value_changes(
     assert len(matches) == 1
     index = matches[0]
 
+    # Values are read after the rows are shown
+    if index.siblingAtColumn(1).data() is None:
+        async with wait_for_signal(
+            tree_model.dataChanged,
+            check_params_callback=lambda *args: index.siblingAtColumn(1).data()
+            is not None,
+        ):
+            pass
+
     # Confirm value
     assert index.siblingAtColumn(1).data() == "42"
 
@@ -67,3 +83,79 @@ async def test_model_is_updated_when_value_changes(
     async with wait_for_signal(tree_model.dataChanged):
         await variable_node.write_value(43)
     assert index.siblingAtColumn(1).data() == "43"
+
+
+async def test_go_to_node(mainwindow, async_server):
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await object_node.add_variable(index, "TestVariable", 42)
+
+    await mainwindow.go_to_node("Objects/2:TestObject/2:TestVariable")
+
+    current_index = mainwindow._ui.treeView.currentIndex()
+    assert current_index.data() == "TestVariable"
+
+
+async def test_dropped_values(mainwindow):
+    mainwindow._subscriptions.values_dropped.emit(5)
+    assert mainwindow._ui.droppedValuesLabel.text() == "5 values dropped"
+
+    mainwindow._subscriptions.values_dropped.emit(0)
+    assert mainwindow._ui.droppedValuesLabel.text() == ""
+
+
+async def test_reconnect(mainwindow, async_server, wait_for_signal):
+    tree_model = mainwindow._model
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    variable_node = await object_node.add_variable(index, "TestVariable", 42)
+
+    await mainwindow.go_to_node("Objects/2:TestObject/2:TestVariable")
+    value_index = mainwindow._ui.treeView.currentIndex().siblingAtColumn(1)
+    if value_index.data() != "42":
+        async with wait_for_signal(
+            tree_model.dataChanged,
+            check_params_callback=lambda *args: value_index.data() == "42",
+        ):
+            pass
+
+    # Drop the connection, and change the value while it's down
+    client = mainwindow._uaclient
+    await mainwindow._io_thread.run(_disconnect_socket(client))
+    await variable_node.write_value(43)
+
+    mainwindow._start_reconnect(ConnectionError("Connection lost"))
+    await asyncio.wait_for(asyncio.shield(mainwindow._reconnect_task), 5)
+    assert mainwindow._uaclient is client
+
+    # The visible rows were read again
+    assert value_index.data() == "43"
+
+    # The server can't transfer subscriptions, so they were created again
+    async with wait_for_signal(
+        tree_model.dataChanged,
+        check_params_callback=lambda *args: value_index.data() == "44",
+    ):
+        await variable_node.write_value(44)
+
+
+async def _disconnect_socket(client):
+    client.disconnect_socket()
+
+
+async def test_subscribe_events(mainwindow, async_server, wait_for_signal):
+    event_model = mainwindow._event_model
+    server_node = Node(mainwindow._session, ObjectIds.Server)
+    await mainwindow.subscribe_events(server_node, EventQuery(["Severity", "Message"]))
+
+    generator = await async_server.get_event_generator()
+    generator.event.Severity = 500
+    async with wait_for_signal(event_model.rowsInserted):
+        await generator.trigger(message="Line fault")
+
+    assert event_model.rowCount() == 1
+    assert [event_model.index(0, column).data() for column in range(3)] == [
+        "Server",
+        "500",
+        "Line fault",
+    ]
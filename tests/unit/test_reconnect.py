@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from asyncua import ua
+from asyncua.client.ua_client import UaClient
+
+from uaclient.reconnect import (
+    RECONNECT_MAX_DELAY,
+    RECONNECT_MIN_DELAY,
+    ReconnectingClient,
+    reconnect_delays,
+    transfer_subscriptions,
+)
+
+
+def test_reconnect_delays():
+    delays = list(itertools.islice(reconnect_delays(), 10))
+
+    assert delays[0] == RECONNECT_MIN_DELAY
+    assert delays[1] == RECONNECT_MIN_DELAY * 2
+    assert delays == sorted(delays)
+    assert delays[-1] == RECONNECT_MAX_DELAY
+
+
+def test_asyncua_internals():
+    # Publishing is stopped and restarted through these, which asyncua doesn't
+    # expose. Should they go away, so does reconnecting.
+    uaclient = UaClient()
+    assert hasattr(uaclient, "_publish_task")
+    assert callable(getattr(uaclient, "_publish_loop", None))
+    assert callable(getattr(uaclient, "transfer_subscriptions", None))
+
+
+async def test_reconnect(async_server, url):
+    client = ReconnectingClient(url)
+    await client.connect()
+    try:
+        client.disconnect_socket()
+        await client.reconnect()
+
+        assert await client.nodes.server_state.read_value() == ua.ServerState.Running
+    finally:
+        await client.disconnect()
+
+
+async def test_transfer_subscriptions_unsupported(async_server, url):
+    client = ReconnectingClient(url)
+    await client.connect()
+    try:
+        subscription = await client.create_subscription(500, None)
+        await client.reconnect()
+
+        # The server this is tested with doesn't implement the service
+        with pytest.raises(ua.UaStatusCodeError):
+            await transfer_subscriptions(client, [subscription.subscription_id])
+    finally:
+        await client.disconnect()
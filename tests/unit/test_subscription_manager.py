@@ -0,0 +1,439 @@
+import pytest
+from unittest import mock
+
+from asyncua import ua
+
+from uaclient.subscription_manager import SubscriptionManager
+from uaclient.subscription_tiers import SubscriptionTier, TierConfiguration, TierRule
+
+
+class _Client:
+    """Create subscriptions on the server itself, as if it were a client"""
+
+    def __init__(self, server):
+        self._server = server
+        self.nodes = server.nodes
+
+    async def create_subscription(self, period, handler):
+        return await self._server.create_subscription(period, handler)
+
+
+@pytest.fixture
+async def manager(application, async_server):
+    manager = SubscriptionManager(batch_size=10)
+    await manager.start(_Client(async_server))
+    yield manager
+    manager.stop()
+    manager.deleteLater()
+
+
+async def _add_variables(server, count):
+    index = await server.register_namespace("test")
+    folder = await server.nodes.objects.add_folder(index, "TestFolder")
+    return [
+        await folder.add_variable(index, f"TestVariable{number}", number)
+        for number in range(count)
+    ]
+
+
+async def test_subscribe_is_batched(manager, async_server):
+    nodes = await _add_variables(async_server, 25)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription,
+        "create_monitored_items",
+        wraps=subscription.create_monitored_items,
+    ) as mock_create:
+        for item in items:
+            manager.subscribe(item)
+        await manager.wait_for_pending()
+
+    assert mock_create.call_count == 3
+    assert set(manager.subscription_data.keys()) == {node.nodeid for node in nodes}
+
+
+async def test_subscribe_after_failure(manager, async_server):
+    nodes = await _add_variables(async_server, 2)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription,
+        "create_monitored_items",
+        side_effect=ConnectionError("Connection lost"),
+    ):
+        manager.subscribe(items[0])
+        await manager.wait_for_pending()
+    assert not manager.subscription_data
+
+    # It's created along with whatever is subscribed to next
+    manager.subscribe(items[1])
+    await manager.wait_for_pending()
+    assert set(manager.subscription_data.keys()) == {node.nodeid for node in nodes}
+
+
+async def test_unsubscribe_is_batched(manager, async_server):
+    nodes = await _add_variables(async_server, 25)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription, "unsubscribe", wraps=subscription.unsubscribe
+    ) as mock_unsubscribe:
+        for item in items:
+            manager.unsubscribe(item)
+        await manager.wait_for_pending()
+
+    assert mock_unsubscribe.call_count == 3
+    assert not manager.subscription_data
+
+
+async def test_unsubscribe_before_flush(manager, async_server):
+    nodes = await _add_variables(async_server, 1)
+    item = mock.Mock(node=nodes[0])
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription,
+        "create_monitored_items",
+        wraps=subscription.create_monitored_items,
+    ) as mock_create:
+        manager.subscribe(item)
+        manager.unsubscribe(item)
+        await manager.wait_for_pending()
+
+    mock_create.assert_not_called()
+    assert not manager.subscription_data
+
+
+async def test_subscribe_node_without_value(manager, async_server):
+    item = mock.Mock(node=async_server.nodes.objects)
+
+    manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    assert not manager.subscription_data
+
+
+async def test_subscribe_node_without_value_attribute(manager, async_server):
+    item = mock.Mock(node=async_server.nodes.objects)
+    item.has_attribute.return_value = False
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription,
+        "create_monitored_items",
+        wraps=subscription.create_monitored_items,
+    ) as mock_create:
+        manager.subscribe(item)
+        await manager.wait_for_pending()
+
+    mock_create.assert_not_called()
+    item.has_attribute.assert_called_with(ua.AttributeIds.Value)
+
+
+async def test_data_change(manager, async_server, wait_for_signal):
+    nodes = await _add_variables(async_server, 1)
+    item = mock.Mock(node=nodes[0])
+
+    manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    signal = manager.subscription_data[nodes[0].nodeid].signal.signal
+    async with wait_for_signal(
+        signal, check_params_callback=lambda value: value.Value.Value == 43
+    ):
+        await nodes[0].write_value(43)
+
+    item.set_data.assert_called_with(ua.AttributeIds.Value, mock.ANY, emit=False)
+
+
+def _notify(manager, values):
+    """Hand values over as if they came in a single publish response"""
+    handler = manager._subscription._handler
+    handles = [
+        monitored_item.client_handle
+        for monitored_item in manager._monitored_items.values()
+    ]
+    for index, number in values:
+        data = mock.Mock()
+        data.subscription_data.client_handle = handles[index]
+        data.monitored_item.Value = ua.DataValue(ua.Variant(number))
+        handler.datachange_notification(None, None, data)
+
+
+async def test_data_changes_are_batched(manager, async_server, wait_for_signal):
+    nodes = await _add_variables(async_server, 2)
+    items = [mock.Mock(node=node) for node in nodes]
+    manager.set_tiers(TierConfiguration([SubscriptionTier("Queued", queue_size=2)]))
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    values = []
+    signal = manager.subscription_data[nodes[0].nodeid].signal.signal
+    signal.connect(lambda value: values.append(value.Value.Value))
+    for item in items:
+        item.set_data.reset_mock()
+
+    # Several values of the first node fit its queue
+    changed = []
+    manager.values_changed.connect(changed.append)
+    async with wait_for_signal(manager.values_changed):
+        _notify(manager, [(0, 1), (1, 2), (0, 3)])
+
+    items[0].set_data.assert_called_once_with(
+        ua.AttributeIds.Value, ua.DataValue(ua.Variant(3)), emit=False
+    )
+    items[1].set_data.assert_called_once_with(
+        ua.AttributeIds.Value, ua.DataValue(ua.Variant(2)), emit=False
+    )
+    assert values == [1, 3]
+
+    # Both are announced at once, and nothing was dropped
+    assert len(changed) == 1
+    assert {id(item) for item, _attribute in changed[0]} == {id(item) for item in items}
+    assert manager.dropped_value_count == 0
+
+
+async def test_data_changes_are_conflated(manager, async_server, wait_for_signal):
+    nodes = await _add_variables(async_server, 2)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+    for item in items:
+        item.set_data.reset_mock()
+
+    async with wait_for_signal(
+        manager.values_dropped, check_params_callback=lambda count: count == 2
+    ):
+        # More values than the default queue holds
+        _notify(manager, [(0, 1), (1, 2), (1, 3)])
+        # Values left over when the next response arrives
+        manager._end_response()
+        _notify(manager, [(0, 4)])
+
+    items[0].set_data.assert_called_once_with(
+        ua.AttributeIds.Value, ua.DataValue(ua.Variant(4)), emit=False
+    )
+    items[1].set_data.assert_called_once_with(
+        ua.AttributeIds.Value, ua.DataValue(ua.Variant(3)), emit=False
+    )
+    assert manager.dropped_values == {
+        (nodes[0].nodeid, ua.AttributeIds.Value): 1,
+        (nodes[1].nodeid, ua.AttributeIds.Value): 1,
+    }
+
+
+async def test_suspend_and_resume(manager, async_server):
+    nodes = await _add_variables(async_server, 3)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    subscription = manager._subscription
+    handles = [manager.subscription_data[node.nodeid].handle for node in nodes]
+    with mock.patch.object(subscription, "server") as mock_server:
+        mock_server.set_monitoring_mode = mock.AsyncMock(
+            return_value=[ua.StatusCode()] * 3
+        )
+        for item in items:
+            manager.suspend(item)
+        await manager.wait_for_pending()
+
+        mock_server.set_monitoring_mode.assert_called_once()
+        params = mock_server.set_monitoring_mode.call_args.args[0]
+        assert params.MonitoringMode == ua.MonitoringMode.Disabled
+        assert params.MonitoredItemIds == handles
+
+        mock_server.set_monitoring_mode.reset_mock()
+        for item in items:
+            manager.resume(item)
+        await manager.wait_for_pending()
+
+        mock_server.set_monitoring_mode.assert_called_once()
+        params = mock_server.set_monitoring_mode.call_args.args[0]
+        assert params.MonitoringMode == ua.MonitoringMode.Reporting
+
+    # Suspended items stay subscribed
+    assert set(manager.subscription_data.keys()) == {node.nodeid for node in nodes}
+
+
+async def test_model_changed(manager, async_server, wait_for_signal):
+    change = ua.ModelChangeStructureDataType(
+        Affected=async_server.nodes.objects.nodeid,
+        Verb=ua.ModelChangeStructureVerbMask.ReferenceAdded,
+    )
+    generator = await async_server.get_event_generator(
+        ua.ObjectIds.GeneralModelChangeEventType, async_server.nodes.server
+    )
+    generator.event.Changes = [change]
+    generator.event.data_types["Changes"] = ua.VariantType.ExtensionObject
+
+    async with wait_for_signal(
+        manager.model_changed, check_params_callback=lambda changes: changes == [change]
+    ):
+        await generator.trigger()
+
+
+async def test_shared_monitored_item(manager, async_server, wait_for_signal):
+    nodes = await _add_variables(async_server, 1)
+    items = [mock.Mock(node=nodes[0]) for _ in range(2)]
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        subscription,
+        "create_monitored_items",
+        wraps=subscription.create_monitored_items,
+    ) as mock_create:
+        for item in items:
+            manager.subscribe(item)
+        await manager.wait_for_pending()
+
+    assert mock_create.call_count == 1
+    assert len(mock_create.call_args.args[0]) == 1
+
+    # Values are passed on to every consumer
+    signal = manager.subscription_data[nodes[0].nodeid].signal.signal
+    async with wait_for_signal(
+        signal, check_params_callback=lambda value: value.Value.Value == 43
+    ):
+        await nodes[0].write_value(43)
+    for item in items:
+        item.set_data.assert_called_with(ua.AttributeIds.Value, mock.ANY, emit=False)
+
+    # The monitored item stays until its last consumer is gone
+    with mock.patch.object(
+        subscription, "unsubscribe", wraps=subscription.unsubscribe
+    ) as mock_unsubscribe:
+        manager.unsubscribe(items[0])
+        await manager.wait_for_pending()
+        mock_unsubscribe.assert_not_called()
+        assert nodes[0].nodeid in manager.subscription_data
+
+        manager.unsubscribe(items[1])
+        await manager.wait_for_pending()
+        mock_unsubscribe.assert_called_once()
+        assert not manager.subscription_data
+
+
+async def test_shared_monitored_item_suspended_by_all(manager, async_server):
+    nodes = await _add_variables(async_server, 1)
+    items = [mock.Mock(node=nodes[0]) for _ in range(2)]
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    subscription = manager._subscription
+    with mock.patch.object(subscription, "server") as mock_server:
+        mock_server.set_monitoring_mode = mock.AsyncMock(return_value=[ua.StatusCode()])
+        manager.suspend(items[0])
+        await manager.wait_for_pending()
+        mock_server.set_monitoring_mode.assert_not_called()
+
+        manager.suspend(items[1])
+        await manager.wait_for_pending()
+        mock_server.set_monitoring_mode.assert_called_once()
+        params = mock_server.set_monitoring_mode.call_args.args[0]
+        assert params.MonitoringMode == ua.MonitoringMode.Disabled
+
+        # Shown again in one place is enough to report again
+        mock_server.set_monitoring_mode.reset_mock()
+        manager.resume(items[0])
+        await manager.wait_for_pending()
+        mock_server.set_monitoring_mode.assert_called_once()
+        params = mock_server.set_monitoring_mode.call_args.args[0]
+        assert params.MonitoringMode == ua.MonitoringMode.Reporting
+
+
+def _slow_tiers(nodeid):
+    return TierConfiguration(
+        [
+            SubscriptionTier("Default"),
+            SubscriptionTier("Slow", 100, 50, 5, True, ua.DeadbandType.Absolute, 10),
+        ],
+        [TierRule(nodeid.to_string(), "Slow")],
+    )
+
+
+async def test_subscription_tiers(manager, async_server, wait_for_signal):
+    nodes = await _add_variables(async_server, 2)
+    items = [mock.Mock(node=node) for node in nodes]
+    manager.set_tiers(_slow_tiers(nodes[0].nodeid))
+
+    for item in items:
+        manager.subscribe(item)
+    await manager.wait_for_pending()
+
+    # Each publishing interval has its own subscription
+    assert set(manager._subscriptions.keys()) == {500, 100}
+    assert set(manager.subscription_data.keys()) == {node.nodeid for node in nodes}
+
+    slow = manager._subscriptions[100]
+    (monitored_item,) = slow._monitored_items.values()
+    assert monitored_item.node.nodeid == nodes[0].nodeid
+    assert monitored_item.mfilter.DeadbandType == ua.DeadbandType.Absolute
+    assert monitored_item.mfilter.DeadbandValue == 10
+
+    signal = manager.subscription_data[nodes[0].nodeid].signal.signal
+    async with wait_for_signal(
+        signal, check_params_callback=lambda value: value.Value.Value == 43
+    ):
+        await nodes[0].write_value(43)
+    items[0].set_data.assert_called_with(ua.AttributeIds.Value, mock.ANY, emit=False)
+
+
+async def test_start_uses_default_tier(application, async_server):
+    manager = SubscriptionManager()
+    manager.set_tiers(TierConfiguration([SubscriptionTier("Default", 200)]))
+    await manager.start(_Client(async_server))
+    try:
+        assert set(manager._subscriptions.keys()) == {200}
+        assert manager._subscription is manager._subscriptions[200]
+    finally:
+        manager.stop()
+        manager.deleteLater()
+
+
+async def test_set_tiers(manager, async_server):
+    nodes = await _add_variables(async_server, 2)
+    items = [mock.Mock(node=node) for node in nodes]
+
+    subscription = manager._subscription
+    with mock.patch.object(
+        manager, "_set_monitoring_mode_batch"
+    ) as mock_set_monitoring_mode, mock.patch.object(
+        subscription, "unsubscribe", wraps=subscription.unsubscribe
+    ) as mock_unsubscribe:
+        for item in items:
+            manager.subscribe(item)
+        manager.suspend(items[0])
+        await manager.wait_for_pending()
+        mock_set_monitoring_mode.reset_mock()
+
+        manager.set_tiers(_slow_tiers(nodes[0].nodeid))
+        await manager.wait_for_pending()
+
+    # Only the node whose tier changed is moved, and it stays suspended
+    mock_unsubscribe.assert_called_once()
+    assert len(mock_unsubscribe.call_args.args[0]) == 1
+    slow = manager._subscriptions[100]
+    assert [data.node.nodeid for data in slow._monitored_items.values()] == [
+        nodes[0].nodeid
+    ]
+    mock_set_monitoring_mode.assert_called_once_with(
+        100, ua.MonitoringMode.Disabled, [mock.ANY]
+    )
+    assert set(manager.subscription_data.keys()) == {node.nodeid for node in nodes}
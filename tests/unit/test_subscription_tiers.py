@@ -0,0 +1,71 @@
+from PyQt5.QtCore import QSettings
+
+from asyncua import ua
+
+from uaclient.subscription_tiers import (
+    SubscriptionTier,
+    TierConfiguration,
+    TierRule,
+    monitored_item_request,
+)
+
+_FAST = SubscriptionTier("Fast", 100, 50, 10, False)
+_SLOW = SubscriptionTier("Slow", 5000, 1000, 1, True, ua.DeadbandType.Percent, 2.5)
+
+
+def test_tier_for():
+    tiers = TierConfiguration(
+        [SubscriptionTier("Default"), _FAST, _SLOW],
+        [
+            TierRule("ns=2;s=Line1.Speed", "Fast"),
+            TierRule("ns=2;s=Line1.*", "Slow"),
+            TierRule("ns=3;*", "Unknown"),
+        ],
+    )
+
+    assert tiers.tier_for(ua.NodeId("Line1.Speed", 2)) == _FAST
+    assert tiers.tier_for(ua.NodeId("Line1.Temperature", 2)) == _SLOW
+    assert tiers.tier_for(ua.NodeId("Line2.Temperature", 2)).name == "Default"
+
+    # Rules naming a tier that doesn't exist are ignored
+    assert tiers.tier_for(ua.NodeId(1, 3)).name == "Default"
+
+
+def test_save_and_load(tmp_path):
+    tiers = TierConfiguration(
+        [SubscriptionTier("Default"), _FAST, _SLOW],
+        [TierRule("ns=2;s=Line1.*", "Slow")],
+    )
+
+    settings = QSettings(str(tmp_path / "settings.ini"), QSettings.IniFormat)
+    tiers.save(settings)
+    assert TierConfiguration.load(settings) == tiers
+
+
+def test_load_nothing(tmp_path):
+    settings = QSettings(str(tmp_path / "settings.ini"), QSettings.IniFormat)
+    assert TierConfiguration.load(settings) == TierConfiguration()
+
+
+def test_monitored_item_request():
+    request = monitored_item_request(
+        ua.NodeId("Line1.Speed", 2), ua.AttributeIds.Value, _SLOW, 1234
+    )
+
+    assert request.ItemToMonitor.NodeId == ua.NodeId("Line1.Speed", 2)
+    parameters = request.RequestedParameters
+    assert parameters.ClientHandle == 1234
+    assert parameters.SamplingInterval == 1000
+    assert parameters.QueueSize == 1
+    assert parameters.DiscardOldest
+    assert parameters.Filter.DeadbandType == ua.DeadbandType.Percent
+    assert parameters.Filter.DeadbandValue == 2.5
+
+    request = monitored_item_request(
+        ua.NodeId("Line1.Speed", 2),
+        ua.AttributeIds.Value,
+        _SLOW,
+        1234,
+        use_filter=False,
+    )
+    assert not isinstance(request.RequestedParameters.Filter, ua.DataChangeFilter)
@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from PyQt5.QtWidgets import QMessageBox
+
+from asyncua import ua
+
+from uaclient.subscription_tiers import SubscriptionTier, TierConfiguration, TierRule
+from uaclient.subscription_tiers_dialog import SubscriptionTiersDialog
+
+_TIERS = TierConfiguration(
+    [
+        SubscriptionTier("Default"),
+        SubscriptionTier("Slow", 5000, 1000, 1, True, ua.DeadbandType.Absolute, 0.5),
+    ],
+    [TierRule("ns=2;*", "Slow")],
+)
+
+
+@pytest.fixture
+def dialog(application):
+    dialog = SubscriptionTiersDialog(None, _TIERS)
+    yield dialog
+    dialog.deleteLater()
+
+
+def test_unchanged(dialog):
+    dialog.accept()
+    assert dialog.tiers == _TIERS
+
+
+def test_add_tier_and_rule(dialog):
+    dialog._ui.addTierButton.click()
+    dialog._ui.addRuleButton.click()
+    dialog.accept()
+
+    assert dialog.tiers.tiers[2] == SubscriptionTier("Tier 3")
+    assert dialog.tiers.rules[1] == TierRule("*", "Default")
+
+
+def test_rename_tier(dialog):
+    dialog._ui.tiersTable.item(1, 0).setText("Archive")
+    dialog.accept()
+
+    assert dialog.tiers.tiers[1].name == "Archive"
+    assert dialog.tiers.rules == [TierRule("ns=2;*", "Archive")]
+
+
+def test_remove_tier(dialog):
+    dialog._ui.tiersTable.setCurrentCell(1, 0)
+    dialog._ui.removeTierButton.click()
+    dialog.accept()
+
+    # Its rules fall back to the default tier
+    assert dialog.tiers.tiers == [SubscriptionTier("Default")]
+    assert dialog.tiers.rules == [TierRule("ns=2;*", "Default")]
+
+
+def test_invalid_number(dialog):
+    dialog._ui.tiersTable.item(1, 1).setText("fast")
+    with patch.object(QMessageBox, "warning") as mock:
+        dialog.accept()
+        mock.assert_called_once()
+
+    assert dialog.tiers == _TIERS
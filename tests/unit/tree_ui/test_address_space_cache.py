@@ -0,0 +1,136 @@
+import pytest
+
+from asyncua import ua
+
+from uaclient.tree_ui import AddressSpaceCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AddressSpaceCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _reference(nodeid, name):
+    reference = ua.ReferenceDescription()
+    reference.NodeId = nodeid
+    reference.BrowseName = ua.QualifiedName(name, nodeid.NamespaceIndex)
+    reference.DisplayName = ua.LocalizedText(name)
+    reference.NodeClass = ua.NodeClass.Variable
+    return reference
+
+
+def test_children_without_server(cache):
+    cache.set_children(ua.NodeId(1, 2), [(_reference(ua.NodeId(2, 2), "a"), {})])
+    assert cache.children(ua.NodeId(1, 2)) is None
+
+
+def test_set_children(cache):
+    cache.select_server("urn:test", ["http://opcfoundation.org/UA/", "urn:test"], {})
+    assert cache.children(ua.NodeId(1, 2)) is None
+
+    description = ua.Variant(ua.LocalizedText("The first"))
+    cache.set_children(
+        ua.NodeId(1, 2),
+        [
+            (
+                _reference(ua.NodeId(2, 2), "First"),
+                {ua.AttributeIds.Description: description},
+            ),
+            (_reference(ua.NodeId("second", 2), "Second"), {}),
+        ],
+    )
+
+    # Read back before and after they've been written
+    for flush in (False, True):
+        if flush:
+            cache.flush()
+        children = cache.children(ua.NodeId(1, 2))
+        assert children is not None
+        assert [reference.NodeId for reference, _ in children] == [
+            ua.NodeId(2, 2),
+            ua.NodeId("second", 2),
+        ]
+        assert children[0][0].DisplayName == ua.LocalizedText("First")
+        assert children[0][1] == {ua.AttributeIds.Description: description}
+        assert children[1][1] == {}
+
+
+def test_invalidate_children(cache):
+    cache.select_server("urn:test", ["http://opcfoundation.org/UA/", "urn:test"], {})
+    cache.set_children(ua.NodeId(1, 2), [(_reference(ua.NodeId(2, 2), "a"), {})])
+    cache.set_children(ua.NodeId(2, 2), [(_reference(ua.NodeId(3, 2), "b"), {})])
+
+    cache.invalidate_children(ua.NodeId(1, 2))
+
+    assert cache.children(ua.NodeId(1, 2)) is None
+    assert cache.children(ua.NodeId(2, 2)) is not None
+
+    cache.flush()
+    assert cache.children(ua.NodeId(1, 2)) is None
+    assert cache.children(ua.NodeId(2, 2)) is not None
+
+
+def test_servers_are_separate(cache, tmp_path):
+    cache.select_server("urn:first", ["http://opcfoundation.org/UA/"], {})
+    cache.set_children(ua.NodeId(1, 0), [(_reference(ua.NodeId(2, 0), "a"), {})])
+
+    cache.select_server("urn:second", ["http://opcfoundation.org/UA/"], {})
+    assert cache.children(ua.NodeId(1, 0)) is None
+
+    # It's kept on disk
+    cache.close()
+    cache = AddressSpaceCache(str(tmp_path / "cache.sqlite"))
+    cache.select_server("urn:first", ["http://opcfoundation.org/UA/"], {})
+    assert cache.children(ua.NodeId(1, 0)) is not None
+    cache.close()
+
+
+def test_endpoints_and_users_are_separate(cache):
+    namespaces = ["http://opcfoundation.org/UA/"]
+    cache.select_server(
+        "urn:test", namespaces, {}, endpoint_url="opc.tcp://a:4840", user="alice"
+    )
+    cache.set_children(ua.NodeId(1, 0), [(_reference(ua.NodeId(2, 0), "a"), {})])
+
+    cache.select_server(
+        "urn:test", namespaces, {}, endpoint_url="opc.tcp://a:4840", user="bob"
+    )
+    assert cache.children(ua.NodeId(1, 0)) is None
+
+    cache.select_server(
+        "urn:test", namespaces, {}, endpoint_url="opc.tcp://b:4840", user="alice"
+    )
+    assert cache.children(ua.NodeId(1, 0)) is None
+
+    cache.select_server(
+        "urn:test", namespaces, {}, endpoint_url="opc.tcp://a:4840", user="alice"
+    )
+    assert cache.children(ua.NodeId(1, 0)) is not None
+
+
+def test_namespace_version_change(cache):
+    namespaces = ["http://opcfoundation.org/UA/", "urn:test"]
+    cache.select_server("urn:test", namespaces, {"urn:test": "1"})
+    cache.set_children(ua.NodeId(1, 1), [(_reference(ua.NodeId(2, 1), "a"), {})])
+
+    cache.select_server("urn:test", namespaces, {"urn:test": "1"})
+    assert cache.children(ua.NodeId(1, 1)) is not None
+
+    cache.select_server("urn:test", namespaces, {"urn:test": "2"})
+    assert cache.children(ua.NodeId(1, 1)) is None
+
+
+async def test_load_server(cache, async_server):
+    session = async_server.nodes.root.session
+    await cache.load_server(session)
+
+    cache.set_children(ua.NodeId(1, 0), [(_reference(ua.NodeId(2, 0), "a"), {})])
+    assert cache.children(ua.NodeId(1, 0)) is not None
+
+    cache.unload_server()
+    assert cache.children(ua.NodeId(1, 0)) is None
+
+    await cache.load_server(session)
+    assert cache.children(ua.NodeId(1, 0)) is not None
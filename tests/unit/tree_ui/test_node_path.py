@@ -0,0 +1,50 @@
+import pytest
+
+from asyncua import ua
+
+from uaclient.tree_ui import resolve_node_path
+
+
+@pytest.fixture
+async def nodes(async_server):
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    variable_node = await object_node.add_variable(index, "TestVariable", 42)
+    return [
+        async_server.nodes.root.nodeid,
+        async_server.nodes.objects.nodeid,
+        object_node.nodeid,
+        variable_node.nodeid,
+    ]
+
+
+async def test_resolve_browse_path(async_server, nodes):
+    path = await resolve_node_path(
+        async_server.iserver.isession, "Objects/2:TestObject/2:TestVariable"
+    )
+
+    assert path == nodes
+
+
+async def test_resolve_nodeid(async_server, nodes):
+    path = await resolve_node_path(async_server.iserver.isession, nodes[-1].to_string())
+
+    assert path == nodes
+
+
+async def test_resolve_root(async_server):
+    path = await resolve_node_path(async_server.iserver.isession, "i=84")
+
+    assert path == [ua.NodeId(ua.ObjectIds.RootFolder)]
+
+
+async def test_resolve_unknown_browse_path(async_server, nodes):
+    with pytest.raises(ValueError):
+        await resolve_node_path(
+            async_server.iserver.isession, "Objects/2:TestObject/2:Missing"
+        )
+
+
+async def test_resolve_unknown_nodeid(async_server):
+    with pytest.raises(ua.UaStatusCodeError):
+        await resolve_node_path(async_server.iserver.isession, "ns=2;s=Missing")
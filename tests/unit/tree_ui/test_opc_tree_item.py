@@ -1,17 +1,18 @@
+import asyncio
 import pytest
+from unittest import mock
 from unittest.mock import ANY, create_autospec
 
-from PyQt5.QtCore import QAbstractItemModel, QPersistentModelIndex, QModelIndex
 from PyQt5.QtGui import QIcon
 
 from asyncua import ua
 
-from uaclient.tree_ui import OpcTreeItem
+from uaclient.tree_ui import AddressSpaceCache, OpcTreeItem, OpcTreeModel
 
 
 @pytest.fixture
 def mock_model(application):
-    yield create_autospec(QAbstractItemModel)
+    yield create_autospec(OpcTreeModel, instance=True)
 
 
 def opc_method(parent, value):
@@ -22,7 +23,6 @@ async def test_column_count_1(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
     assert item.column_count() == 1
@@ -32,7 +32,6 @@ async def test_column_count_2(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName, ua.AttributeIds.Description],
     )
     assert item.column_count() == 2
@@ -42,7 +41,6 @@ async def test_column_count_browse_name(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName, ua.AttributeIds.BrowseName],
     )
     assert item.column_count() == 2
@@ -52,7 +50,6 @@ async def test_column_count_node_class(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName, ua.AttributeIds.NodeClass],
     )
     assert item.column_count() == 2
@@ -62,7 +59,6 @@ async def test_child_count(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
     assert item.child_count() == 0
@@ -72,22 +68,17 @@ async def test_row_without_parent(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
     assert item.row() == 0
 
 
 async def test_row_with_parent(mock_model, async_server):
-    mock_model.index.return_value = QModelIndex()
-
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object(index, "TestObject")
     await node.add_variable(index, "TestVariable", 42)
 
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
     await item.refresh_children()
 
@@ -96,16 +87,12 @@ async def test_row_with_parent(mock_model, async_server):
 
 
 async def test_row_multiple_children(mock_model, async_server):
-    mock_model.index.return_value = QModelIndex()
-
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object(index, "TestObject")
     await node.add_variable(index, "TestVariable1", 42)
     await node.add_variable(index, "TestVariable2", 43)
 
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
     await item.refresh_children()
 
@@ -119,7 +106,6 @@ async def test_data(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         node,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
     )
     await item._refresh_data()
@@ -134,7 +120,6 @@ async def test_data_reversed(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         node,
-        QPersistentModelIndex(),
         [ua.AttributeIds.Value, ua.AttributeIds.DisplayName],
     )
     await item._refresh_data()
@@ -144,8 +129,6 @@ async def test_data_reversed(mock_model, async_server):
 
 
 async def _setup_child_tests(mock_model, async_server):
-    mock_model.index.return_value = QModelIndex()
-
     index = await async_server.register_namespace("test")
     node1 = await async_server.nodes.objects.add_object(index, "TestObject1")
     node2 = await async_server.nodes.objects.add_object(index, "TestObject2")
@@ -153,21 +136,18 @@ async def _setup_child_tests(mock_model, async_server):
     root_item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
 
     item1 = OpcTreeItem(
         mock_model,
         node1,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
 
     item2 = OpcTreeItem(
         mock_model,
         node2,
-        QPersistentModelIndex(),
         [ua.AttributeIds.DisplayName],
     )
 
@@ -208,51 +188,559 @@ async def test_add_child_reversed(mock_model, async_server):
     assert root_item.child(1) == item2
 
 
-async def test_refresh_children(mock_model, async_server, wait_for_signal):
+async def test_row_after_out_of_order_inserts(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    root_item = OpcTreeItem(
+        mock_model,
+        async_server.nodes.objects,
+        [ua.AttributeIds.DisplayName],
+    )
+
+    for name in ["C", "A", "E", "B", "D"]:
+        node = await async_server.nodes.objects.add_object(index, name)
+        item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+        await item._refresh_data()
+        await root_item.add_child(item)
+
+    assert [root_item.child(row).data(0) for row in range(5)] == [
+        "A",
+        "B",
+        "C",
+        "D",
+        "E",
+    ]
+    for row in range(5):
+        assert root_item.child(row).row() == row
+
+    # Appending keeps the cached rows valid
+    node = await async_server.nodes.objects.add_object(index, "F")
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+    await item._refresh_data()
+    await root_item.add_child(item)
+    assert root_item._rows_valid
+    assert item.row() == 5
+
+
+async def test_refresh_children(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object(index, "TestObject")
     child = await node.add_variable(index, "TestVariable", 42)
 
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
-    mock_model.index.return_value = QModelIndex()
-
     assert not item.children_fetched()
 
-    async with wait_for_signal(
-        item.item_added, check_params_callback=lambda item: item.node == child
-    ):
-        await item.refresh_children()
+    await item.refresh_children()
 
     assert item.child_count() == 1
     assert item.children_fetched()
+    mock_model._handle_item_added.assert_called_once_with(item.child(0))
+    assert item.child(0).node == child
 
     mock_model.beginInsertRows.assert_called_with(ANY, 0, 0)
     mock_model.endInsertRows.assert_called_with()
 
 
-async def test_clear_children(mock_model, async_server, wait_for_signal):
-    mock_model.index.return_value = QModelIndex()
+async def test_refresh_children_batches_requests(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(20):
+        await node.add_variable(index, f"TestVariable{number}", number)
 
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
+    )
+
+    session = node.session
+    with mock.patch.object(
+        session, "read", wraps=session.read
+    ) as mock_read, mock.patch.object(
+        session, "browse", wraps=session.browse
+    ) as mock_browse:
+        await item.refresh_children()
+
+    assert item.child_count() == 20
+    assert item.child(0).data(0) == "TestVariable0"
+    assert item.child(0).data(1) == "0"
+
+    # The number of requests doesn't depend upon the number of children, and
+    # everything Browse supplied isn't read again
+    assert mock_browse.call_count == 1
+    assert mock_read.call_count == 1
+    read_params = mock_read.call_args.args[0]
+    assert {node.AttributeId for node in read_params.NodesToRead} == {
+        ua.AttributeIds.Value
+    }
+
+
+async def test_refresh_children_reads_attributes_by_node_class(
+    mock_model, async_server
+):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object(index, "TestObject")
-    child = await node.add_variable(index, "TestVariable", 42)
+    await node.add_folder(index, "TestFolder")
+    variable = await node.add_variable(index, "TestVariable", 42)
 
     item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
+        mock_model, node, [ua.AttributeIds.DisplayName, ua.AttributeIds.Value]
     )
-    await item._refresh_data()
+
+    session = node.session
+    with mock.patch.object(session, "read", wraps=session.read) as mock_read:
+        await item.refresh_children()
+
+    # Folders don't have a value, so it's only read for the variable
+    read_params = mock_read.call_args.args[0]
+    assert [read_value_id.NodeId for read_value_id in read_params.NodesToRead] == [
+        variable.nodeid
+    ]
+    assert item.child(0).data(1) is None
+    assert not item.child(0).has_attribute(ua.AttributeIds.Value)
+    assert item.child(1).data(1) == "42"
+    assert item.child(1).has_attribute(ua.AttributeIds.Value)
+
+
+async def test_refresh_children_from_browse(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_folder(index, "TestFolder")
+
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+    await item.refresh_children()
+
+    child = item.child(0)
+    assert child.data(0) == "TestFolder"
+    assert child._data[ua.AttributeIds.NodeClass] == ua.NodeClass.Object
+    assert child._data[ua.AttributeIds.BrowseName] == ua.QualifiedName(
+        "TestFolder", index
+    )
+    assert (
+        child.icon().pixmap(20, 20).toImage()
+        == QIcon(":/folder.svg").pixmap(20, 20).toImage()
+    )
+
+
+async def test_refresh_children_shows_rows_before_reading(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_variable(index, "TestVariable", 42)
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
+    )
+
+    session = node.session
+    read = session.read
+    child_counts = []
+
+    async def _read(params):
+        child_counts.append(item.child_count())
+        assert item.child(0).data(1) is None
+        return await read(params)
+
+    with mock.patch.object(session, "read", side_effect=_read):
+        await item.refresh_children()
+
+    assert child_counts == [1]
+    assert item.child(0).data(1) == "42"
+
+
+async def test_revalidate_children_inserts_runs(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for name in "ACE":
+        await node.add_variable(index, name, 0)
+
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item.refresh_children()
-    assert item.children_fetched()
 
-    async with wait_for_signal(
-        item.item_removed, check_params_callback=lambda item: item.node == child
+    for name in "BDFG":
+        await node.add_variable(index, name, 0)
+
+    mock_model.beginInsertRows.reset_mock()
+    mock_model.endInsertRows.reset_mock()
+    await item.revalidate_children()
+
+    # One insert per run of consecutive rows
+    assert mock_model.beginInsertRows.call_args_list == [
+        mock.call(ANY, 1, 1),
+        mock.call(ANY, 3, 3),
+        mock.call(ANY, 5, 6),
+    ]
+    assert mock_model.endInsertRows.call_count == 3
+    assert [item.child(row).data(0) for row in range(7)] == list("ABCDEFG")
+
+
+async def test_refresh_children_from_cache(mock_model, async_server, tmp_path):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_variable(index, "TestVariable", 42, datatype=ua.ObjectIds.Int32)
+
+    cache = AddressSpaceCache(str(tmp_path / "cache.sqlite"))
+    cache.select_server("urn:test", ["http://opcfoundation.org/UA/"], {})
+    columns = [ua.AttributeIds.DisplayName, ua.AttributeIds.DataType]
+
+    item = OpcTreeItem(mock_model, node, columns, cache=cache)
+    await item.refresh_children()
+    assert item.child(0).data(1) == "Int32"
+
+    await node.add_variable(index, "NewVariable", 43)
+
+    item = OpcTreeItem(mock_model, node, columns, cache=cache)
+    session = node.session
+    with mock.patch.object(session, "read", wraps=session.read) as mock_read:
+        mock_model.beginInsertRows.reset_mock()
+        await item.refresh_children()
+
+    # The cached child is shown before the server is asked for anything, then
+    # the new one is found by browsing again
+    assert mock_model.beginInsertRows.call_args_list == [
+        mock.call(ANY, 0, 0),
+        mock.call(ANY, 0, 0),
+    ]
+    assert [item.child(row).data(0) for row in range(2)] == [
+        "NewVariable",
+        "TestVariable",
+    ]
+    assert item.child(1).data(1) == "Int32"
+
+    # Only the new child's attributes needed reading
+    nodeids = {
+        read_value_id.NodeId
+        for call in mock_read.call_args_list
+        for read_value_id in call.args[0].NodesToRead
+    }
+    assert nodeids == {item.child(0).node.nodeid}
+
+    assert len(cache.children(node.nodeid)) == 2
+    cache.close()
+
+
+async def test_abandoned_fetch_is_not_cached(mock_model, async_server, tmp_path):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_variable(index, "TestVariable", 42, datatype=ua.ObjectIds.Int32)
+
+    cache = AddressSpaceCache(str(tmp_path / "cache.sqlite"))
+    cache.select_server("urn:test", ["http://opcfoundation.org/UA/"], {})
+    columns = [ua.AttributeIds.DisplayName, ua.AttributeIds.DataType]
+    item = OpcTreeItem(mock_model, node, columns, cache=cache)
+
+    reading = asyncio.Event()
+
+    async def _read_node_attributes(*args):
+        reading.set()
+        await asyncio.sleep(10)
+
+    with mock.patch(
+        "uaclient.tree_ui._ua_services.read_node_attributes",
+        side_effect=_read_node_attributes,
     ):
+        task = asyncio.create_task(item.refresh_children())
+        await reading.wait()
+
+        # The row is shown, but its other columns haven't been read yet
+        assert item.child_count() == 1
+        assert item.cancel_fetch()
+    await asyncio.wait_for(task, 1)
+    assert cache.children(node.nodeid) is None
+
+    # Revalidating reads what was left out, and only then are they cached
+    await item.revalidate_children()
+    assert item.child(0).data(1) == "Int32"
+    assert cache.children(node.nodeid)[0][1] == {
+        ua.AttributeIds.DataType: ua.Variant(ua.NodeId(ua.ObjectIds.Int32))
+    }
+    cache.close()
+
+
+def _page_browses(session, page_size):
+    """Split the server's browse results into pages, as a real server would"""
+    browse = session.browse
+    remaining = {}
+
+    def _page(result, references):
+        result.References = references[:page_size]
+        if len(references) > page_size:
+            continuation_point = str(len(remaining)).encode()
+            remaining[continuation_point] = references[page_size:]
+            result.ContinuationPoint = continuation_point
+
+    async def _browse(params):
+        results = await browse(params)
+        if params.RequestedMaxReferencesPerNode:
+            for result in results:
+                _page(result, result.References)
+        return results
+
+    async def _browse_next(params):
+        references = remaining.pop(params.ContinuationPoints[0])
+        result = ua.BrowseResult()
+        if not params.ReleaseContinuationPoints:
+            _page(result, references)
+        return [result]
+
+    session.browse = mock.AsyncMock(side_effect=_browse)
+    session.browse_next = mock.AsyncMock(side_effect=_browse_next)
+    return remaining
+
+
+async def test_fetch_more(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(5):
+        await node.add_variable(index, f"TestVariable{number}", number)
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName],
+        page_size=2,
+    )
+
+    session = mock.Mock(wraps=node.session)
+    with mock.patch.object(node, "session", session):
+        _page_browses(session, 2)
+
+        await item.refresh_children()
+        assert item.child_count() == 2
+        assert item.can_fetch_more()
+
+        task = item.fetch_more()
+        assert not item.can_fetch_more()
+        await task
+        assert item.child_count() == 4
+        assert item.can_fetch_more()
+
+        await item.fetch_more()
+        assert item.child_count() == 5
+        assert not item.can_fetch_more()
+
+    assert [item.child(row).data(0) for row in range(5)] == [
+        f"TestVariable{number}" for number in range(5)
+    ]
+
+
+async def test_fetch_more_fails(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(5):
+        await node.add_variable(index, f"TestVariable{number}", number)
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName],
+        page_size=2,
+    )
+
+    session = mock.Mock(wraps=node.session)
+    with mock.patch.object(node, "session", session):
+        _page_browses(session, 2)
+
+        await item.refresh_children()
+        assert item.can_fetch_more()
+
+        # As if the server had dropped the continuation point
+        session.browse_next.side_effect = ua.UaStatusCodeError(
+            ua.StatusCodes.BadContinuationPointInvalid
+        )
+        with pytest.raises(ua.UaStatusCodeError):
+            await item.fetch_more()
+
+        # It isn't asked for again, nor released
+        assert not item.can_fetch_more()
         item.clear_children()
+        await asyncio.sleep(0)
+        session.browse_next.assert_awaited_once()
+
+
+async def test_revalidate_partially_fetched_children(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    variables = [
+        await node.add_variable(index, f"TestVariable{number}", number)
+        for number in range(4)
+    ]
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName],
+        page_size=2,
+    )
+
+    session = mock.Mock(wraps=node.session)
+    with mock.patch.object(node, "session", session):
+        _page_browses(session, 2)
+
+        await item.refresh_children()
+        assert item.child_count() == 2
+
+        # Only the child known to be new is added, without browsing again
+        session.browse.reset_mock()
+        await item.revalidate_children(added=[variables[3].nodeid])
+        assert node.nodeid not in [
+            description.NodeId
+            for call in session.browse.await_args_list
+            for description in call.args[0].NodesToBrowse
+        ]
+        assert item.child_count() == 3
+        assert item.can_fetch_more()
+
+        # It isn't added twice when its page comes
+        await item.fetch_more()
+        assert not item.can_fetch_more()
+
+    assert [item.child(row).data(0) for row in range(item.child_count())] == [
+        f"TestVariable{number}" for number in range(4)
+    ]
+
+
+async def test_revalidate_partially_fetched_incomplete_children(
+    mock_model, async_server
+):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(4):
+        await node.add_variable(
+            index, f"TestVariable{number}", number, datatype=ua.ObjectIds.Int32
+        )
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.DataType],
+        page_size=2,
+    )
+
+    reading = asyncio.Event()
+
+    async def _read_node_attributes(*args):
+        reading.set()
+        await asyncio.sleep(10)
+
+    session = mock.Mock(wraps=node.session)
+    with mock.patch.object(node, "session", session):
+        _page_browses(session, 2)
+
+        with mock.patch(
+            "uaclient.tree_ui._ua_services.read_node_attributes",
+            side_effect=_read_node_attributes,
+        ):
+            task = asyncio.create_task(item.refresh_children())
+            await reading.wait()
+            assert item.cancel_fetch()
+        await asyncio.wait_for(task, 1)
+        assert item.child(0).data(1) is None
+
+        # What the abandoned fetch left out is read, without losing the place
+        await item.revalidate_children()
+        assert [item.child(row).data(1) for row in range(2)] == ["Int32", "Int32"]
+        assert item.can_fetch_more()
+
+
+async def test_clear_releases_continuation_point(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(5):
+        await node.add_variable(index, f"TestVariable{number}", number)
+
+    item = OpcTreeItem(
+        mock_model,
+        node,
+        [ua.AttributeIds.DisplayName],
+        page_size=2,
+    )
+
+    session = mock.Mock(wraps=node.session)
+    with mock.patch.object(node, "session", session):
+        remaining = _page_browses(session, 2)
+
+        await item.refresh_children()
+        assert remaining
+
+        item.clear_children()
+        await asyncio.sleep(0)
+
+    params = session.browse_next.await_args.args[0]
+    assert params.ReleaseContinuationPoints
+    assert not remaining
+    assert not item.can_fetch_more()
+
+
+async def _start_slow_refresh(item):
+    """Start refreshing the item's children, and wait until it's browsing"""
+    browsing = asyncio.Event()
+
+    async def _browse_children_pages(*args):
+        browsing.set()
+        await asyncio.sleep(10)
+        yield []
+
+    browse_children = mock.patch(
+        "uaclient.tree_ui._ua_services.browse_children_pages",
+        side_effect=_browse_children_pages,
+    )
+    browse_children.start()
+    task = asyncio.create_task(item.refresh_children())
+    await browsing.wait()
+    browse_children.stop()
+    return task
+
+
+async def test_refresh_children_cancelled_by_clear(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_variable(index, "TestVariable", 42)
+
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+
+    task = await _start_slow_refresh(item)
+    item.clear_children()
+    await asyncio.wait_for(task, 1)
 
+    assert item.child_count() == 0
+    assert not item.children_fetched()
+    mock_model.beginInsertRows.assert_not_called()
+
+
+async def test_refresh_children_cancelled_by_refresh(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    await node.add_variable(index, "TestVariable", 42)
+
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+
+    task = await _start_slow_refresh(item)
+    await item.refresh_children()
+    await asyncio.wait_for(task, 1)
+
+    # Only the newer refresh added anything
+    assert item.child_count() == 1
+    mock_model.beginInsertRows.assert_called_once()
+
+
+async def test_clear_children(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_object(index, "TestObject")
+    child = await node.add_variable(index, "TestVariable", 42)
+
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
+    await item._refresh_data()
+    await item.refresh_children()
+    assert item.children_fetched()
+    child_item = item.child(0)
+    assert child_item.node == child
+
+    item.clear_children()
+
+    mock_model._handle_item_removed.assert_called_once_with(child_item)
     assert item.child_count() == 0
     assert not item.children_fetched()
 
@@ -260,36 +748,72 @@ async def test_clear_children(mock_model, async_server, wait_for_signal):
     mock_model.endRemoveRows.assert_called_with()
 
 
-async def test_set_data(mock_model, async_server, wait_for_signal):
-    mock_model.index.return_value = QModelIndex()
+async def test_set_data(mock_model, async_server):
+    item = OpcTreeItem(
+        mock_model,
+        async_server.nodes.objects,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
+    )
+
+    item.set_data(ua.AttributeIds.Value, ua.DataValue(42))
+
+    mock_model._handle_data_changed.assert_called_once_with(item, 1)
+
 
+def test_is_lightweight(mock_model):
+    item = OpcTreeItem(mock_model, None, [ua.AttributeIds.DisplayName])
+
+    assert not hasattr(item, "__dict__")
+
+
+async def test_set_data_formats_lazily(mock_model, async_server):
     item = OpcTreeItem(
         mock_model,
         async_server.nodes.objects,
-        QPersistentModelIndex(),
         [ua.AttributeIds.Value],
     )
 
-    async with wait_for_signal(item.data_changed):
-        item.set_data(ua.AttributeIds.Value, ua.DataValue(42))
+    with mock.patch(
+        "uaclient.tree_ui._opc_tree_item.val_to_string", wraps=str
+    ) as mock_val_to_string:
+        for value in range(10):
+            item.set_data(ua.AttributeIds.Value, ua.DataValue(value))
+        mock_val_to_string.assert_not_called()
+
+        assert item.data(0) == "9"
+        assert item.data(0) == "9"
+        mock_val_to_string.assert_called_once_with(9)
+
+        item.set_data(ua.AttributeIds.Value, ua.DataValue(10))
+        assert item.data(0) == "10"
+        assert mock_val_to_string.call_count == 2
 
 
 async def test_icon_without_data(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_variable(index, "TestVariable", 42)
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
 
     assert item.icon() is None
 
 
+async def test_icon_is_shared(mock_model, async_server):
+    index = await async_server.register_namespace("test")
+    node1 = await async_server.nodes.objects.add_variable(index, "TestVariable1", 1)
+    node2 = await async_server.nodes.objects.add_variable(index, "TestVariable2", 2)
+    item1 = OpcTreeItem(mock_model, node1, [ua.AttributeIds.DisplayName])
+    item2 = OpcTreeItem(mock_model, node2, [ua.AttributeIds.DisplayName])
+    await item1._refresh_data()
+    await item2._refresh_data()
+
+    assert item1.icon() is item1.icon()
+    assert item1.icon() is item2.icon()
+
+
 async def test_icon_folder(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_folder(index, "TestFolder")
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -301,9 +825,7 @@ async def test_icon_folder(mock_model, async_server):
 async def test_icon_object(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object(index, "TestObject")
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -315,9 +837,7 @@ async def test_icon_object(mock_model, async_server):
 async def test_icon_object_type(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_object_type(index, "TestObjectType")
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -329,9 +849,7 @@ async def test_icon_object_type(mock_model, async_server):
 async def test_icon_property(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_property(index, "TestProperty", 42)
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -343,9 +861,7 @@ async def test_icon_property(mock_model, async_server):
 async def test_icon_variable(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_variable(index, "TestVariable", 42)
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -359,9 +875,7 @@ async def test_icon_variable_type(mock_model, async_server):
     node = await async_server.nodes.objects.add_variable_type(
         index, "TestVariableType", 1
     )
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -379,9 +893,7 @@ async def test_icon_method(mock_model, async_server):
         [ua.VariantType.Int64],
         [ua.VariantType.Int64],
     )
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -393,9 +905,7 @@ async def test_icon_method(mock_model, async_server):
 async def test_icon_data_type(mock_model, async_server):
     index = await async_server.register_namespace("test")
     node = await async_server.nodes.objects.add_data_type(index, "TestDataType")
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
@@ -409,9 +919,7 @@ async def test_icon_reference_type(mock_model, async_server):
     node = await async_server.nodes.objects.add_reference_type(
         index, "TestReferenceType"
     )
-    item = OpcTreeItem(
-        mock_model, node, QPersistentModelIndex(), [ua.AttributeIds.DisplayName]
-    )
+    item = OpcTreeItem(mock_model, node, [ua.AttributeIds.DisplayName])
     await item._refresh_data()
 
     assert (
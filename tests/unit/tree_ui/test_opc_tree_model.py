@@ -80,10 +80,13 @@ async def test_data(tree_view, async_server, wait_for_signal):
     await model.set_root_node(object_node)
 
     root_index = model.index(0, 0)
-    async with wait_for_signal(
-        model.item_added, check_params_callback=lambda item: item.node == node
-    ):
-        tree_view.setExpanded(root_index, True)
+
+    # Rows are shown first, their values follow
+    async with wait_for_signal(model.dataChanged):
+        async with wait_for_signal(
+            model.item_added, check_params_callback=lambda item: item.node == node
+        ):
+            tree_view.setExpanded(root_index, True)
 
     assert model.data(root_index) == "TestObject"
     assert model.data(model.index(0, 0, root_index)) == "TestVariable"
@@ -95,6 +98,26 @@ async def test_data(tree_view, async_server, wait_for_signal):
     )
 
 
+async def test_data_dropped_values(tree_view, async_server):
+    dropped_values = {}
+    model = OpcTreeModel(
+        tree_view,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
+        dropped_values=dropped_values,
+    )
+
+    index = await async_server.register_namespace("test")
+    node = await async_server.nodes.objects.add_variable(index, "TestVariable", 42)
+    await model.set_root_node(node)
+
+    value_index = model.index(0, 1)
+    assert model.data(value_index, Qt.ItemDataRole.ToolTipRole) is None
+
+    dropped_values[(node.nodeid, ua.AttributeIds.Value)] = 3
+    assert "3" in model.data(value_index, Qt.ItemDataRole.ToolTipRole)
+    assert model.data(model.index(0, 0), Qt.ItemDataRole.ToolTipRole) is None
+
+
 async def _expand_root_node(tree_view, async_server, wait_for_signal):
     model = OpcTreeModel(tree_view, [ua.AttributeIds.Value])
 
@@ -136,6 +159,338 @@ async def test_collapse_root_node(tree_view, async_server, wait_for_signal):
     assert model.rowCount(index) == 0
 
 
+async def test_find_items(tree_view, async_server, wait_for_signal):
+    model, node = await _expand_root_node(tree_view, async_server, wait_for_signal)
+
+    items = model.find_items(node.nodeid)
+    assert len(items) == 1
+    assert items[0].node == node
+    assert items[0] is model.index(0, 0, model.index(0, 0)).internalPointer()
+
+    async with wait_for_signal(model.item_removed):
+        tree_view.setExpanded(model.index(0, 0), False)
+
+    assert model.find_items(node.nodeid) == []
+
+
+async def test_find_items_after_collapsing_ancestor(
+    tree_view, async_server, wait_for_signal
+):
+    model = OpcTreeModel(tree_view, [ua.AttributeIds.DisplayName])
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    folder = await object_node.add_folder(namespace, "TestFolder")
+    node = await folder.add_variable(namespace, "TestVariable", 42)
+
+    await model.set_root_node(object_node)
+    root_index = model.index(0, 0)
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(root_index, True)
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(model.index(0, 0, root_index), True)
+    assert len(model.find_items(node.nodeid)) == 1
+
+    # Everything below the collapsed item goes, not just its children
+    async with wait_for_signal(
+        model.item_removed, check_params_callback=lambda item: item.node == node
+    ):
+        tree_view.setExpanded(root_index, False)
+
+    assert model.find_items(node.nodeid) == []
+    assert model.find_items(folder.nodeid) == []
+
+
+async def test_collapse_keeps_cached_children(tree_view, async_server, wait_for_signal):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName], collapsed_cache_size=1
+    )
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    node = await object_node.add_variable(namespace, "TestVariable", 42)
+
+    await model.set_root_node(object_node)
+    index = model.index(0, 0)
+
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(index, True)
+
+    removed = []
+    model.item_removed.connect(removed.append)
+
+    async with wait_for_signal(
+        model.item_suspended, check_params_callback=lambda item: item.node == node
+    ):
+        tree_view.setExpanded(index, False)
+
+    assert model.rowCount(index) == 1
+    assert not removed
+
+    # Re-expanding shows the cached child right away, and picks up changes
+    new_node = await object_node.add_variable(namespace, "NewVariable", 43)
+    async with wait_for_signal(
+        model.item_added, check_params_callback=lambda item: item.node == new_node
+    ):
+        async with wait_for_signal(
+            model.item_resumed, check_params_callback=lambda item: item.node == node
+        ):
+            tree_view.setExpanded(index, True)
+
+    assert model.rowCount(index) == 2
+    assert model.index(0, 0, index).data() == "NewVariable"
+    assert not removed
+
+
+async def test_collapse_while_fetching_drops_children(
+    tree_view, async_server, wait_for_signal
+):
+    model = OpcTreeModel(
+        tree_view,
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.DataType],
+        collapsed_cache_size=1,
+    )
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    await object_node.add_variable(namespace, "TestVariable", 42)
+
+    await model.set_root_node(object_node)
+    index = model.index(0, 0)
+
+    # The row is added before its data type has been read
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(index, True)
+
+    async with wait_for_signal(model.item_removed):
+        tree_view.setExpanded(index, False)
+
+    assert model.rowCount(index) == 0
+    assert not index.internalPointer().children_fetched()
+
+
+async def test_collapse_partly_paged_drops_children(
+    tree_view, async_server, wait_for_signal
+):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName], collapsed_cache_size=1
+    )
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    await object_node.add_variable(namespace, "TestVariable", 42)
+
+    await model.set_root_node(object_node)
+    index = model.index(0, 0)
+    item = index.internalPointer()
+
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(index, True)
+
+    # As if more pages were left on the server
+    item._continuation_point = b"1"
+
+    with mock.patch(
+        "uaclient.tree_ui._ua_services.release_continuation_point"
+    ) as mock_release:
+        async with wait_for_signal(model.item_removed):
+            tree_view.setExpanded(index, False)
+
+    mock_release.assert_called_once_with(item.node.session, b"1")
+    assert model.rowCount(index) == 0
+    assert not model._collapsed_items
+
+
+async def test_collapsed_cache_is_limited(tree_view, async_server, wait_for_signal):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName], collapsed_cache_size=1
+    )
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    for name in ("First", "Second"):
+        folder = await object_node.add_folder(namespace, name)
+        await folder.add_variable(namespace, f"{name}Variable", 42)
+
+    await model.set_root_node(object_node)
+    root_index = model.index(0, 0)
+    await root_index.internalPointer().refresh_children()
+    first_index = model.index(0, 0, root_index)
+    second_index = model.index(1, 0, root_index)
+
+    for index in (first_index, second_index):
+        async with wait_for_signal(model.item_added):
+            tree_view.setExpanded(index, True)
+
+    async with wait_for_signal(model.item_suspended):
+        tree_view.setExpanded(first_index, False)
+    assert model.rowCount(first_index) == 1
+
+    # Caching the second subtree pushes out the first
+    async with wait_for_signal(model.item_removed):
+        tree_view.setExpanded(second_index, False)
+
+    assert model.rowCount(first_index) == 0
+    assert model.rowCount(second_index) == 1
+
+
+async def test_collapsed_cache_forgets_removed_items(
+    tree_view, async_server, wait_for_signal
+):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName], collapsed_cache_size=2
+    )
+
+    namespace = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(namespace, "TestObject")
+    folder = await object_node.add_folder(namespace, "TestFolder")
+    await folder.add_variable(namespace, "TestVariable", 42)
+
+    await model.set_root_node(object_node)
+    root_index = model.index(0, 0)
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(root_index, True)
+    folder_index = model.index(0, 0, root_index)
+    async with wait_for_signal(model.item_added):
+        tree_view.setExpanded(folder_index, True)
+
+    async with wait_for_signal(model.item_suspended):
+        tree_view.setExpanded(folder_index, False)
+    assert len(model._collapsed_items) == 1
+
+    # The cached folder goes along with its parent's children
+    async with wait_for_signal(model.item_removed):
+        root_index.internalPointer().clear_children()
+
+    assert len(model._collapsed_items) == 0
+
+
+async def test_reveal(tree_view, async_server):
+    model = OpcTreeModel(tree_view, [ua.AttributeIds.DisplayName])
+
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    variable_node = await object_node.add_variable(index, "TestVariable", 42)
+    await model.set_root_node(async_server.nodes.root)
+
+    variable_index = await model.reveal(
+        [
+            async_server.nodes.root.nodeid,
+            async_server.nodes.objects.nodeid,
+            object_node.nodeid,
+            variable_node.nodeid,
+        ]
+    )
+
+    assert variable_index.data() == "TestVariable"
+    assert tree_view.isExpanded(variable_index.parent())
+    assert tree_view.isExpanded(variable_index.parent().parent())
+
+    # Nothing beside the path is fetched
+    (server_item,) = model.find_items(async_server.nodes.server.nodeid)
+    assert not server_item.children_fetched()
+
+
+async def test_reveal_missing_node(tree_view, async_server):
+    model = OpcTreeModel(tree_view, [ua.AttributeIds.DisplayName])
+    await model.set_root_node(async_server.nodes.root)
+
+    with pytest.raises(ValueError):
+        await model.reveal([async_server.nodes.root.nodeid, ua.NodeId("Missing", 2)])
+
+
+def _model_change(nodeid, verb):
+    return ua.ModelChangeStructureDataType(Affected=nodeid, Verb=verb)
+
+
+async def test_apply_model_changes_reference_added(
+    tree_view, async_server, wait_for_signal
+):
+    model, node = await _expand_root_node(tree_view, async_server, wait_for_signal)
+    object_item = model.index(0, 0).internalPointer()
+
+    new_node = await object_item.node.add_variable(
+        node.nodeid.NamespaceIndex, "NewVariable", 43
+    )
+    await model.apply_model_changes(
+        [
+            _model_change(
+                object_item.node.nodeid,
+                ua.ModelChangeStructureVerbMask.ReferenceAdded,
+            )
+        ]
+    )
+
+    assert [child.node for child in object_item._children] == [new_node, node]
+    assert len(model.find_items(node.nodeid)) == 1
+
+
+async def test_apply_model_changes_node_added(tree_view, async_server, wait_for_signal):
+    model, node = await _expand_root_node(tree_view, async_server, wait_for_signal)
+    object_item = model.index(0, 0).internalPointer()
+
+    new_node = await object_item.node.add_variable(
+        node.nodeid.NamespaceIndex, "NewVariable", 43
+    )
+    await model.apply_model_changes(
+        [_model_change(new_node.nodeid, ua.ModelChangeStructureVerbMask.NodeAdded)]
+    )
+
+    assert len(model.find_items(new_node.nodeid)) == 1
+
+
+async def test_apply_model_changes_nodes_added_browse_once(
+    tree_view, async_server, wait_for_signal
+):
+    model, node = await _expand_root_node(tree_view, async_server, wait_for_signal)
+    object_item = model.index(0, 0).internalPointer()
+
+    new_nodes = [
+        await object_item.node.add_variable(
+            node.nodeid.NamespaceIndex, f"NewVariable{number}", number
+        )
+        for number in range(3)
+    ]
+
+    session = object_item.node.session
+    with mock.patch.object(session, "browse", wraps=session.browse) as mock_browse:
+        await model.apply_model_changes(
+            [
+                _model_change(
+                    new_node.nodeid, ua.ModelChangeStructureVerbMask.NodeAdded
+                )
+                for new_node in new_nodes
+            ]
+        )
+
+    # All the parents are found with one request
+    inverse_browses = [
+        call
+        for call in mock_browse.await_args_list
+        if call.args[0].NodesToBrowse[0].BrowseDirection == ua.BrowseDirection.Inverse
+    ]
+    assert len(inverse_browses) == 1
+    assert len(inverse_browses[0].args[0].NodesToBrowse) == 3
+
+    for new_node in new_nodes:
+        assert len(model.find_items(new_node.nodeid)) == 1
+
+
+async def test_apply_model_changes_node_deleted(
+    tree_view, async_server, wait_for_signal
+):
+    model, node = await _expand_root_node(tree_view, async_server, wait_for_signal)
+
+    await node.delete()
+    async with wait_for_signal(model.item_removed):
+        await model.apply_model_changes(
+            [_model_change(node.nodeid, ua.ModelChangeStructureVerbMask.NodeDeleted)]
+        )
+
+    assert model.rowCount(model.index(0, 0)) == 0
+    assert model.find_items(node.nodeid) == []
+
+
 async def test_data_changed(tree_view, async_server, wait_for_signal):
     model, _node = await _expand_root_node(tree_view, async_server, wait_for_signal)
 
@@ -154,6 +509,68 @@ async def test_data_changed(tree_view, async_server, wait_for_signal):
         item.set_data(ua.AttributeIds.Value, ua.DataValue(43))
 
 
+async def test_data_changed_is_coalesced(tree_view, async_server, wait_for_signal):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName, ua.AttributeIds.Value]
+    )
+
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(5):
+        await object_node.add_variable(index, f"TestVariable{number}", number)
+
+    await model.set_root_node(object_node)
+    root_index = model.index(0, 0)
+
+    # Wait for the values read while refreshing to be announced
+    async with wait_for_signal(model.dataChanged):
+        await root_index.internalPointer().refresh_children()
+
+    calls = []
+    model.dataChanged.connect(lambda start, end: calls.append((start, end)))
+
+    async with wait_for_signal(model.dataChanged):
+        for row in (1, 3):
+            item = model.index(row, 0, root_index).internalPointer()
+            for _ in range(10):
+                item.set_data(ua.AttributeIds.Value, ua.DataValue(42))
+        assert not calls
+
+    assert calls == [
+        (model.index(1, 1, root_index), model.index(3, 1, root_index)),
+    ]
+
+
+async def test_items_changed(tree_view, async_server, wait_for_signal):
+    model = OpcTreeModel(
+        tree_view, [ua.AttributeIds.DisplayName, ua.AttributeIds.Value]
+    )
+
+    index = await async_server.register_namespace("test")
+    object_node = await async_server.nodes.objects.add_object(index, "TestObject")
+    for number in range(3):
+        await object_node.add_variable(index, f"TestVariable{number}", number)
+
+    await model.set_root_node(object_node)
+    root_index = model.index(0, 0)
+    async with wait_for_signal(model.dataChanged):
+        await root_index.internalPointer().refresh_children()
+
+    calls = []
+    model.dataChanged.connect(lambda start, end: calls.append((start, end)))
+
+    items = [model.index(row, 0, root_index).internalPointer() for row in (0, 2)]
+    for item in items:
+        item.set_data(ua.AttributeIds.Value, ua.DataValue(42), emit=False)
+    async with wait_for_signal(model.dataChanged):
+        model.items_changed([(item, ua.AttributeIds.Value) for item in items])
+
+    assert calls == [
+        (model.index(0, 1, root_index), model.index(2, 1, root_index)),
+    ]
+    assert model.data(model.index(2, 1, root_index)) == "42"
+
+
 async def test_has_children(tree_view, async_server):
     model = OpcTreeModel(tree_view, [ua.AttributeIds.Value])
 
@@ -0,0 +1,190 @@
+import asyncio
+
+from unittest import mock
+
+from asyncua import ua
+
+from uaclient.tree_ui import _ua_services
+
+
+def _reference(name):
+    reference = ua.ReferenceDescription()
+    reference.NodeId = ua.NodeId(name, 2)
+    reference.BrowseName = ua.QualifiedName(name, 2)
+    return reference
+
+
+def _browse_result(references, continuation_point=None):
+    result = ua.BrowseResult()
+    result.References = references
+    result.ContinuationPoint = continuation_point
+    return result
+
+
+async def test_browse_children_follows_continuation_points():
+    session = mock.Mock()
+    session.browse = mock.AsyncMock(
+        return_value=[_browse_result([_reference("A")], b"1")]
+    )
+    session.browse_next = mock.AsyncMock(
+        side_effect=[
+            [_browse_result([_reference("B")], b"2")],
+            [_browse_result([_reference("C")])],
+        ]
+    )
+
+    references = await _ua_services.browse_children(session, ua.NodeId(1, 2))
+
+    assert [reference.BrowseName.Name for reference in references] == [
+        "A",
+        "B",
+        "C",
+    ]
+    assert session.browse.await_count == 1
+    assert session.browse_next.await_count == 2
+    params = session.browse_next.await_args_list[0].args[0]
+    assert params.ContinuationPoints == [b"1"]
+
+    description = session.browse.await_args.args[0].NodesToBrowse[0]
+    assert description.ResultMask == ua.BrowseResultMask.All
+
+
+async def test_read_attributes_chunks_requests():
+    session = mock.Mock()
+    session.read = mock.AsyncMock(
+        side_effect=lambda params: [
+            ua.DataValue(read_value_id.AttributeId)
+            for read_value_id in params.NodesToRead
+        ]
+    )
+
+    nodeids = [ua.NodeId(number, 2) for number in range(1000)]
+    attributes = [ua.AttributeIds.Value, ua.AttributeIds.Description]
+    values = await _ua_services.read_attributes(session, nodeids, attributes)
+
+    assert session.read.await_count == 2
+    assert len(values) == 1000
+    assert all(
+        [value.Value.Value for value in node_values] == attributes
+        for node_values in values
+    )
+
+
+async def test_read_attributes_nothing_to_read():
+    session = mock.Mock()
+    session.read = mock.AsyncMock()
+
+    assert await _ua_services.read_attributes(session, [], []) == []
+    session.read.assert_not_awaited()
+
+
+async def test_browse_children_page():
+    session = mock.Mock()
+    session.browse = mock.AsyncMock(
+        return_value=[_browse_result([_reference("A")], b"1")]
+    )
+    session.browse_next = mock.AsyncMock(
+        return_value=[_browse_result([_reference("B")])]
+    )
+
+    references, continuation_point = await _ua_services.browse_children_page(
+        session, ua.NodeId(1, 2), 1
+    )
+    assert [reference.BrowseName.Name for reference in references] == ["A"]
+    assert continuation_point == b"1"
+    assert session.browse.await_args.args[0].RequestedMaxReferencesPerNode == 1
+
+    references, continuation_point = await _ua_services.browse_next_page(
+        session, continuation_point
+    )
+    assert [reference.BrowseName.Name for reference in references] == ["B"]
+    assert continuation_point is None
+    assert not session.browse_next.await_args.args[0].ReleaseContinuationPoints
+
+
+async def test_release_continuation_point():
+    session = mock.Mock()
+    session.browse_next = mock.AsyncMock(return_value=[_browse_result([])])
+
+    await _ua_services.release_continuation_point(session, b"1")
+
+    params = session.browse_next.await_args.args[0]
+    assert params.ContinuationPoints == [b"1"]
+    assert params.ReleaseContinuationPoints
+
+
+async def test_translate_browse_path_prefixes_sends_one_request():
+    found = ua.BrowsePathResult()
+    found.Targets = [ua.BrowsePathTarget(TargetId=ua.NodeId(1, 2))]
+    missing = ua.BrowsePathResult()
+    missing.StatusCode = ua.StatusCode(ua.StatusCodes.BadNoMatch)
+
+    session = mock.Mock()
+    session.translate_browsepaths_to_nodeids = mock.AsyncMock(
+        return_value=[found, missing]
+    )
+
+    nodeids = await _ua_services.translate_browse_path_prefixes(
+        session,
+        ua.NodeId(ua.ObjectIds.RootFolder),
+        [ua.QualifiedName("A", 2), ua.QualifiedName("B", 2)],
+    )
+
+    assert nodeids == [ua.NodeId(1, 2), None]
+    session.translate_browsepaths_to_nodeids.assert_awaited_once()
+    browse_paths = session.translate_browsepaths_to_nodeids.await_args.args[0]
+    assert [
+        [element.TargetName.Name for element in browse_path.RelativePath.Elements]
+        for browse_path in browse_paths
+    ] == [["A"], ["A", "B"]]
+
+
+def test_has_attribute():
+    assert _ua_services.has_attribute(ua.NodeClass.Variable, ua.AttributeIds.Value)
+    assert not _ua_services.has_attribute(ua.NodeClass.Object, ua.AttributeIds.Value)
+    assert not _ua_services.has_attribute(ua.NodeClass.Method, ua.AttributeIds.DataType)
+    assert _ua_services.has_attribute(ua.NodeClass.Method, ua.AttributeIds.Description)
+
+
+async def test_read_node_attributes():
+    session = mock.Mock()
+    session.read = mock.AsyncMock(
+        side_effect=lambda params: [
+            ua.DataValue(read_value_id.AttributeId)
+            for read_value_id in params.NodesToRead
+        ]
+    )
+
+    values = await _ua_services.read_node_attributes(
+        session,
+        [
+            (ua.NodeId(1, 2), [ua.AttributeIds.DisplayName]),
+            (ua.NodeId(2, 2), []),
+            (ua.NodeId(3, 2), [ua.AttributeIds.DisplayName, ua.AttributeIds.Value]),
+        ],
+    )
+
+    assert [[value.Value.Value for value in node_values] for node_values in values] == [
+        [ua.AttributeIds.DisplayName],
+        [],
+        [ua.AttributeIds.DisplayName, ua.AttributeIds.Value],
+    ]
+    assert session.read.await_count == 1
+
+
+async def test_browse_children_pages_releases_abandoned_continuation_point():
+    session = mock.Mock()
+    session.browse = mock.AsyncMock(
+        return_value=[_browse_result([_reference("A")], b"1")]
+    )
+    session.browse_next = mock.AsyncMock(return_value=[_browse_result([])])
+
+    pages = _ua_services.browse_children_pages(session, ua.NodeId(1, 2))
+    await pages.__anext__()
+    # As when the caller is cancelled between pages
+    await pages.aclose()
+    await asyncio.sleep(0)
+
+    params = session.browse_next.await_args.args[0]
+    assert params.ContinuationPoints == [b"1"]
+    assert params.ReleaseContinuationPoints
@@ -0,0 +1,94 @@
+import pytest
+
+from PyQt5.QtWidgets import QTreeView
+
+from asyncua import ua
+
+from uaclient.tree_ui import OpcTreeModel, VisibleItemTracker
+
+
+@pytest.fixture
+def tree_view(application):
+    view = QTreeView()
+    view.resize(300, 300)
+    view.show()
+    yield view
+    view.deleteLater()
+
+
+async def _expanded_model(tree_view, async_server, wait_for_signal, count):
+    model = OpcTreeModel(tree_view, [ua.AttributeIds.DisplayName])
+
+    index = await async_server.register_namespace("test")
+    folder = await async_server.nodes.objects.add_folder(index, "TestFolder")
+    for number in range(count):
+        await folder.add_variable(index, f"TestVariable{number:03}", number)
+
+    await model.set_root_node(folder)
+    async with wait_for_signal(model.rowsInserted):
+        tree_view.setExpanded(model.index(0, 0), True)
+
+    return model
+
+
+def _names(items):
+    return {item.data(0) for item in items}
+
+
+async def test_disabled_by_default(tree_view, async_server, wait_for_signal):
+    await _expanded_model(tree_view, async_server, wait_for_signal, 10)
+    tracker = VisibleItemTracker(tree_view)
+
+    tracker.update()
+    assert not tracker.is_enabled()
+    assert tracker.shown_items() == []
+
+
+async def test_only_visible_rows_are_shown(tree_view, async_server, wait_for_signal):
+    model = await _expanded_model(tree_view, async_server, wait_for_signal, 200)
+    tracker = VisibleItemTracker(tree_view, prefetch_rows=5, release_rows=10)
+
+    shown = []
+    tracker.item_shown.connect(shown.append)
+    tracker.set_enabled(True)
+
+    assert shown
+    assert len(shown) < 200
+    assert model.index(0, 0).internalPointer() in shown
+    assert "TestVariable199" not in _names(shown)
+
+
+async def test_scrolling(tree_view, async_server, wait_for_signal):
+    model = await _expanded_model(tree_view, async_server, wait_for_signal, 200)
+    tracker = VisibleItemTracker(tree_view, prefetch_rows=5, release_rows=10)
+    tracker.set_enabled(True)
+
+    hidden = []
+    tracker.item_hidden.connect(hidden.append)
+
+    # Scrolling a single row stays within the hysteresis, nothing is hidden
+    tree_view.scrollTo(model.index(0, 0, model.index(0, 0)))
+    tree_view.verticalScrollBar().setValue(1)
+    tracker.update()
+    assert not hidden
+
+    tree_view.scrollToBottom()
+    tracker.update()
+
+    assert "TestVariable000" in _names(hidden)
+    assert "TestVariable199" in _names(tracker.shown_items())
+
+
+async def test_disable_hides_everything(tree_view, async_server, wait_for_signal):
+    await _expanded_model(tree_view, async_server, wait_for_signal, 10)
+    tracker = VisibleItemTracker(tree_view)
+    tracker.set_enabled(True)
+    shown = tracker.shown_items()
+    assert shown
+
+    hidden = []
+    tracker.item_hidden.connect(hidden.append)
+    tracker.set_enabled(False)
+
+    assert _names(hidden) == _names(shown)
+    assert tracker.shown_items() == []
@@ -0,0 +1,54 @@
+from PyQt5.QtWidgets import QDialog, QMessageBox
+
+from asyncua import ua
+
+from uaclient.events_ui import EventQuery, field_path
+from uaclient.eventfilter_ui import Ui_EventFilterDialog
+
+
+class EventFilterDialog(QDialog):
+    def __init__(self, parent, query: EventQuery):
+        super().__init__(parent)
+
+        self._query = query
+
+        self._ui = Ui_EventFilterDialog()
+        self._ui.setupUi(self)
+
+        self._ui.fieldsEdit.setText(", ".join(query.fields))
+        self._ui.eventTypeEdit.setText(query.event_type.to_string())
+        self._ui.minSeveritySpinBox.setValue(query.min_severity)
+
+    @property
+    def query(self) -> EventQuery:
+        return self._query
+
+    def accept(self) -> None:
+        try:
+            self._query = self._parse()
+        except ValueError as error:
+            QMessageBox.warning(self, "Invalid Event Filter", str(error))
+            return
+        super().accept()
+
+    def _parse(self) -> EventQuery:
+        fields = [
+            field.strip()
+            for field in self._ui.fieldsEdit.text().split(",")
+            if field.strip()
+        ]
+        if not fields:
+            raise ValueError("At least one field is needed")
+        for field in fields:
+            try:
+                field_path(field)
+            except ua.UaStringParsingError:
+                raise ValueError(f"{field} isn't a valid browse path") from None
+
+        text = self._ui.eventTypeEdit.text().strip()
+        try:
+            event_type = ua.NodeId.from_string(text)
+        except ua.UaStringParsingError:
+            raise ValueError(f"{text} isn't a valid NodeId") from None
+
+        return EventQuery(fields, event_type, self._ui.minSeveritySpinBox.value())
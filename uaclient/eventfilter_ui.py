@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'uaclient/eventfilter_ui.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_EventFilterDialog(object):
+    def setupUi(self, EventFilterDialog):
+        EventFilterDialog.setObjectName("EventFilterDialog")
+        EventFilterDialog.resize(480, 160)
+        self.formLayout = QtWidgets.QFormLayout(EventFilterDialog)
+        self.formLayout.setObjectName("formLayout")
+        self.fieldsLabel = QtWidgets.QLabel(EventFilterDialog)
+        self.fieldsLabel.setObjectName("fieldsLabel")
+        self.formLayout.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.fieldsLabel)
+        self.fieldsEdit = QtWidgets.QLineEdit(EventFilterDialog)
+        self.fieldsEdit.setObjectName("fieldsEdit")
+        self.formLayout.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.fieldsEdit)
+        self.eventTypeLabel = QtWidgets.QLabel(EventFilterDialog)
+        self.eventTypeLabel.setObjectName("eventTypeLabel")
+        self.formLayout.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.eventTypeLabel)
+        self.eventTypeEdit = QtWidgets.QLineEdit(EventFilterDialog)
+        self.eventTypeEdit.setObjectName("eventTypeEdit")
+        self.formLayout.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.eventTypeEdit)
+        self.minSeverityLabel = QtWidgets.QLabel(EventFilterDialog)
+        self.minSeverityLabel.setObjectName("minSeverityLabel")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.LabelRole, self.minSeverityLabel)
+        self.minSeveritySpinBox = QtWidgets.QSpinBox(EventFilterDialog)
+        self.minSeveritySpinBox.setMaximum(1000)
+        self.minSeveritySpinBox.setObjectName("minSeveritySpinBox")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.FieldRole, self.minSeveritySpinBox)
+        self.buttonBox = QtWidgets.QDialogButtonBox(EventFilterDialog)
+        self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
+        self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+        self.buttonBox.setObjectName("buttonBox")
+        self.formLayout.setWidget(3, QtWidgets.QFormLayout.SpanningRole, self.buttonBox)
+
+        self.retranslateUi(EventFilterDialog)
+        self.buttonBox.accepted.connect(EventFilterDialog.accept) # type: ignore
+        self.buttonBox.rejected.connect(EventFilterDialog.reject) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(EventFilterDialog)
+
+    def retranslateUi(self, EventFilterDialog):
+        _translate = QtCore.QCoreApplication.translate
+        EventFilterDialog.setWindowTitle(_translate("EventFilterDialog", "Subscribe to Events"))
+        self.fieldsLabel.setText(_translate("EventFilterDialog", "Fields"))
+        self.fieldsEdit.setToolTip(_translate("EventFilterDialog", "Browse names of the event fields to show, separated by commas (e.g. Time, Severity, 2:Line/2:Station)"))
+        self.eventTypeLabel.setText(_translate("EventFilterDialog", "Event type"))
+        self.eventTypeEdit.setToolTip(_translate("EventFilterDialog", "NodeId of the event type to receive (e.g. i=2915 for alarms)"))
+        self.minSeverityLabel.setText(_translate("EventFilterDialog", "Minimum severity"))
@@ -0,0 +1,10 @@
+from ._event_buffer import EventBuffer, DEFAULT_EVENT_CAPACITY  # noqa: F401
+from ._event_model import EventModel, EventRecord  # noqa: F401
+from ._event_query import (  # noqa: F401
+    DEFAULT_EVENT_FIELDS,
+    DEFAULT_EVENT_TYPE,
+    EventQuery,
+    event_filter,
+    field_path,
+)
+from ._event_subscriptions import EventSubscriptions, notifies_events  # noqa: F401
@@ -0,0 +1,59 @@
+from typing import Any, Iterable, List
+
+DEFAULT_EVENT_CAPACITY = 10000
+
+
+class EventBuffer:
+    """A fixed-capacity ring buffer, oldest entry first.
+
+    Once it's full, every new entry overwrites the oldest one, so memory use
+    doesn't depend on how many events arrive, and adding one is O(1) however
+    many there are.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_EVENT_CAPACITY) -> None:
+        if capacity <= 0:
+            raise ValueError("An event buffer needs a positive capacity")
+
+        self._entries: List[Any] = [None] * capacity
+        self._start = 0
+        self._length = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Any:
+        if not 0 <= index < self._length:
+            raise IndexError("event buffer index out of range")
+        return self._entries[(self._start + index) % len(self._entries)]
+
+    def extend(self, entries: Iterable[Any]) -> int:
+        """Add entries, returning how many old ones they overwrote"""
+        capacity = len(self._entries)
+        overwritten = 0
+        for entry in entries:
+            self._entries[(self._start + self._length) % capacity] = entry
+            if self._length < capacity:
+                self._length += 1
+            else:
+                self._start = (self._start + 1) % capacity
+                overwritten += 1
+        return overwritten
+
+    def discard_oldest(self, count: int) -> None:
+        count = min(count, self._length)
+        capacity = len(self._entries)
+        for offset in range(count):
+            # Don't keep their values alive
+            self._entries[(self._start + offset) % capacity] = None
+        self._start = (self._start + count) % capacity
+        self._length -= count
+
+    def clear(self) -> None:
+        self._entries = [None] * len(self._entries)
+        self._start = 0
+        self._length = 0
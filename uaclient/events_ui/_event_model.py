@@ -0,0 +1,151 @@
+import collections
+import datetime
+from typing import Any, List, Sequence
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QVariant
+from PyQt5.QtWidgets import QTableView
+
+from asyncua import ua
+
+from ._event_buffer import DEFAULT_EVENT_CAPACITY, EventBuffer
+
+# An event, as reported to a subscription: the display name of the node it was
+# subscribed on, the fields it was subscribed with, and their values. Every
+# event of a subscription shares its tuple of fields.
+EventRecord = collections.namedtuple("EventRecord", ["source", "fields", "values"])
+
+_SOURCE_COLUMN = "Source"
+
+
+def _to_display_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, ua.LocalizedText):
+        return value.Text
+    if isinstance(value, (ua.NodeId, ua.QualifiedName)):
+        return value.to_string()
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+class EventModel(QAbstractTableModel):
+    """The newest events, one row each, oldest first.
+
+    Events are kept in an `EventBuffer`, so there are never more rows than its
+    capacity: once it's full, every batch of new events pushes as many old ones
+    out. Rows are only formatted when the view asks for them, i.e. when they're
+    scrolled into view, so a flood of events costs a couple of row insertions
+    and removals per batch rather than a refresh of the whole table.
+
+    There's a column for the source of each event, and one for each field any
+    subscription selected, in the order they were first seen.
+    """
+
+    def __init__(self, view: QTableView, *, capacity: int = DEFAULT_EVENT_CAPACITY):
+        super().__init__()
+        self._view = view
+        self._buffer = EventBuffer(capacity)
+        self._columns: List[str] = [_SOURCE_COLUMN]
+        view.setModel(self)
+
+    def capacity(self) -> int:
+        return self._buffer.capacity
+
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._buffer)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        record = self._buffer[index.row()]
+        column = self._columns[index.column()]
+        if column == _SOURCE_COLUMN:
+            return record.source
+
+        try:
+            value = record.values[record.fields.index(column)]
+        except ValueError:
+            # It was selected by another subscription
+            return None
+        return _to_display_value(value)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> QVariant:
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return QVariant(self._columns[section])
+        return QVariant()
+
+    def add_events(self, records: Sequence[EventRecord]) -> None:
+        capacity = self._buffer.capacity
+        if len(records) > capacity:
+            # They'd only push each other out
+            start = len(records) - capacity
+            records = records[start:]
+        if not records:
+            return
+
+        self._add_columns(records)
+
+        # Keep following the newest events, unless the user scrolled away
+        scroll_bar = self._view.verticalScrollBar()
+        following = scroll_bar is None or scroll_bar.value() == scroll_bar.maximum()
+
+        # Rows only leave from the front and arrive at the back, even when the
+        # whole buffer is replaced, so the view never has to be reset
+        overflow = len(self._buffer) + len(records) - capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._buffer.discard_oldest(overflow)
+            self.endRemoveRows()
+
+        length = len(self._buffer)
+        self.beginInsertRows(QModelIndex(), length, length + len(records) - 1)
+        self._buffer.extend(records)
+        self.endInsertRows()
+
+        if following:
+            self._view.scrollToBottom()
+
+    def _add_columns(self, records: Sequence[EventRecord]) -> None:
+        # Subscriptions share their tuple of fields, so only look at each once
+        new_columns: List[str] = []
+        seen = set()
+        for record in records:
+            if id(record.fields) in seen:
+                continue
+            seen.add(id(record.fields))
+            for field in record.fields:
+                if field not in self._columns and field not in new_columns:
+                    new_columns.append(field)
+
+        if new_columns:
+            first = len(self._columns)
+            self.beginInsertColumns(QModelIndex(), first, first + len(new_columns) - 1)
+            self._columns.extend(new_columns)
+            self.endInsertColumns()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._buffer.clear()
+        self.endResetModel()
@@ -0,0 +1,87 @@
+import collections
+from typing import List, Sequence
+
+from asyncua import ua
+
+DEFAULT_EVENT_FIELDS = ("Time", "Severity", "SourceName", "EventType", "Message")
+DEFAULT_EVENT_TYPE = ua.NodeId(ua.ObjectIds.BaseEventType)
+
+# What to ask an event notifier for. Fields are browse paths relative to the
+# event type, e.g. "Severity" or "2:Line/2:Station" (see `field_path`). Only
+# events of the event type (or its subtypes) with at least the minimum severity
+# are reported.
+EventQuery = collections.namedtuple(
+    "EventQuery",
+    ["fields", "event_type", "min_severity"],
+    defaults=[DEFAULT_EVENT_FIELDS, DEFAULT_EVENT_TYPE, 0],
+)
+
+
+def field_path(field: str) -> List[ua.QualifiedName]:
+    """Parse a field's browse path, whose elements are separated by slashes
+    and default to namespace 0
+    """
+    return [ua.QualifiedName.from_string(name.strip()) for name in field.split("/")]
+
+
+def _field_operand(field: str) -> ua.SimpleAttributeOperand:
+    operand = ua.SimpleAttributeOperand()
+    operand.TypeDefinitionId = DEFAULT_EVENT_TYPE
+    operand.BrowsePath = field_path(field)
+    operand.AttributeId = ua.AttributeIds.Value
+    return operand
+
+
+def _element(
+    operator: ua.FilterOperator, operands: Sequence
+) -> ua.ContentFilterElement:
+    element = ua.ContentFilterElement()
+    element.FilterOperator = operator
+    element.FilterOperands = list(operands)
+    return element
+
+
+def event_filter(query: EventQuery) -> ua.EventFilter:
+    """Build the filter selecting a query's fields from the events it wants"""
+    filter_ = ua.EventFilter()
+    filter_.SelectClauses = [_field_operand(field) for field in query.fields]
+
+    conditions = []
+    # Every event is a BaseEventType, and some servers struggle with where
+    # clauses, so there's no need to ask
+    if query.event_type != DEFAULT_EVENT_TYPE:
+        conditions.append(
+            _element(
+                ua.FilterOperator.OfType,
+                [
+                    ua.LiteralOperand(
+                        Value=ua.Variant(query.event_type, ua.VariantType.NodeId)
+                    )
+                ],
+            )
+        )
+    if query.min_severity > 0:
+        conditions.append(
+            _element(
+                ua.FilterOperator.GreaterThanOrEqual,
+                [
+                    _field_operand("Severity"),
+                    ua.LiteralOperand(
+                        Value=ua.Variant(query.min_severity, ua.VariantType.UInt16)
+                    ),
+                ],
+            )
+        )
+
+    # The first element is the one that's evaluated, the others are only
+    # evaluated through it
+    if len(conditions) > 1:
+        conditions.insert(
+            0,
+            _element(
+                ua.FilterOperator.And,
+                [ua.ElementOperand(Index=1), ua.ElementOperand(Index=2)],
+            ),
+        )
+    filter_.WhereClause.Elements = conditions
+    return filter_
@@ -0,0 +1,217 @@
+import asyncio
+import collections
+import logging
+import threading
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from asyncua import Client, Node, ua
+from asyncua.common.events import Event
+from asyncua.common.subscription import Subscription
+from asyncua.ua import NodeId
+
+from uaclient.io_thread import IoThread, run_on
+from uaclient.reconnect import transfer_subscriptions
+from uaclient.subscription_tiers import DEFAULT_PUBLISHING_INTERVAL
+from ._event_buffer import DEFAULT_EVENT_CAPACITY
+from ._event_model import EventRecord
+from ._event_query import EventQuery, event_filter
+
+logger = logging.getLogger(__name__)
+
+# A node subscribed to, with the display name its events are shown with
+_EventSource = collections.namedtuple(
+    "_EventSource", ["nodeid", "name", "query", "fields", "handle"]
+)
+
+
+class _EventHandler:
+    def __init__(self, callback: Callable[[int, List[ua.Variant]], None]) -> None:
+        self._callback = callback
+
+    def event_notification(self, event: Event) -> None:
+        self._callback(event.server_handle, event.event_fields)
+
+
+async def notifies_events(node: Node) -> bool:
+    """Whether events can be subscribed to on a node"""
+    try:
+        value = await node.read_attribute(ua.AttributeIds.EventNotifier)
+    except ua.UaStatusCodeError:
+        # Only objects and views have the attribute
+        return False
+    notifier = ua.EventNotifier.parse_bitfield(value.Value.Value or 0)
+    return ua.EventNotifier.SubscribeToEvents in notifier
+
+
+class EventSubscriptions(QObject):
+    """Keeps event notifiers subscribed to, and passes their events on.
+
+    Every node is subscribed to with a query of its own (see `EventQuery`), in
+    a subscription shared by all of them. Events are buffered as they're
+    received, and passed on through `events_received` in batches: everything
+    that arrived by the time the GUI's event loop gets to them goes out
+    together. The buffer holds as many events as the event view does: should
+    more arrive before they can be shown, the oldest are dropped, as the view
+    would drop them anyway.
+
+    The session can run on an I/O thread (see `IoThread`), in which case
+    service calls are made there.
+    """
+
+    events_received = pyqtSignal(list)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        *,
+        publishing_interval: float = DEFAULT_PUBLISHING_INTERVAL,
+        capacity: int = DEFAULT_EVENT_CAPACITY,
+    ):
+        super().__init__(parent)
+
+        self._publishing_interval = publishing_interval
+        self._capacity = capacity
+
+        self._client: Optional[Client] = None
+        self._io_thread: Optional[IoThread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Created along with the first event monitored item
+        self._subscription: Optional[Subscription] = None
+        self._sources: Dict[NodeId, _EventSource] = dict()
+        self._sources_by_handle: Dict[int, _EventSource] = dict()
+
+        # Events that haven't been passed on yet, as server handles and field
+        # values. These are filled on the I/O thread, so they're guarded by a
+        # lock.
+        self._pending_lock = threading.Lock()
+        self._pending: Deque[Tuple[int, List[ua.Variant]]] = collections.deque(
+            maxlen=capacity
+        )
+
+    def start(self, client: Client, *, io_thread: Optional[IoThread] = None) -> None:
+        self._client = client
+        self._io_thread = io_thread
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        # The subscription goes with the session
+        self._client = None
+        self._io_thread = None
+        self._loop = None
+        self._subscription = None
+        self._sources.clear()
+        self._sources_by_handle.clear()
+        with self._pending_lock:
+            self._pending = collections.deque(maxlen=self._capacity)
+
+    def is_subscribed(self, nodeid: NodeId) -> bool:
+        return nodeid in self._sources
+
+    async def subscribe(self, node: Node, query: EventQuery = EventQuery()) -> None:
+        """Subscribe to a node's events, replacing any earlier query of it"""
+        if self._client is None:
+            return
+
+        await self.unsubscribe(node.nodeid)
+        name = (await node.read_display_name()).Text
+        source = _EventSource(node.nodeid, name, query, tuple(query.fields), None)
+        await self._create(source)
+
+    async def unsubscribe(self, nodeid: NodeId) -> None:
+        source = self._sources.pop(nodeid, None)
+        if source is None or self._subscription is None:
+            return
+
+        self._sources_by_handle.pop(source.handle, None)
+        await run_on(self._io_thread, self._subscription.unsubscribe(source.handle))
+
+    async def restore(self) -> None:
+        """Bring the subscription back after the client reconnected.
+
+        The server is asked to transfer it to the new session first. If it
+        can't, every node is subscribed to again.
+        """
+        client = self._client
+        if client is None or self._subscription is None:
+            return
+
+        try:
+            results = await run_on(
+                self._io_thread,
+                transfer_subscriptions(client, [self._subscription.subscription_id]),
+            )
+            if all(result.StatusCode.is_good() for result in results):
+                return
+        except ua.UaStatusCodeError as error:
+            logger.debug("Unable to transfer event subscription: %s", error)
+
+        sources = list(self._sources.values())
+        self._subscription = None
+        self._sources.clear()
+        self._sources_by_handle.clear()
+        for source in sources:
+            try:
+                await self._create(source)
+            except ua.UaStatusCodeError as error:
+                logger.warning(
+                    "Unable to subscribe to events of %s: %s", source.name, error
+                )
+
+    async def _create(self, source: _EventSource) -> None:
+        assert self._client is not None
+        if self._subscription is None:
+            self._subscription = await run_on(
+                self._io_thread,
+                self._client.create_subscription(
+                    self._publishing_interval, _EventHandler(self._handle_event)
+                ),
+            )
+        subscription = self._subscription
+        assert subscription is not None
+
+        handle = await run_on(
+            self._io_thread,
+            subscription.subscribe_events(
+                source.nodeid, evfilter=event_filter(source.query)
+            ),
+        )
+        source = source._replace(handle=handle)
+        self._sources[source.nodeid] = source
+        self._sources_by_handle[handle] = source
+
+    def _handle_event(self, handle: int, fields: List[ua.Variant]) -> None:
+        # Called on the I/O thread, if there is one
+        loop = self._loop
+        if loop is None:
+            return
+
+        with self._pending_lock:
+            if not self._pending:
+                # Dispatches this along with whatever else arrives before the
+                # GUI's loop gets to it
+                loop.call_soon_threadsafe(self._dispatch_events)
+            self._pending.append((handle, fields))
+
+    def _dispatch_events(self) -> None:
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = collections.deque(maxlen=self._capacity)
+
+        records: List[EventRecord] = []
+        for handle, fields in pending:
+            # Events may still arrive for a node just unsubscribed from
+            source = self._sources_by_handle.get(handle)
+            if source is not None:
+                records.append(
+                    EventRecord(
+                        source.name,
+                        source.fields,
+                        tuple(field.Value for field in fields),
+                    )
+                )
+
+        if records:
+            self.events_received.emit(records)
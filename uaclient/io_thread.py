@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class IoThread:
+    """An asyncio event loop of its own, running on a worker thread.
+
+    The OPC UA session runs there, so decoding publish responses, encryption
+    and request handling don't hold up the GUI. Coroutines are handed over
+    with `run`, and their results are awaited from the GUI's loop.
+    """
+
+    def __init__(self, name: str = "OPC UA I/O") -> None:
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def run(self, coroutine: Awaitable[T]) -> "asyncio.Future[T]":
+        """Run a coroutine on the worker thread, returning a future of the
+        calling thread's loop
+        """
+        if self._loop is None:
+            raise RuntimeError("I/O thread isn't running")
+        return asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)  # type: ignore
+        )
+
+    def _run(self) -> None:
+        assert self._loop is not None
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            # Whatever is left (e.g. asyncua's keepalive) is dropped with the
+            # session
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+
+
+class ThreadedSession:
+    """An asyncua session whose requests are made on an I/O thread.
+
+    It stands in for the session of Nodes, so everything reading or browsing
+    through them (the tree and attribute models, say) can stay unaware of the
+    thread. Everything that isn't a coroutine is passed through as is.
+    """
+
+    def __init__(self, session: Any, io_thread: IoThread) -> None:
+        self._session = session
+        self._io_thread = io_thread
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._session, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        io_thread = self._io_thread
+
+        def request(*args, **kwargs):
+            return io_thread.run(attribute(*args, **kwargs))
+
+        return request
+
+
+def run_on(io_thread: Optional[IoThread], coroutine: Awaitable[T]) -> Awaitable[T]:
+    """Run a coroutine on an I/O thread, or directly if there is none"""
+    if io_thread is None:
+        return coroutine
+    return io_thread.run(coroutine)
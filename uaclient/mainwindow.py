@@ -3,29 +3,39 @@
 import sys
 import asyncio
 import contextlib
-import collections
-import functools
 import logging
-from typing import Any, Dict, List
+import os
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
 
 from qasync import QEventLoop, QApplication, asyncClose, asyncSlot
 from PyQt5.QtCore import (
     QCoreApplication,
     QSettings,
-    pyqtSignal,
-    QObject,
     QTimer,
     QItemSelection,
     QSignalBlocker,
+    QStandardPaths,
 )
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QMainWindow, QWidget, QAbstractItemView, QDialog
+from PyQt5.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QAbstractItemView,
+    QDialog,
+    QInputDialog,
+)
 
-from asyncua import Client, Node
+from asyncua import Node
 from asyncua import crypto
-from asyncua.common.subscription import Subscription, DataChangeNotif
-from asyncua.ua import NodeId, AttributeIds, DataValue, MessageSecurityMode
-import asyncua.ua.uaerrors
+from asyncua.ua import (
+    AttributeIds,
+    MessageSecurityMode,
+    NodeId,
+    ObjectIds,
+    UaError,
+    UaStringParsingError,
+)
 
 # must be here for resources even if not used
 from uawidgets import resources  # noqa: F401
@@ -33,27 +43,18 @@ from uawidgets import resources  # noqa: F401
 from uaclient.mainwindow_ui import Ui_MainWindow
 from uaclient import tree_ui
 from uaclient import attrs_ui
+from uaclient import events_ui
 from uaclient.connection_dialog import ConnectionDialog
 from uaclient.application_certificate_dialog import ApplicationCertificateDialog
+from uaclient.event_filter_dialog import EventFilterDialog
+from uaclient.io_thread import IoThread, ThreadedSession
+from uaclient.reconnect import ReconnectingClient, reconnect_delays
+from uaclient.subscription_manager import SubscriptionManager, DEFAULT_BATCH_SIZE
+from uaclient.subscription_tiers import TierConfiguration
+from uaclient.subscription_tiers_dialog import SubscriptionTiersDialog
 
 logger = logging.getLogger(__name__)
 
-_SubscriptionData = collections.namedtuple("_SubscriptionData", ["handle", "signal"])
-
-
-class _SubscriptionSignal(QObject):
-    signal = pyqtSignal(DataValue)
-
-
-class _DataChangeHandler:
-    def __init__(self, _callback) -> None:
-        self._callback = _callback
-
-    async def datachange_notification(
-        self, node: Node, _value: Any, data: DataChangeNotif
-    ):
-        await self._callback(node, data.monitored_item.Value)
-
 
 class Window(QMainWindow):
     def __init__(self, *, use_settings=True) -> None:
@@ -63,9 +64,15 @@ class Window(QMainWindow):
             use_settings  # Support not using settings files (for tests)
         )
 
-        self._uaclient: Client = None
-        self._ua_subscription: Subscription = None
-        self._ua_subscription_data: Dict[NodeId, _SubscriptionData] = dict()
+        self._uaclient: Optional[ReconnectingClient] = None
+
+        # The session runs on its own thread while connected, and everything
+        # else talks to it through _session
+        self._io_thread: Optional[IoThread] = None
+        self._session: Optional[ThreadedSession] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._subscriptions = SubscriptionManager(self)
+        self._address_space_cache: Optional[tree_ui.AddressSpaceCache] = None
         self._application_certificate_path = None
         self._application_private_key_path = None
         self._user_certificate_path = None
@@ -73,6 +80,7 @@ class Window(QMainWindow):
         self._security_mode = None
         self._security_policy = None
         self._address_list: List[str] = []
+        self._event_query = events_ui.EventQuery()
 
         self._setup_settings()
         self._setup_ui()
@@ -82,6 +90,8 @@ class Window(QMainWindow):
     async def closeEvent(self, event):
         self._save_state()
         await self._disconnect()
+        if self._address_space_cache is not None:
+            self._address_space_cache.close()
         event.accept()
 
     def _setup_settings(self):
@@ -100,12 +110,22 @@ class Window(QMainWindow):
 
         self._setup_ui_tree()
         self._setup_ui_attrs()
+        self._setup_ui_events()
         self._setup_ui_dock()
         self._setup_ui_connect_disconnect()
         self._setup_ui_connection_dialog()
         self._setup_ui_application_certificate_dialog()
+        self._setup_ui_subscription_tiers_dialog()
+        self._setup_ui_go_to_node()
 
     def _setup_ui_tree(self):
+        if self._use_settings:
+            cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            os.makedirs(cache_dir, exist_ok=True)
+            self._address_space_cache = tree_ui.AddressSpaceCache(
+                os.path.join(cache_dir, "address_space.sqlite")
+            )
+
         self._model = tree_ui.OpcTreeModel(
             self._ui.treeView,
             [
@@ -114,9 +134,23 @@ class Window(QMainWindow):
                 AttributeIds.Description,
                 AttributeIds.DataType,
             ],
+            address_space_cache=self._address_space_cache,
+            dropped_values=self._subscriptions.dropped_values,
+        )
+        self._model.item_added.connect(self._subscriptions.subscribe)
+        self._model.item_removed.connect(self._subscriptions.unsubscribe)
+        self._model.item_suspended.connect(self._subscriptions.suspend)
+        self._model.item_resumed.connect(self._subscriptions.resume)
+        self._subscriptions.model_changed.connect(self._model.apply_model_changes)
+        self._subscriptions.values_changed.connect(self._model.items_changed)
+        self._subscriptions.values_dropped.connect(self._show_dropped_values)
+
+        self._visible_items = tree_ui.VisibleItemTracker(self._ui.treeView)
+        self._visible_items.item_shown.connect(self._subscriptions.subscribe)
+        self._visible_items.item_hidden.connect(self._subscriptions.unsubscribe)
+        self._ui.actionSubscribe_Visible_Only.toggled.connect(
+            self._set_subscribe_visible_only
         )
-        self._model.item_added.connect(self._subscribe_to_node)
-        self._model.item_removed.connect(self._unsubscribe_from_node)
 
         self._ui.treeView.header().setSectionResizeMode(0)
         self._ui.treeView.header().setStretchLastSection(True)
@@ -124,7 +158,7 @@ class Window(QMainWindow):
 
     def _setup_ui_attrs(self):
         self._attrs_ui = attrs_ui.AttrsWidget(
-            self._ui.attrView, self._ua_subscription_data
+            self._ui.attrView, self._subscriptions.subscription_data
         )
         self._attrs_ui.error.connect(self._show_error)
 
@@ -133,6 +167,20 @@ class Window(QMainWindow):
         )
         self._ui.attrRefreshButton.clicked.connect(self._attrs_ui.reload)
 
+    def _setup_ui_events(self):
+        # The capacity is only read at startup, as it sizes the buffers
+        capacity = events_ui.DEFAULT_EVENT_CAPACITY
+        if self._use_settings:
+            capacity = self._settings.value("events/capacity", capacity, type=int)
+
+        self._events = events_ui.EventSubscriptions(self, capacity=capacity)
+        self._event_model = events_ui.EventModel(self._ui.eventView, capacity=capacity)
+        self._events.events_received.connect(self._event_model.add_events)
+
+        self._ui.eventClearButton.clicked.connect(self._event_model.clear)
+        self._ui.actionSubscribeEvent.triggered.connect(self._show_event_filter_dialog)
+        self._ui.actionUnsubscribeEvents.triggered.connect(self._unsubscribe_events)
+
     def _setup_ui_dock(self):
         # fix stuff imposible to do in qtdesigner
         # remove dock titlebar for addressbar
@@ -154,6 +202,14 @@ class Window(QMainWindow):
             self._show_application_certificate_dialog
         )
 
+    def _setup_ui_subscription_tiers_dialog(self):
+        self._ui.actionSubscription_Tiers.triggered.connect(
+            self._show_subscription_tiers_dialog
+        )
+
+    def _setup_ui_go_to_node(self):
+        self._ui.actionGoToNode.triggered.connect(self._show_go_to_node_dialog)
+
     def _save_state(self):
         if not self._use_settings:
             return
@@ -170,6 +226,10 @@ class Window(QMainWindow):
         self._settings.setValue(
             "tree_view/header/state", self._ui.treeView.header().saveState()
         )
+        self._settings.setValue(
+            "tree_view/subscribe_visible_only",
+            self._ui.actionSubscribe_Visible_Only.isChecked(),
+        )
 
         self._settings.setValue(
             "opc_client/certificate", self._application_certificate_path
@@ -181,6 +241,26 @@ class Window(QMainWindow):
         self._settings.setValue("opc_client/user_key", self._user_private_key_path)
         self._settings.setValue("opc_client/security_mode", self._security_mode)
         self._settings.setValue("opc_client/security_policy", self._security_policy)
+        self._settings.setValue(
+            "tree_view/collapsed_cache_size", self._model.collapsed_cache_size()
+        )
+        self._settings.setValue(
+            "tree_view/browse_page_size", self._model.browse_page_size()
+        )
+        self._settings.setValue(
+            "opc_client/monitored_item_batch_size", self._subscriptions.batch_size
+        )
+
+        self._settings.beginGroup("subscription_tiers")
+        self._subscriptions.tiers.save(self._settings)
+        self._settings.endGroup()
+
+        self._settings.setValue("events/capacity", self._event_model.capacity())
+        self._settings.setValue("events/fields", list(self._event_query.fields))
+        self._settings.setValue(
+            "events/event_type", self._event_query.event_type.to_string()
+        )
+        self._settings.setValue("events/min_severity", self._event_query.min_severity)
 
         self._settings.beginGroup("attrs_widget")
         self._attrs_ui.save_state(self._settings)
@@ -211,6 +291,16 @@ class Window(QMainWindow):
         if data is not None:
             self._ui.treeView.header().restoreState(data)
 
+        self._ui.actionSubscribe_Visible_Only.setChecked(
+            self._settings.value("tree_view/subscribe_visible_only", False, type=bool)
+        )
+        self._model.set_collapsed_cache_size(
+            self._settings.value("tree_view/collapsed_cache_size", 20, type=int)
+        )
+        self._model.set_browse_page_size(
+            self._settings.value("tree_view/browse_page_size", 1000, type=int)
+        )
+
         self._application_certificate_path = self._settings.value(
             "opc_client/certificate", None
         )
@@ -223,43 +313,55 @@ class Window(QMainWindow):
         self._user_private_key_path = self._settings.value("opc_client/user_key", None)
         self._security_mode = self._settings.value("opc_client/security_mode", None)
         self._security_policy = self._settings.value("opc_client/security_policy", None)
+        self._subscriptions.batch_size = self._settings.value(
+            "opc_client/monitored_item_batch_size", DEFAULT_BATCH_SIZE, type=int
+        )
 
-        self._settings.beginGroup("attrs_widget")
-        self._attrs_ui.load_state(self._settings)
+        self._settings.beginGroup("subscription_tiers")
+        tiers = TierConfiguration.load(self._settings)
         self._settings.endGroup()
+        self._subscriptions.set_tiers(tiers)
 
-    async def _handle_subscription_data(self, node: Node, value: DataValue) -> None:
-        # Suppress KeyError because there might be a race condition
-        # between unsubscribing and receiving data, i.e. we might
-        # receive data for a subscription we just removed.
-        with contextlib.suppress(KeyError):
-            self._ua_subscription_data[node.nodeid].signal.signal.emit(value)
-
-    @asyncSlot(tree_ui.OpcTreeItem)
-    async def _subscribe_to_node(self, item: tree_ui.OpcTreeItem):
-        with contextlib.suppress(
-            asyncua.ua.uaerrors.BadAttributeIdInvalid,
-            asyncua.ua.uaerrors.BadTooManyMonitoredItems,
-        ):
-            subscription_data = _SubscriptionData(
-                await self._ua_subscription.subscribe_data_change(item.node),
-                _SubscriptionSignal(self),
-            )
-            self._ua_subscription_data[item.node.nodeid] = subscription_data
-            subscription_data.signal.signal.connect(
-                functools.partial(item.set_data, AttributeIds.Value)
+        fields = self._settings.value(
+            "events/fields", list(events_ui.DEFAULT_EVENT_FIELDS), type=list
+        )
+        try:
+            event_type = NodeId.from_string(
+                self._settings.value(
+                    "events/event_type",
+                    events_ui.DEFAULT_EVENT_TYPE.to_string(),
+                    type=str,
+                )
             )
+        except UaStringParsingError:
+            event_type = events_ui.DEFAULT_EVENT_TYPE
+        self._event_query = events_ui.EventQuery(
+            fields or events_ui.DEFAULT_EVENT_FIELDS,
+            event_type,
+            self._settings.value("events/min_severity", 0, type=int),
+        )
 
-    @asyncSlot(tree_ui.OpcTreeItem)
-    async def _unsubscribe_from_node(self, item: tree_ui.OpcTreeItem):
-        try:
-            subscription_data = self._ua_subscription_data.pop(item.node.nodeid)
-        except KeyError:
+        self._settings.beginGroup("attrs_widget")
+        self._attrs_ui.load_state(self._settings)
+        self._settings.endGroup()
+
+    def _set_subscribe_visible_only(self, enabled: bool):
+        if enabled == self._visible_items.is_enabled():
             return
 
-        # Disconnect signal from all slots, and unsubscribe from the OPC data
-        subscription_data.signal.signal.disconnect()
-        await self._ua_subscription.unsubscribe(subscription_data.handle)
+        # Hand every item over from one mode to the other. Items that remain
+        # subscribed keep their monitored items, as the subscription manager
+        # cancels an unsubscribe that is followed by a subscribe.
+        if enabled:
+            self._model.item_added.disconnect(self._subscriptions.subscribe)
+            for item in self._model.items():
+                self._subscriptions.unsubscribe(item)
+            self._visible_items.set_enabled(True)
+        else:
+            self._visible_items.set_enabled(False)
+            for item in self._model.items():
+                self._subscriptions.subscribe(item)
+            self._model.item_added.connect(self._subscriptions.subscribe)
 
     @asyncSlot(QItemSelection, QItemSelection)
     async def _handle_selection(
@@ -298,19 +400,151 @@ class Window(QMainWindow):
             self._application_certificate_path = dia.certificate_path
             self._application_private_key_path = dia.private_key_path
 
+    def _show_dropped_values(self, count: int):
+        self._ui.droppedValuesLabel.setText(f"{count} values dropped" if count else "")
+
+    def _show_subscription_tiers_dialog(self):
+        dia = SubscriptionTiersDialog(self, self._subscriptions.tiers)
+        ret = dia.exec_()
+        if ret == QDialog.Accepted:
+            self._subscriptions.set_tiers(dia.tiers)
+
+    @asyncSlot()
+    async def _show_event_filter_dialog(self):
+        node = self._current_node()
+        if node is None:
+            return
+
+        try:
+            notifies_events = await events_ui.notifies_events(node)
+        except UaError as ex:
+            self._show_error(ex)
+            return
+        if not notifies_events:
+            self._show_error(f"{node.nodeid.to_string()} doesn't notify events")
+            return
+
+        dia = EventFilterDialog(self, self._event_query)
+        ret = dia.exec_()
+        if ret == QDialog.Accepted:
+            self._event_query = dia.query
+            await self.subscribe_events(node, self._event_query)
+
+    async def subscribe_events(self, node: Node, query: events_ui.EventQuery) -> None:
+        """Show a node's events in the event view"""
+        try:
+            await self._events.subscribe(node, query)
+        except UaError as ex:
+            self._show_error(ex)
+
+    @asyncSlot()
+    async def _unsubscribe_events(self):
+        node = self._current_node()
+        if node is None:
+            return
+
+        try:
+            await self._events.unsubscribe(node.nodeid)
+        except UaError as ex:
+            self._show_error(ex)
+
+    def _current_node(self) -> Optional[Node]:
+        if self._uaclient is None:
+            return None
+
+        index = self._ui.treeView.currentIndex()
+        if not index.isValid() or index.internalPointer() is None:
+            return None
+        return index.internalPointer().node
+
+    @asyncSlot()
+    async def _show_go_to_node_dialog(self):
+        if self._uaclient is None:
+            return
+
+        text, ok = QInputDialog.getText(
+            self,
+            "Go to Node",
+            "NodeId (e.g. ns=2;i=1234) or browse path (e.g. Objects/2:Device):",
+        )
+        if ok and text.strip():
+            await self.go_to_node(text.strip())
+
+    async def go_to_node(self, text: str) -> None:
+        """Expand the tree down to a node, and select it"""
+        try:
+            path = await tree_ui.resolve_node_path(self._session, text)
+            index = await self._model.reveal(path)
+        except (ValueError, UaError) as ex:
+            self._show_error(ex)
+            return
+
+        self._ui.treeView.setCurrentIndex(index)
+        self._ui.treeView.scrollTo(index)
+
     @asyncSlot()
     async def _connect(self):
         uri = self._ui.addrComboBox.currentText()
         uri = uri.strip()
-        self._uaclient = Client(url=uri)
+
+        self._io_thread = IoThread()
+        self._io_thread.start()
+        try:
+            self._uaclient = await self._io_thread.run(self._create_client(uri))
+        except Exception as ex:
+            self._io_thread.stop()
+            self._io_thread = None
+            self._show_error(ex)
+            raise
+        self._session = ThreadedSession(self._uaclient.uaclient, self._io_thread)
+
+        # Reported on the I/O thread
+        loop = asyncio.get_running_loop()
+
+        async def connection_lost(error: Exception) -> None:
+            loop.call_soon_threadsafe(self._start_reconnect, error)
+
+        self._uaclient.connection_lost_callback = connection_lost
+
+        self._save_new_uri(uri)
+
+        await self._subscriptions.start(self._uaclient, io_thread=self._io_thread)
+        self._events.start(self._uaclient, io_thread=self._io_thread)
+
+        if self._address_space_cache is not None:
+            try:
+                endpoint_url, user = self._cache_identity(uri)
+                await self._address_space_cache.load_server(
+                    self._session, endpoint_url=endpoint_url, user=user
+                )
+            except UaError as error:
+                # Still usable, just without the cache
+                logger.warning("Unable to identify server for caching: %s", error)
+
+        await self._model.set_root_node(Node(self._session, ObjectIds.RootFolder))
+        self._ui.treeView.setFocus()
+
+    def _cache_identity(self, uri: str) -> Tuple[str, str]:
+        # The endpoint and user the address space is seen through, without the
+        # password that may be part of the URI
+        url = urlsplit(uri)
+        netloc = url.hostname or ""
+        if url.port is not None:
+            netloc = f"{netloc}:{url.port}"
+        endpoint_url = url._replace(netloc=netloc).geturl()
+        return endpoint_url, url.username or self._user_certificate_path or ""
+
+    async def _create_client(self, uri: str) -> ReconnectingClient:
+        # Runs on the I/O thread, which the client is bound to from then on
+        client = ReconnectingClient(url=uri)
 
         if self._user_private_key_path:
-            await self._uaclient.load_private_key(self._user_private_key_path)
+            await client.load_private_key(self._user_private_key_path)
         if self._user_certificate_path:
-            await self._uaclient.load_client_certificate(self._user_certificate_path)
+            await client.load_client_certificate(self._user_certificate_path)
 
         if self._security_mode is not None and self._security_policy is not None:
-            await self._uaclient.set_security(
+            await client.set_security(
                 getattr(
                     crypto.security_policies, "SecurityPolicy" + self._security_policy
                 ),
@@ -319,33 +553,68 @@ class Window(QMainWindow):
                 mode=getattr(MessageSecurityMode, self._security_mode),
             )
 
-        try:
-            await self._uaclient.connect()
-        except Exception as ex:
-            self._show_error(ex)
-            raise
+        await client.connect()
+        return client
 
-        self._save_new_uri(uri)
+    def _start_reconnect(self, error: Exception) -> None:
+        if self._uaclient is None or self._reconnect_task is not None:
+            return
 
-        self._ua_subscription = await self._uaclient.create_subscription(
-            500, _DataChangeHandler(self._handle_subscription_data)
-        )
+        self._show_error(f"Connection lost, reconnecting: {error}")
+        self._reconnect_task = asyncio.create_task(self._reconnect())
 
-        await self._model.set_root_node(self._uaclient.nodes.root)
-        self._ui.treeView.setFocus()
+    async def _reconnect(self) -> None:
+        """Reconnect with the same client until it works, backing off after
+        every failed attempt, then bring the subscriptions and values back
+        """
+        client = self._uaclient
+        io_thread = self._io_thread
+        assert client is not None and io_thread is not None
+        try:
+            for delay in reconnect_delays():
+                await asyncio.sleep(delay)
+                if self._uaclient is not client:
+                    return
+
+                try:
+                    await io_thread.run(client.reconnect())
+                    await self._subscriptions.restore()
+                    await self._events.restore()
+                except (OSError, asyncio.TimeoutError, UaError) as error:
+                    logger.info("Unable to reconnect: %s", error)
+                    continue
+                break
+
+            # Whatever changed while disconnected was never reported
+            try:
+                await self._model.refresh_values(self._visible_items.visible_items())
+            except (OSError, asyncio.TimeoutError, UaError) as error:
+                logger.warning("Unable to refresh values: %s", error)
+        finally:
+            self._reconnect_task = None
 
     @asyncSlot()
     async def _disconnect(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
         try:
             if self._uaclient is not None and self._uaclient.uaclient.protocol:
-                await self._uaclient.disconnect()
+                await self._io_thread.run(self._uaclient.disconnect())
         except Exception as ex:
             self._show_error(ex)
             raise
         finally:
             self._uaclient = None
-            self._ua_subscription = None
-            self._ua_subscription_data = dict()
+            self._session = None
+            self._subscriptions.stop()
+            self._events.stop()
+            if self._io_thread is not None:
+                self._io_thread.stop()
+                self._io_thread = None
+            if self._address_space_cache is not None:
+                self._address_space_cache.unload_server()
 
             with QSignalBlocker(self._ui.treeView.selectionModel()):
                 self._attrs_ui.clear()
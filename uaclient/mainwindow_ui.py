@@ -138,6 +138,10 @@ class Ui_MainWindow(object):
         self.connectOptionButton.setFocusPolicy(QtCore.Qt.StrongFocus)
         self.connectOptionButton.setObjectName("connectOptionButton")
         self.gridLayout.addWidget(self.connectOptionButton, 1, 3, 1, 1)
+        self.droppedValuesLabel = QtWidgets.QLabel(self.dockWidgetContents_2)
+        self.droppedValuesLabel.setText("")
+        self.droppedValuesLabel.setObjectName("droppedValuesLabel")
+        self.gridLayout.addWidget(self.droppedValuesLabel, 1, 6, 1, 1)
         self.addrDockWidget.setWidget(self.dockWidgetContents_2)
         MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(4), self.addrDockWidget)
         self.logDockWidget_2 = QtWidgets.QDockWidget(MainWindow)
@@ -156,6 +160,28 @@ class Ui_MainWindow(object):
         self.gridLayout_6.addWidget(self.logTextEdit, 0, 0, 1, 1)
         self.logDockWidget_2.setWidget(self.dockWidgetContents_7)
         MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(8), self.logDockWidget_2)
+        self.eventDockWidget = QtWidgets.QDockWidget(MainWindow)
+        self.eventDockWidget.setObjectName("eventDockWidget")
+        self.eventDockWidgetContents = QtWidgets.QWidget()
+        self.eventDockWidgetContents.setObjectName("eventDockWidgetContents")
+        self.eventGridLayout = QtWidgets.QGridLayout(self.eventDockWidgetContents)
+        self.eventGridLayout.setContentsMargins(11, 11, 11, 11)
+        self.eventGridLayout.setSpacing(6)
+        self.eventGridLayout.setObjectName("eventGridLayout")
+        self.eventView = QtWidgets.QTableView(self.eventDockWidgetContents)
+        self.eventView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.eventView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.eventView.setObjectName("eventView")
+        self.eventView.horizontalHeader().setStretchLastSection(True)
+        self.eventView.verticalHeader().setVisible(False)
+        self.eventGridLayout.addWidget(self.eventView, 0, 0, 1, 2)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.eventGridLayout.addItem(spacerItem1, 1, 0, 1, 1)
+        self.eventClearButton = QtWidgets.QPushButton(self.eventDockWidgetContents)
+        self.eventClearButton.setObjectName("eventClearButton")
+        self.eventGridLayout.addWidget(self.eventClearButton, 1, 1, 1, 1)
+        self.eventDockWidget.setWidget(self.eventDockWidgetContents)
+        MainWindow.addDockWidget(QtCore.Qt.DockWidgetArea(8), self.eventDockWidget)
         self.actionConnect = QtWidgets.QAction(MainWindow)
         self.actionConnect.setObjectName("actionConnect")
         self.actionDisconnect = QtWidgets.QAction(MainWindow)
@@ -168,6 +194,8 @@ class Ui_MainWindow(object):
         self.actionCopyPath.setObjectName("actionCopyPath")
         self.actionCopyNodeId = QtWidgets.QAction(MainWindow)
         self.actionCopyNodeId.setObjectName("actionCopyNodeId")
+        self.actionGoToNode = QtWidgets.QAction(MainWindow)
+        self.actionGoToNode.setObjectName("actionGoToNode")
         self.actionAddToGraph = QtWidgets.QAction(MainWindow)
         self.actionAddToGraph.setObjectName("actionAddToGraph")
         self.actionRemoveFromGraph = QtWidgets.QAction(MainWindow)
@@ -179,14 +207,22 @@ class Ui_MainWindow(object):
         self.actionDark_Mode.setObjectName("actionDark_Mode")
         self.actionClient_Application_Certificate = QtWidgets.QAction(MainWindow)
         self.actionClient_Application_Certificate.setObjectName("actionClient_Application_Certificate")
+        self.actionSubscribe_Visible_Only = QtWidgets.QAction(MainWindow)
+        self.actionSubscribe_Visible_Only.setCheckable(True)
+        self.actionSubscribe_Visible_Only.setObjectName("actionSubscribe_Visible_Only")
+        self.actionSubscription_Tiers = QtWidgets.QAction(MainWindow)
+        self.actionSubscription_Tiers.setObjectName("actionSubscription_Tiers")
         self.menuOPC_UA_Client.addAction(self.actionConnect)
         self.menuOPC_UA_Client.addAction(self.actionDisconnect)
         self.menuOPC_UA_Client.addAction(self.actionCopyPath)
         self.menuOPC_UA_Client.addAction(self.actionCopyNodeId)
+        self.menuOPC_UA_Client.addAction(self.actionGoToNode)
         self.menuOPC_UA_Client.addAction(self.actionSubscribeEvent)
         self.menuOPC_UA_Client.addAction(self.actionUnsubscribeEvents)
         self.menuSettings.addAction(self.actionDark_Mode)
         self.menuSettings.addAction(self.actionClient_Application_Certificate)
+        self.menuSettings.addAction(self.actionSubscribe_Visible_Only)
+        self.menuSettings.addAction(self.actionSubscription_Tiers)
         self.menuBar.addAction(self.menuOPC_UA_Client.menuAction())
         self.menuBar.addAction(self.menuSettings.menuAction())
 
@@ -210,6 +246,9 @@ class Ui_MainWindow(object):
         self.connectButton.setText(_translate("MainWindow", "Connect"))
         self.disconnectButton.setText(_translate("MainWindow", "Disconnect"))
         self.connectOptionButton.setText(_translate("MainWindow", "Connect options"))
+        self.droppedValuesLabel.setToolTip(_translate("MainWindow", "Values replaced by newer ones before they could be shown"))
+        self.eventDockWidget.setWindowTitle(_translate("MainWindow", "Events"))
+        self.eventClearButton.setText(_translate("MainWindow", "Clear"))
         self.actionConnect.setText(_translate("MainWindow", "&Connect"))
         self.actionDisconnect.setText(_translate("MainWindow", "&Disconnect"))
         self.actionDisconnect.setToolTip(_translate("MainWindow", "Disconnect from server"))
@@ -221,6 +260,9 @@ class Ui_MainWindow(object):
         self.actionCopyPath.setToolTip(_translate("MainWindow", "Copy path to node to clipboard"))
         self.actionCopyNodeId.setText(_translate("MainWindow", "C&opy NodeId"))
         self.actionCopyNodeId.setToolTip(_translate("MainWindow", "Copy NodeId to clipboard"))
+        self.actionGoToNode.setText(_translate("MainWindow", "&Go to Node..."))
+        self.actionGoToNode.setToolTip(_translate("MainWindow", "Show a node given its NodeId or browse path"))
+        self.actionGoToNode.setShortcut(_translate("MainWindow", "Ctrl+J"))
         self.actionAddToGraph.setText(_translate("MainWindow", "Add to &Graph"))
         self.actionAddToGraph.setToolTip(_translate("MainWindow", "Add this node to the graph"))
         self.actionAddToGraph.setShortcut(_translate("MainWindow", "Ctrl+G"))
@@ -232,3 +274,7 @@ class Ui_MainWindow(object):
         self.actionDark_Mode.setText(_translate("MainWindow", "Dark Mode"))
         self.actionDark_Mode.setStatusTip(_translate("MainWindow", "Enables Dark Mode Theme"))
         self.actionClient_Application_Certificate.setText(_translate("MainWindow", "Client Application Certificate"))
+        self.actionSubscribe_Visible_Only.setText(_translate("MainWindow", "Subscribe to Visible Rows Only"))
+        self.actionSubscribe_Visible_Only.setStatusTip(_translate("MainWindow", "Only monitor values of rows currently scrolled into view"))
+        self.actionSubscription_Tiers.setText(_translate("MainWindow", "Subscription Tiers..."))
+        self.actionSubscription_Tiers.setStatusTip(_translate("MainWindow", "Choose how often the values of which nodes are sampled and reported"))
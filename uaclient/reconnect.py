@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+
+from asyncua import Client, ua
+from asyncua.client.ua_client import UaClient
+from asyncua.common.shortcuts import Shortcuts
+from asyncua.ua.ua_binary import struct_from_binary
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before trying to reconnect, doubled after every failed
+# attempt up to the maximum
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+
+def reconnect_delays():
+    """Yield how long to wait before each reconnection attempt"""
+    delay = RECONNECT_MIN_DELAY
+    while True:
+        yield delay
+        delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+class _UaClient(UaClient):
+    """asyncua's UaClient, with what moving subscriptions between sessions needs.
+
+    This is the only place that relies on asyncua's internals, i.e. its
+    publish task. asyncua is pinned to the versions they're known to work
+    with, and tests check they're still there.
+    """
+
+    _publish_task: Optional["asyncio.Task[None]"]
+
+    def stop_publishing(self) -> None:
+        if self._publish_task is not None and not self._publish_task.done():
+            self._publish_task.cancel()
+        self._publish_task = None
+
+    def start_publishing(self) -> None:
+        # As create_subscription() does for the first subscription
+        if self._publish_task is None or self._publish_task.done():
+            self._publish_task = asyncio.create_task(self._publish_loop())
+
+    async def transfer_subscriptions(
+        self, params: ua.TransferSubscriptionsParameters
+    ) -> List[ua.TransferResult]:
+        # asyncua declares this, but doesn't implement it
+        request = ua.TransferSubscriptionsRequest()
+        request.Parameters = params
+        data = await self.protocol.send_request(request)
+        response = struct_from_binary(ua.TransferSubscriptionsResponse, data)
+        response.ResponseHeader.ServiceResult.check()
+
+        # Publishing stopped with the old session. The subscriptions' callbacks
+        # are still registered, under the same ids.
+        if any(result.StatusCode.is_good() for result in response.Results):
+            self.start_publishing()
+
+        return response.Results
+
+
+class ReconnectingClient(Client):
+    """A client that can open a new session after its connection dropped.
+
+    Subscriptions are left on the server, so they can be moved over to the new
+    session with `transfer_subscriptions`.
+    """
+
+    def __init__(self, url: str, timeout: float = 4, **kwargs) -> None:
+        super().__init__(url, timeout, **kwargs)
+
+        # Set up like the one it replaces
+        self.uaclient: _UaClient = _UaClient(timeout)
+        self.uaclient.pre_request_hook = self.check_connection
+        self.nodes = Shortcuts(self.uaclient)
+
+    async def reconnect(self) -> None:
+        """Open a new session, keeping the old one's subscriptions.
+
+        Must be called on the client's event loop.
+        """
+        # Whatever is left of the old connection goes. The server can't be
+        # told to close the old session, so this only stops its watchdog and
+        # renewal.
+        self.disconnect_socket()
+        self.uaclient.stop_publishing()
+        await self.close_session()
+
+        await self.connect()
+        # close_session() unhooked the connection check, as the tasks it looks
+        # at were cancelled. connect() started new ones.
+        self.uaclient.pre_request_hook = self.check_connection
+
+
+async def transfer_subscriptions(
+    client: Client, subscription_ids: Sequence[int]
+) -> List[ua.TransferResult]:
+    """Move subscriptions of a lost session to the client's current one.
+
+    Only a `ReconnectingClient` can do this. Must be called on the client's
+    event loop.
+    """
+    params = ua.TransferSubscriptionsParameters()
+    params.SubscriptionIds = list(subscription_ids)
+    params.SendInitialValues = True
+    return await client.uaclient.transfer_subscriptions(params)
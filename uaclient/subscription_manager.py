@@ -0,0 +1,836 @@
+import asyncio
+import collections
+import contextlib
+import itertools
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from asyncua import Client, Node, ua
+from asyncua.common.events import Event
+from asyncua.common.subscription import Subscription, DataChangeNotif
+from asyncua.ua import AttributeIds, DataValue, MonitoringMode, NodeId, StatusCode
+
+from uaclient import tree_ui
+from uaclient.io_thread import IoThread, run_on
+from uaclient.reconnect import transfer_subscriptions
+from uaclient.subscription_tiers import TierConfiguration, monitored_item_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# asyncua numbers the client handles it makes up itself (e.g. for the model
+# change events) from 200 on, ours stay well clear of those
+_FIRST_CLIENT_HANDLE = 1 << 20
+
+# How a whole service call can fail, e.g. when the connection is lost or the
+# server refuses a batch. Items of such a call are tried again by the next flush.
+_SERVICE_ERRORS = (ua.UaError, OSError, asyncio.TimeoutError)
+
+# Servers that can't apply a deadband refuse the whole monitored item, which
+# is then created without one
+_FILTER_ERRORS = frozenset(
+    [
+        ua.StatusCodes.BadFilterNotAllowed,
+        ua.StatusCodes.BadMonitoredItemFilterInvalid,
+        ua.StatusCodes.BadMonitoredItemFilterUnsupported,
+        ua.StatusCodes.BadDeadbandFilterInvalid,
+    ]
+)
+
+_SubscriptionData = collections.namedtuple("_SubscriptionData", ["handle", "signal"])
+
+# What makes two monitored items interchangeable, so consumers that want the
+# same thing can share one
+_MonitoredItemKey = collections.namedtuple(
+    "_MonitoredItemKey", ["nodeid", "attribute", "tier"]
+)
+
+# A consumer, and the monitored item it's subscribed to
+_Consumer = collections.namedtuple("_Consumer", ["item", "key"])
+
+
+class _SubscriptionSignal(QObject):
+    signal = pyqtSignal(DataValue)
+
+
+class _SubscriptionHandler:
+    def __init__(self, _data_change_callback, _event_callback) -> None:
+        self._data_change_callback = _data_change_callback
+        self._event_callback = _event_callback
+
+    def datachange_notification(
+        self, node: Node, _value: Any, data: DataChangeNotif
+    ) -> None:
+        # This is called for every value of a publish response in a row, so
+        # it's kept synchronous (and cheap)
+        self._data_change_callback(
+            data.subscription_data.client_handle, data.monitored_item.Value
+        )
+
+    def event_notification(self, event: Event) -> None:
+        self._event_callback(event)
+
+
+class _MonitoredItem:
+    """A monitored item, and everything that wants its values"""
+
+    __slots__ = (
+        "key",
+        "client_handle",
+        "handle",
+        "signal",
+        "consumers",
+        "suspended",
+        "mode",
+    )
+
+    def __init__(
+        self, key: _MonitoredItemKey, client_handle: int, signal: _SubscriptionSignal
+    ) -> None:
+        self.key = key
+        self.client_handle = client_handle
+
+        # Set once the server has created it, and stays None if that failed
+        self.handle: Optional[int] = None
+        self.signal = signal
+
+        # The tree items its values are set on, and which of them are
+        # suspended, keyed by the item's identity. Anything else that wants its
+        # values (e.g. the attributes widget) connects to the signal.
+        self.consumers: Dict[int, tree_ui.OpcTreeItem] = {}
+        self.suspended: Set[int] = set()
+
+        # The mode the server was last asked to use
+        self.mode = MonitoringMode.Reporting
+
+    def wanted_mode(self) -> MonitoringMode:
+        if self.consumers and len(self.suspended) == len(self.consumers):
+            return MonitoringMode.Disabled
+        return MonitoringMode.Reporting
+
+
+class SubscriptionManager(QObject):
+    """Keeps tree items subscribed to their values.
+
+    Consumers that want the same attribute of the same node, sampled the same
+    way, share one monitored item: its values are passed on to all of them,
+    and it's only deleted once the last one unsubscribes. This matters because
+    the same node often shows up in several places in the tree.
+
+    Subscribe and unsubscribe requests are queued and coalesced into batched
+    CreateMonitoredItems and DeleteMonitoredItems calls, so expanding or
+    collapsing a folder costs O(N / batch size) service calls rather than one
+    per child. Suspending and resuming monitored items (SetMonitoringMode) is
+    batched the same way; a shared monitored item is only suspended once all
+    of its consumers are.
+
+    How each node is sampled and reported is up to its subscription tier (see
+    `TierConfiguration`). Monitored items are created in one subscription per
+    publishing interval, with the sampling interval, queue and deadband of
+    their tier.
+
+    The session can run on an I/O thread of its own (see `IoThread`). Service
+    calls are then made there, and notifications are handed over to the GUI's
+    event loop.
+
+    Data changes are buffered as they're received, and dispatched in batches
+    on the GUI's event loop: everything that arrived by the time a dispatch
+    runs goes out together. Of each monitored item, the buffer keeps as many
+    values of a publish response as its tier's queue holds. Values still
+    buffered when a later response arrives mean the GUI is falling behind, so
+    only the newest one is kept then. The buffer thus never outgrows the
+    monitored items' queues however long the GUI is busy, and catching up
+    afterwards takes a single dispatch. Values replaced before they were
+    dispatched are counted in `dropped_values` and `dropped_value_count`, and
+    announced through `values_dropped`.
+
+    Each dispatch sets the newest values on the tree items without notifying
+    their model, then announces all of them through a single `values_changed`.
+    Receivers of a monitored item's own signal get every value.
+
+    The Server object is watched for GeneralModelChangeEvents too, and their
+    changes are passed on through `model_changed`.
+
+    After the client reconnected, `restore` moves the subscriptions over to
+    its new session, or creates them again if the server lost them.
+    """
+
+    model_changed = pyqtSignal(list)
+    values_changed = pyqtSignal(list)
+    values_dropped = pyqtSignal(int)
+
+    def __init__(
+        self, parent: Optional[QObject] = None, *, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        super().__init__(parent)
+
+        self.batch_size = batch_size
+        self.tiers = TierConfiguration()
+
+        # The Value monitored item of each node. This is shared with (and used
+        # by) the attributes widget, so it's only ever modified in place.
+        self.subscription_data: Dict[NodeId, _SubscriptionData] = dict()
+
+        # How many values of each node's attributes were replaced by newer ones
+        # before they could be shown, and of all of them. This is shared with
+        # the tree model, so it's only ever modified in place too.
+        self.dropped_values: Dict[Tuple[NodeId, AttributeIds], int] = dict()
+        self.dropped_value_count = 0
+
+        self._client: Optional[Client] = None
+        self._io_thread: Optional[IoThread] = None
+
+        # The loop consumers live in, which notifications are dispatched on
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # The subscription model change events are reported through, and the
+        # subscription of each publishing interval (which includes it)
+        self._subscription: Optional[Subscription] = None
+        self._subscriptions: Dict[float, Subscription] = dict()
+
+        self._client_handles = itertools.count(_FIRST_CLIENT_HANDLE)
+        self._monitored_items: Dict[_MonitoredItemKey, _MonitoredItem] = dict()
+        self._monitored_items_by_handle: Dict[int, _MonitoredItem] = dict()
+
+        # Keyed by the consumer's identity and the attribute
+        self._consumers: Dict[Tuple[int, AttributeIds], _Consumer] = dict()
+
+        self._pending_creates: Dict[_MonitoredItemKey, _MonitoredItem] = dict()
+        self._pending_deletes: Dict[_MonitoredItemKey, _MonitoredItem] = dict()
+        self._pending_monitoring_modes: Dict[_MonitoredItemKey, _MonitoredItem] = dict()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # The values of each monitored item that haven't been dispatched yet,
+        # along with the publish response they came with (counting from the
+        # start), and how many older ones they replaced, keyed by client
+        # handle. So is how many values of a response are kept, which is the
+        # queue size of its tier. These are used on the I/O thread, so they're
+        # guarded by a lock.
+        self._data_changes_lock = threading.Lock()
+        self._data_changes: Dict[int, Tuple[int, List[DataValue]]] = dict()
+        self._replaced_data_changes: Dict[int, int] = collections.defaultdict(int)
+        self._queue_sizes: Dict[int, int] = dict()
+        self._response = 0
+        self._receiving_response = False
+
+    async def start(
+        self,
+        client: Client,
+        publishing_interval: Optional[float] = None,
+        *,
+        io_thread: Optional[IoThread] = None,
+    ) -> None:
+        """Start subscribing through `client`, whose session runs on
+        `io_thread` (if it's given) or the current event loop
+
+        The default subscription uses the default tier's publishing interval,
+        unless another one is given.
+        """
+        self._client = client
+        self._io_thread = io_thread
+        self._loop = asyncio.get_running_loop()
+        if publishing_interval is None:
+            publishing_interval = self.tiers.default_tier().publishing_interval
+        self._subscription = await self._create_subscription(
+            client, publishing_interval
+        )
+        await self._subscribe_model_changes(client, self._subscription)
+
+    async def restore(self) -> None:
+        """Bring the subscriptions back after the client reconnected.
+
+        The server is asked to transfer them to the new session first. Those
+        it no longer has (e.g. after a restart) are created again, along with
+        their monitored items, in the same batches as any other.
+        """
+        client = self._client
+        if client is None or self._subscription is None:
+            return
+
+        subscriptions = list(self._subscriptions.items())
+        try:
+            results = await run_on(
+                self._io_thread,
+                transfer_subscriptions(
+                    client,
+                    [subscription.subscription_id for _, subscription in subscriptions],
+                ),
+            )
+            transferred = [result.StatusCode.is_good() for result in results]
+        except ua.UaStatusCodeError as error:
+            logger.debug("Unable to transfer subscriptions: %s", error)
+            transferred = [False] * len(subscriptions)
+
+        lost = set()
+        for (publishing_interval, _subscription), ok in zip(subscriptions, transferred):
+            if not ok:
+                lost.add(publishing_interval)
+                del self._subscriptions[publishing_interval]
+
+        # Model changes are reported through the default subscription. It's
+        # also missing if creating it again failed last time.
+        if self._subscription not in self._subscriptions.values():
+            publishing_interval = (
+                self._subscription.parameters.RequestedPublishingInterval
+            )
+            lost.add(publishing_interval)
+            self._subscription = await self._create_subscription(
+                client, publishing_interval
+            )
+            await self._subscribe_model_changes(client, self._subscription)
+        if not lost:
+            return
+
+        for key, monitored_item in list(self._monitored_items.items()):
+            if key.tier.publishing_interval not in lost:
+                continue
+
+            # Items on their way out have nothing left to delete
+            if self._pending_deletes.pop(key, None) is not None:
+                self._release(monitored_item)
+                continue
+
+            # Its handle belonged to the lost subscription
+            self._forget_handle(monitored_item)
+            monitored_item.handle = None
+            monitored_item.mode = MonitoringMode.Reporting
+            self._pending_creates[key] = monitored_item
+
+        self._schedule_flush()
+
+    async def _subscribe_model_changes(
+        self, client: Client, subscription: Subscription
+    ) -> None:
+        try:
+            await run_on(
+                self._io_thread,
+                subscription.subscribe_events(
+                    client.nodes.server, ua.ObjectIds.GeneralModelChangeEventType
+                ),
+            )
+        except ua.UaStatusCodeError as error:
+            # Not every server reports model changes, the tree just isn't
+            # updated on its own then
+            logger.debug("Unable to subscribe to model changes: %s", error)
+
+    def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        self._client = None
+        self._io_thread = None
+        self._loop = None
+        self._subscription = None
+        self._subscriptions.clear()
+        self._pending_creates.clear()
+        self._pending_deletes.clear()
+        self._pending_monitoring_modes.clear()
+        self._consumers.clear()
+        with self._data_changes_lock:
+            self._data_changes = dict()
+            self._replaced_data_changes.clear()
+            self._queue_sizes.clear()
+            self._receiving_response = False
+
+        for monitored_item in self._monitored_items.values():
+            # Raises if nothing is connected
+            with contextlib.suppress(TypeError):
+                monitored_item.signal.signal.disconnect()
+        self._monitored_items.clear()
+        self._monitored_items_by_handle.clear()
+        self.subscription_data.clear()
+        self.dropped_values.clear()
+        self.dropped_value_count = 0
+        self.values_dropped.emit(0)
+
+    def subscribe(
+        self, item: tree_ui.OpcTreeItem, attribute: AttributeIds = AttributeIds.Value
+    ) -> None:
+        if self._subscription is None:
+            return
+
+        consumer_key = (id(item), attribute)
+        if consumer_key in self._consumers:
+            return
+
+        # Asking for an attribute the node doesn't have would only be refused
+        if not item.has_attribute(attribute):
+            return
+
+        nodeid = item.node.nodeid
+        key = _MonitoredItemKey(nodeid, attribute, self.tiers.tier_for(nodeid))
+        self._consumers[consumer_key] = _Consumer(item, key)
+
+        monitored_item = self._monitored_items.get(key)
+        if monitored_item is None:
+            monitored_item = _MonitoredItem(
+                key, next(self._client_handles), _SubscriptionSignal(self)
+            )
+            with self._data_changes_lock:
+                # A queue size of 0 asks the server for its default, i.e. 1
+                self._queue_sizes[monitored_item.client_handle] = max(
+                    key.tier.queue_size, 1
+                )
+            self._monitored_items[key] = monitored_item
+            self._pending_creates[key] = monitored_item
+            self._schedule_flush()
+        else:
+            # Its last consumer may just have gone away, in which case it's
+            # handed over to this one rather than deleted and recreated
+            self._pending_deletes.pop(key, None)
+
+        monitored_item.consumers[id(item)] = item
+        self._update_monitoring_mode(monitored_item)
+
+    def unsubscribe(
+        self, item: tree_ui.OpcTreeItem, attribute: AttributeIds = AttributeIds.Value
+    ) -> None:
+        if self._subscription is None:
+            return
+
+        consumer = self._consumers.pop((id(item), attribute), None)
+        if consumer is None:
+            return
+
+        key = consumer.key
+        monitored_item = self._monitored_items[key]
+        del monitored_item.consumers[id(item)]
+        monitored_item.suspended.discard(id(item))
+        if monitored_item.consumers:
+            self._update_monitoring_mode(monitored_item)
+            return
+
+        self._pending_monitoring_modes.pop(key, None)
+
+        # If it hasn't been created yet, there's nothing to undo
+        if self._pending_creates.pop(key, None) is not None:
+            self._release(monitored_item)
+            return
+
+        self._pending_deletes[key] = monitored_item
+        self._schedule_flush()
+
+    def suspend(self, item: tree_ui.OpcTreeItem) -> None:
+        """Stop sampling the item's value, without deleting its monitored item"""
+        self._set_suspended(item, True)
+
+    def resume(self, item: tree_ui.OpcTreeItem) -> None:
+        self._set_suspended(item, False)
+
+    def _set_suspended(self, item: tree_ui.OpcTreeItem, suspended: bool) -> None:
+        if self._subscription is None:
+            return
+
+        consumer = self._consumers.get((id(item), AttributeIds.Value))
+        if consumer is None:
+            return
+
+        monitored_item = self._monitored_items[consumer.key]
+        if suspended:
+            monitored_item.suspended.add(id(item))
+        else:
+            monitored_item.suspended.discard(id(item))
+        self._update_monitoring_mode(monitored_item)
+
+    def _update_monitoring_mode(self, monitored_item: _MonitoredItem) -> None:
+        # This is applied after any pending subscribe, so it also covers
+        # monitored items that are still being created
+        if monitored_item.wanted_mode() != monitored_item.mode:
+            self._pending_monitoring_modes[monitored_item.key] = monitored_item
+            self._schedule_flush()
+
+    def set_tiers(self, tiers: TierConfiguration) -> None:
+        """Use other tiers, moving subscribed consumers to their new tier"""
+        self.tiers = tiers
+        if self._subscription is None:
+            return
+
+        for (_item_id, attribute), consumer in list(self._consumers.items()):
+            key = consumer.key
+            if self.tiers.tier_for(key.nodeid) == key.tier:
+                continue
+
+            suspended = id(consumer.item) in self._monitored_items[key].suspended
+            self.unsubscribe(consumer.item, attribute)
+            self.subscribe(consumer.item, attribute)
+            if suspended:
+                self._set_suspended(consumer.item, True)
+
+        # Subscriptions no tier uses any more are deleted by the next flush
+        self._schedule_flush()
+
+    async def wait_for_pending(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Let everything queued during this iteration of the event loop (e.g.
+        # every child of an expanded folder) accumulate before sending requests
+        await asyncio.sleep(0)
+
+        # Once a call failed, what's left waits for the next flush (e.g. after
+        # reconnecting) rather than being retried right away
+        failed = False
+        while not failed and (
+            self._pending_deletes
+            or self._pending_creates
+            or self._pending_monitoring_modes
+        ):
+            deletes = list(self._pending_deletes.values())
+            self._pending_deletes.clear()
+            creates = list(self._pending_creates.values())
+            self._pending_creates.clear()
+            monitoring_modes = list(self._pending_monitoring_modes.values())
+            self._pending_monitoring_modes.clear()
+
+            for start in range(0, len(deletes), self.batch_size):
+                end = start + self.batch_size
+                try:
+                    await self._unsubscribe_batch(deletes[start:end])
+                except _SERVICE_ERRORS as error:
+                    # They're already gone here, and the server drops them
+                    # along with the session at the latest
+                    logger.warning("Unable to delete monitored items: %s", error)
+
+            # Monitored items can only be created together if they're in the
+            # same subscription
+            groups: Dict[float, List[_MonitoredItem]] = collections.defaultdict(list)
+            for monitored_item in creates:
+                groups[monitored_item.key.tier.publishing_interval].append(
+                    monitored_item
+                )
+
+            for publishing_interval, group in groups.items():
+                for start in range(0, len(group), self.batch_size):
+                    end = start + self.batch_size
+                    batch = group[start:end]
+                    try:
+                        await self._subscribe_batch(publishing_interval, batch)
+                    except _SERVICE_ERRORS as error:
+                        logger.warning("Unable to create monitored items: %s", error)
+                        self._requeue_creates(batch)
+                        failed = True
+
+            changes: Dict[Tuple[float, MonitoringMode], List[_MonitoredItem]] = (
+                collections.defaultdict(list)
+            )
+            for monitored_item in monitoring_modes:
+                mode = monitored_item.wanted_mode()
+                if monitored_item.handle is not None and mode != monitored_item.mode:
+                    publishing_interval = monitored_item.key.tier.publishing_interval
+                    changes[(publishing_interval, mode)].append(monitored_item)
+
+            for (publishing_interval, mode), changed in changes.items():
+                for start in range(0, len(changed), self.batch_size):
+                    end = start + self.batch_size
+                    batch = changed[start:end]
+                    previous_mode = batch[0].mode
+                    for monitored_item in batch:
+                        monitored_item.mode = mode
+                    try:
+                        await self._set_monitoring_mode_batch(
+                            publishing_interval,
+                            mode,
+                            [
+                                monitored_item.handle
+                                for monitored_item in batch
+                                if monitored_item.handle is not None
+                            ],
+                        )
+                    except _SERVICE_ERRORS as error:
+                        logger.warning("Unable to set monitoring mode: %s", error)
+                        self._requeue_monitoring_modes(batch, previous_mode)
+                        failed = True
+
+        try:
+            await self._delete_unused_subscriptions()
+        except _SERVICE_ERRORS as error:
+            logger.warning("Unable to delete subscriptions: %s", error)
+
+    def _requeue_creates(self, monitored_items: List[_MonitoredItem]) -> None:
+        for monitored_item in monitored_items:
+            # Unless it was given up on in the meantime
+            key = monitored_item.key
+            if (
+                self._monitored_items.get(key) is monitored_item
+                and key not in self._pending_deletes
+            ):
+                self._pending_creates[key] = monitored_item
+
+    def _requeue_monitoring_modes(
+        self, monitored_items: List[_MonitoredItem], previous_mode: MonitoringMode
+    ) -> None:
+        for monitored_item in monitored_items:
+            monitored_item.mode = previous_mode
+            key = monitored_item.key
+            if self._monitored_items.get(key) is monitored_item:
+                self._pending_monitoring_modes[key] = monitored_item
+
+    async def _create_subscription(
+        self, client: Client, publishing_interval: float
+    ) -> Subscription:
+        subscription = await run_on(
+            self._io_thread,
+            client.create_subscription(
+                publishing_interval,
+                _SubscriptionHandler(self._handle_data_change, self._handle_event),
+            ),
+        )
+        self._subscriptions[publishing_interval] = subscription
+        return subscription
+
+    async def _delete_unused_subscriptions(self) -> None:
+        used = {tier.publishing_interval for tier in self.tiers.tiers}
+        used.update(key.tier.publishing_interval for key in self._monitored_items)
+        for publishing_interval, subscription in list(self._subscriptions.items()):
+            if subscription is self._subscription or publishing_interval in used:
+                continue
+
+            del self._subscriptions[publishing_interval]
+            try:
+                await run_on(self._io_thread, subscription.delete())
+            except ua.UaStatusCodeError as error:
+                logger.debug("Unable to delete subscription: %s", error)
+
+    async def _subscribe_batch(
+        self, publishing_interval: float, monitored_items: List[_MonitoredItem]
+    ) -> None:
+        if self._client is None:
+            return
+
+        subscription = self._subscriptions.get(publishing_interval)
+        if subscription is None:
+            try:
+                subscription = await self._create_subscription(
+                    self._client, publishing_interval
+                )
+            except ua.UaStatusCodeError as error:
+                # Servers limit the number of subscriptions too. The monitored
+                # items are left without a handle, like any refused one.
+                logger.debug("Unable to create subscription: %s", error)
+                return
+
+        results = await run_on(
+            self._io_thread,
+            subscription.create_monitored_items(
+                [self._monitored_item_request(item) for item in monitored_items]
+            ),
+        )
+
+        # Those refused because of their deadband are tried again without one
+        unfiltered = [
+            index
+            for index, result in enumerate(results)
+            if isinstance(result, StatusCode) and result.value in _FILTER_ERRORS
+        ]
+        if unfiltered:
+            retried = await run_on(
+                self._io_thread,
+                subscription.create_monitored_items(
+                    [
+                        self._monitored_item_request(
+                            monitored_items[index], use_filter=False
+                        )
+                        for index in unfiltered
+                    ]
+                ),
+            )
+            for index, result in zip(unfiltered, retried):
+                results[index] = result
+
+        for monitored_item, result in zip(monitored_items, results):
+            if isinstance(result, StatusCode):
+                # Not every node has a value, and servers limit the number of
+                # monitored items. Neither is worth bothering the user about.
+                logger.debug(
+                    "Unable to subscribe to %s: %s", monitored_item.key.nodeid, result
+                )
+                continue
+
+            monitored_item.handle = result
+            self._monitored_items_by_handle[monitored_item.client_handle] = (
+                monitored_item
+            )
+
+            key = monitored_item.key
+            nodeid = key.nodeid
+            if (
+                key.attribute == AttributeIds.Value
+                and nodeid not in self.subscription_data
+            ):
+                self.subscription_data[nodeid] = _SubscriptionData(
+                    result, monitored_item.signal
+                )
+
+            # It may have been suspended while it was being created
+            if monitored_item.wanted_mode() != monitored_item.mode:
+                self._pending_monitoring_modes[monitored_item.key] = monitored_item
+
+    @staticmethod
+    def _monitored_item_request(
+        monitored_item: _MonitoredItem, *, use_filter: bool = True
+    ) -> ua.MonitoredItemCreateRequest:
+        key = monitored_item.key
+        return monitored_item_request(
+            key.nodeid,
+            key.attribute,
+            key.tier,
+            monitored_item.client_handle,
+            use_filter=use_filter,
+        )
+
+    async def _unsubscribe_batch(self, monitored_items: List[_MonitoredItem]) -> None:
+        handles: Dict[float, List[int]] = collections.defaultdict(list)
+        for monitored_item in monitored_items:
+            if monitored_item.handle is not None:
+                publishing_interval = monitored_item.key.tier.publishing_interval
+                handles[publishing_interval].append(monitored_item.handle)
+            self._release(monitored_item)
+
+        for publishing_interval, subscription_handles in handles.items():
+            subscription = self._subscriptions.get(publishing_interval)
+            if subscription is not None:
+                await run_on(
+                    self._io_thread, subscription.unsubscribe(subscription_handles)
+                )
+
+    def _release(self, monitored_item: _MonitoredItem) -> None:
+        self._monitored_items.pop(monitored_item.key, None)
+        self._forget_handle(monitored_item)
+        with self._data_changes_lock:
+            self._queue_sizes.pop(monitored_item.client_handle, None)
+
+    def _forget_handle(self, monitored_item: _MonitoredItem) -> None:
+        if monitored_item.handle is None:
+            return
+
+        self._monitored_items_by_handle.pop(monitored_item.client_handle, None)
+        nodeid = monitored_item.key.nodeid
+        subscription_data = self.subscription_data.get(nodeid)
+        if subscription_data is not None and (
+            subscription_data.handle == monitored_item.handle
+        ):
+            del self.subscription_data[nodeid]
+
+    async def _set_monitoring_mode_batch(
+        self, publishing_interval: float, mode: MonitoringMode, handles: List[int]
+    ) -> None:
+        subscription = self._subscriptions.get(publishing_interval)
+        if subscription is None:
+            return
+
+        params = ua.SetMonitoringModeParameters()
+        params.SubscriptionId = subscription.subscription_id
+        params.MonitoringMode = mode
+        params.MonitoredItemIds = handles
+
+        try:
+            results = await run_on(
+                self._io_thread, subscription.server.set_monitoring_mode(params)
+            )
+        except ua.UaStatusCodeError as error:
+            # The service is optional, the items just keep reporting then
+            logger.debug("Unable to set monitoring mode to %s: %s", mode, error)
+            return
+
+        for handle, result in zip(handles, results):
+            if not result.is_good():
+                logger.debug("Unable to set monitoring mode of %s: %s", handle, result)
+
+    def _handle_data_change(self, client_handle: int, value: DataValue) -> None:
+        # Called on the I/O thread, if there is one
+        loop = self._loop
+        if loop is None:
+            return
+
+        with self._data_changes_lock:
+            if not self._receiving_response:
+                # The values of a publish response are handed over one after
+                # the other, without yielding to the loop they're received on,
+                # so this runs once they all have been
+                self._receiving_response = True
+                asyncio.get_running_loop().call_soon(self._end_response)
+
+            data_changes = self._data_changes
+            if not data_changes:
+                # Dispatches this along with whatever else arrives before the
+                # GUI's loop gets to it, which may be only part of a publish
+                # response, or several of them
+                loop.call_soon_threadsafe(self._dispatch_data_changes)
+
+            queued = data_changes.get(client_handle)
+            if queued is None or queued[0] != self._response:
+                if queued is not None:
+                    # Left over from an earlier response, so the GUI is behind
+                    self._replaced_data_changes[client_handle] += len(queued[1])
+                data_changes[client_handle] = (self._response, [value])
+                return
+
+            values = queued[1]
+            values.append(value)
+            if len(values) > self._queue_sizes.get(client_handle, 1):
+                del values[0]
+                self._replaced_data_changes[client_handle] += 1
+
+    def _end_response(self) -> None:
+        # Called on the I/O thread, if there is one
+        with self._data_changes_lock:
+            self._response += 1
+            self._receiving_response = False
+
+    def _dispatch_data_changes(self) -> None:
+        with self._data_changes_lock:
+            data_changes = self._data_changes
+            self._data_changes = dict()
+            replaced = self._replaced_data_changes
+            self._replaced_data_changes = collections.defaultdict(int)
+
+        changed: List[Tuple[tree_ui.OpcTreeItem, AttributeIds]] = []
+        dropped = 0
+        for client_handle, (_response, values) in data_changes.items():
+            # There might be a race condition between unsubscribing and
+            # receiving data, i.e. we might receive data for a subscription we
+            # just removed.
+            monitored_item = self._monitored_items_by_handle.get(client_handle)
+            if monitored_item is None:
+                continue
+
+            count = replaced.get(client_handle)
+            if count:
+                key = (monitored_item.key.nodeid, monitored_item.key.attribute)
+                self.dropped_values[key] = self.dropped_values.get(key, 0) + count
+                dropped += count
+
+            # Items only show the newest value
+            attribute = monitored_item.key.attribute
+            for item in monitored_item.consumers.values():
+                item.set_data(attribute, values[-1], emit=False)
+                changed.append((item, attribute))
+
+            # Emitting costs a lot more than checking, and there's rarely a
+            # receiver
+            signal = monitored_item.signal
+            if signal.receivers(signal.signal):
+                for value in values:
+                    signal.signal.emit(value)
+
+        if changed:
+            self.values_changed.emit(changed)
+        if dropped:
+            self.dropped_value_count += dropped
+            self.values_dropped.emit(self.dropped_value_count)
+
+    def _handle_event(self, event: Event) -> None:
+        # Called on the I/O thread, if there is one
+        changes = getattr(event, "Changes", None)
+        if changes and self._loop is not None:
+            self._loop.call_soon_threadsafe(self.model_changed.emit, list(changes))
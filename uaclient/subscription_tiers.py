@@ -0,0 +1,157 @@
+import collections
+import fnmatch
+from typing import List, Optional, Sequence
+
+from PyQt5.QtCore import QSettings
+
+from asyncua import ua
+
+DEFAULT_PUBLISHING_INTERVAL = 500
+
+# How a group of monitored items is sampled and reported. Publishing intervals
+# and sampling intervals are in milliseconds; a sampling interval of zero asks
+# the server to sample as fast as it practically can. The deadband only applies
+# if deadband_type isn't None_.
+SubscriptionTier = collections.namedtuple(
+    "SubscriptionTier",
+    [
+        "name",
+        "publishing_interval",
+        "sampling_interval",
+        "queue_size",
+        "discard_oldest",
+        "deadband_type",
+        "deadband_value",
+    ],
+    defaults=[DEFAULT_PUBLISHING_INTERVAL, 0.0, 0, True, ua.DeadbandType.None_, 0.0],
+)
+
+# Nodes whose NodeId (as a string, e.g. "ns=2;s=Line1.Temperature") matches a
+# shell-style pattern are monitored with the named tier
+TierRule = collections.namedtuple("TierRule", ["pattern", "tier"])
+
+DEFAULT_TIER = SubscriptionTier("Default")
+
+
+class TierConfiguration:
+    """The subscription tiers, and the rules choosing between them.
+
+    The first tier is the default, used for every node no rule matches. Rules
+    are tried in order, and the first matching one wins.
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[Sequence[SubscriptionTier]] = None,
+        rules: Optional[Sequence[TierRule]] = None,
+    ) -> None:
+        self.tiers: List[SubscriptionTier] = list(tiers or [DEFAULT_TIER])
+        self.rules: List[TierRule] = list(rules or [])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TierConfiguration):
+            return self.tiers == other.tiers and self.rules == other.rules
+        return False
+
+    def default_tier(self) -> SubscriptionTier:
+        return self.tiers[0]
+
+    def tier_for(self, nodeid: ua.NodeId) -> SubscriptionTier:
+        tiers = {tier.name: tier for tier in self.tiers}
+        text = nodeid.to_string()
+        for rule in self.rules:
+            if fnmatch.fnmatchcase(text, rule.pattern) and rule.tier in tiers:
+                return tiers[rule.tier]
+
+        return self.default_tier()
+
+    def save(self, settings: QSettings) -> None:
+        settings.beginWriteArray("tiers")
+        for index, tier in enumerate(self.tiers):
+            settings.setArrayIndex(index)
+            settings.setValue("name", tier.name)
+            settings.setValue("publishing_interval", tier.publishing_interval)
+            settings.setValue("sampling_interval", tier.sampling_interval)
+            settings.setValue("queue_size", tier.queue_size)
+            settings.setValue("discard_oldest", tier.discard_oldest)
+            settings.setValue("deadband_type", tier.deadband_type.name)
+            settings.setValue("deadband_value", tier.deadband_value)
+        settings.endArray()
+
+        settings.beginWriteArray("rules")
+        for index, rule in enumerate(self.rules):
+            settings.setArrayIndex(index)
+            settings.setValue("pattern", rule.pattern)
+            settings.setValue("tier", rule.tier)
+        settings.endArray()
+
+    @classmethod
+    def load(cls, settings: QSettings) -> "TierConfiguration":
+        tiers = []
+        length = settings.beginReadArray("tiers")
+        for index in range(length):
+            settings.setArrayIndex(index)
+            tiers.append(
+                SubscriptionTier(
+                    settings.value("name", "", type=str),
+                    settings.value(
+                        "publishing_interval", DEFAULT_PUBLISHING_INTERVAL, type=float
+                    ),
+                    settings.value("sampling_interval", 0.0, type=float),
+                    settings.value("queue_size", 0, type=int),
+                    settings.value("discard_oldest", True, type=bool),
+                    getattr(
+                        ua.DeadbandType,
+                        settings.value("deadband_type", "None_", type=str),
+                        ua.DeadbandType.None_,
+                    ),
+                    settings.value("deadband_value", 0.0, type=float),
+                )
+            )
+        settings.endArray()
+
+        rules = []
+        length = settings.beginReadArray("rules")
+        for index in range(length):
+            settings.setArrayIndex(index)
+            rules.append(
+                TierRule(
+                    settings.value("pattern", "", type=str),
+                    settings.value("tier", "", type=str),
+                )
+            )
+        settings.endArray()
+
+        return cls(tiers, rules)
+
+
+def monitored_item_request(
+    nodeid: ua.NodeId,
+    attribute: ua.AttributeIds,
+    tier: SubscriptionTier,
+    client_handle: int,
+    *,
+    use_filter: bool = True,
+) -> ua.MonitoredItemCreateRequest:
+    """Build the request for a monitored item sampled the way a tier says"""
+    read_value_id = ua.ReadValueId()
+    read_value_id.NodeId = nodeid
+    read_value_id.AttributeId = attribute
+
+    parameters = ua.MonitoringParameters()
+    parameters.ClientHandle = client_handle
+    parameters.SamplingInterval = tier.sampling_interval
+    parameters.QueueSize = tier.queue_size
+    parameters.DiscardOldest = tier.discard_oldest
+    if use_filter and tier.deadband_type != ua.DeadbandType.None_:
+        data_change_filter = ua.DataChangeFilter()
+        data_change_filter.Trigger = ua.DataChangeTrigger.StatusValue
+        data_change_filter.DeadbandType = tier.deadband_type
+        data_change_filter.DeadbandValue = tier.deadband_value
+        parameters.Filter = data_change_filter
+
+    request = ua.MonitoredItemCreateRequest()
+    request.ItemToMonitor = read_value_id
+    request.MonitoringMode = ua.MonitoringMode.Reporting
+    request.RequestedParameters = parameters
+    return request
@@ -0,0 +1,209 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QComboBox, QDialog, QMessageBox, QTableWidgetItem
+
+from asyncua import ua
+
+from uaclient.subscription_tiers import SubscriptionTier, TierConfiguration, TierRule
+from uaclient.subscriptiontiers_ui import Ui_SubscriptionTiersDialog
+
+_DEADBAND_TYPES = ["None", "Absolute", "Percent"]
+
+# Columns of the tiers table
+_NAME = 0
+_PUBLISHING_INTERVAL = 1
+_SAMPLING_INTERVAL = 2
+_QUEUE_SIZE = 3
+_DISCARD_OLDEST = 4
+_DEADBAND_TYPE = 5
+_DEADBAND_VALUE = 6
+
+# Columns of the rules table
+_PATTERN = 0
+_TIER = 1
+
+
+class SubscriptionTiersDialog(QDialog):
+    def __init__(self, parent, tiers: TierConfiguration):
+        super().__init__(parent)
+
+        self._initial_tiers = tiers
+        self._tiers = tiers
+
+        self._setup_ui()
+
+    def _setup_ui(self) -> None:
+        self._ui = Ui_SubscriptionTiersDialog()
+        self._ui.setupUi(self)
+
+        for tier in self._initial_tiers.tiers:
+            self._add_tier(tier)
+        for rule in self._initial_tiers.rules:
+            self._add_rule(rule)
+
+        self._ui.addTierButton.clicked.connect(
+            lambda: self._add_tier(SubscriptionTier(self._new_tier_name()))
+        )
+        self._ui.removeTierButton.clicked.connect(self._remove_tier)
+        self._ui.tiersTable.itemChanged.connect(self._tier_changed)
+        self._ui.addRuleButton.clicked.connect(
+            lambda: self._add_rule(TierRule("*", self._tier_name(0)))
+        )
+        self._ui.removeRuleButton.clicked.connect(self._remove_rule)
+
+    @property
+    def tiers(self) -> TierConfiguration:
+        return self._tiers
+
+    def accept(self) -> None:
+        try:
+            self._tiers = self._parse()
+        except ValueError as error:
+            QMessageBox.warning(self, "Invalid Subscription Tiers", str(error))
+            return
+        super().accept()
+
+    def _parse(self) -> TierConfiguration:
+        tiers = [self._parse_tier(row) for row in range(self._ui.tiersTable.rowCount())]
+        if not tiers:
+            raise ValueError("At least one tier is needed")
+
+        names = [tier.name for tier in tiers]
+        for name in names:
+            if not name:
+                raise ValueError("Every tier needs a name")
+            if names.count(name) > 1:
+                raise ValueError(f"There's more than one tier called {name}")
+
+        rules = []
+        for row in range(self._ui.rulesTable.rowCount()):
+            rule = TierRule(
+                self._text(self._ui.rulesTable, row, _PATTERN),
+                self._ui.rulesTable.cellWidget(row, _TIER).currentText(),
+            )
+            if not rule.pattern:
+                raise ValueError("Every rule needs a pattern")
+            if rule.tier not in names:
+                raise ValueError(f"Rule {rule.pattern} uses an unknown tier")
+            rules.append(rule)
+
+        return TierConfiguration(tiers, rules)
+
+    def _parse_tier(self, row: int) -> SubscriptionTier:
+        table = self._ui.tiersTable
+        name = self._text(table, row, _NAME)
+        try:
+            tier = SubscriptionTier(
+                name,
+                float(self._text(table, row, _PUBLISHING_INTERVAL)),
+                float(self._text(table, row, _SAMPLING_INTERVAL)),
+                int(self._text(table, row, _QUEUE_SIZE)),
+                table.item(row, _DISCARD_OLDEST).checkState() == Qt.CheckState.Checked,
+                getattr(
+                    ua.DeadbandType,
+                    table.cellWidget(row, _DEADBAND_TYPE)
+                    .currentText()
+                    .replace("None", "None_"),
+                ),
+                float(self._text(table, row, _DEADBAND_VALUE)),
+            )
+        except ValueError:
+            raise ValueError(f"Tier {name} has an invalid number") from None
+
+        if tier.publishing_interval <= 0:
+            raise ValueError(f"Tier {name} needs a positive publishing interval")
+        if tier.sampling_interval < 0 or tier.queue_size < 0 or tier.deadband_value < 0:
+            raise ValueError(f"Tier {name} has a negative setting")
+        if tier.deadband_type == ua.DeadbandType.Percent and tier.deadband_value > 100:
+            raise ValueError(f"Tier {name} has a deadband over 100 percent")
+        return tier
+
+    @staticmethod
+    def _text(table, row: int, column: int) -> str:
+        item = table.item(row, column)
+        if item is None:
+            return ""
+        return item.text().strip()
+
+    def _tier_name(self, row: int) -> str:
+        return self._text(self._ui.tiersTable, row, _NAME)
+
+    def _tier_names(self):
+        return [self._tier_name(row) for row in range(self._ui.tiersTable.rowCount())]
+
+    def _new_tier_name(self) -> str:
+        names = self._tier_names()
+        number = len(names) + 1
+        while f"Tier {number}" in names:
+            number += 1
+        return f"Tier {number}"
+
+    def _add_tier(self, tier: SubscriptionTier) -> None:
+        table = self._ui.tiersTable
+        row = table.rowCount()
+        table.insertRow(row)
+
+        table.setItem(row, _NAME, QTableWidgetItem(tier.name))
+        table.setItem(
+            row, _PUBLISHING_INTERVAL, QTableWidgetItem(f"{tier.publishing_interval:g}")
+        )
+        table.setItem(
+            row, _SAMPLING_INTERVAL, QTableWidgetItem(f"{tier.sampling_interval:g}")
+        )
+        table.setItem(row, _QUEUE_SIZE, QTableWidgetItem(str(tier.queue_size)))
+
+        discard_oldest = QTableWidgetItem()
+        discard_oldest.setCheckState(
+            Qt.CheckState.Checked if tier.discard_oldest else Qt.CheckState.Unchecked
+        )
+        table.setItem(row, _DISCARD_OLDEST, discard_oldest)
+
+        deadband_type = QComboBox()
+        deadband_type.addItems(_DEADBAND_TYPES)
+        deadband_type.setCurrentText(tier.deadband_type.name.rstrip("_"))
+        table.setCellWidget(row, _DEADBAND_TYPE, deadband_type)
+        table.setItem(
+            row, _DEADBAND_VALUE, QTableWidgetItem(f"{tier.deadband_value:g}")
+        )
+
+        self._update_rule_tiers()
+
+    def _remove_tier(self) -> None:
+        # The default tier can be changed, but not removed
+        row = self._ui.tiersTable.currentRow()
+        if row > 0:
+            self._ui.tiersTable.removeRow(row)
+            self._update_rule_tiers()
+
+    def _add_rule(self, rule: TierRule) -> None:
+        table = self._ui.rulesTable
+        row = table.rowCount()
+        table.insertRow(row)
+
+        table.setItem(row, _PATTERN, QTableWidgetItem(rule.pattern))
+        tier = QComboBox()
+        tier.addItems(self._tier_names())
+        tier.setCurrentText(rule.tier)
+        table.setCellWidget(row, _TIER, tier)
+
+    def _remove_rule(self) -> None:
+        row = self._ui.rulesTable.currentRow()
+        if row >= 0:
+            self._ui.rulesTable.removeRow(row)
+
+    def _tier_changed(self, item: QTableWidgetItem) -> None:
+        if item.column() == _NAME:
+            # Rules keep using the renamed tier
+            self._update_rule_tiers(keep_position=True)
+
+    def _update_rule_tiers(self, *, keep_position: bool = False) -> None:
+        names = self._tier_names()
+        for row in range(self._ui.rulesTable.rowCount()):
+            tier = self._ui.rulesTable.cellWidget(row, _TIER)
+            index = tier.currentIndex()
+            text = tier.currentText()
+            tier.clear()
+            tier.addItems(names)
+            if keep_position:
+                tier.setCurrentIndex(index)
+            else:
+                tier.setCurrentText(text)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'uaclient/subscriptiontiers_ui.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_SubscriptionTiersDialog(object):
+    def setupUi(self, SubscriptionTiersDialog):
+        SubscriptionTiersDialog.setObjectName("SubscriptionTiersDialog")
+        SubscriptionTiersDialog.resize(760, 480)
+        self.gridLayout = QtWidgets.QGridLayout(SubscriptionTiersDialog)
+        self.gridLayout.setObjectName("gridLayout")
+        self.tiersLabel = QtWidgets.QLabel(SubscriptionTiersDialog)
+        font = QtGui.QFont()
+        font.setBold(True)
+        font.setWeight(75)
+        self.tiersLabel.setFont(font)
+        self.tiersLabel.setObjectName("tiersLabel")
+        self.gridLayout.addWidget(self.tiersLabel, 0, 0, 1, 3)
+        self.tiersTable = QtWidgets.QTableWidget(SubscriptionTiersDialog)
+        self.tiersTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tiersTable.setObjectName("tiersTable")
+        self.tiersTable.setColumnCount(7)
+        self.tiersTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(3, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(4, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(5, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.tiersTable.setHorizontalHeaderItem(6, item)
+        self.tiersTable.horizontalHeader().setStretchLastSection(True)
+        self.gridLayout.addWidget(self.tiersTable, 1, 0, 1, 3)
+        self.addTierButton = QtWidgets.QPushButton(SubscriptionTiersDialog)
+        self.addTierButton.setObjectName("addTierButton")
+        self.gridLayout.addWidget(self.addTierButton, 2, 0, 1, 1)
+        self.removeTierButton = QtWidgets.QPushButton(SubscriptionTiersDialog)
+        self.removeTierButton.setObjectName("removeTierButton")
+        self.gridLayout.addWidget(self.removeTierButton, 2, 1, 1, 1)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.gridLayout.addItem(spacerItem, 2, 2, 1, 1)
+        self.rulesLabel = QtWidgets.QLabel(SubscriptionTiersDialog)
+        font = QtGui.QFont()
+        font.setBold(True)
+        font.setWeight(75)
+        self.rulesLabel.setFont(font)
+        self.rulesLabel.setObjectName("rulesLabel")
+        self.gridLayout.addWidget(self.rulesLabel, 3, 0, 1, 3)
+        self.rulesTable = QtWidgets.QTableWidget(SubscriptionTiersDialog)
+        self.rulesTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.rulesTable.setObjectName("rulesTable")
+        self.rulesTable.setColumnCount(2)
+        self.rulesTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.rulesTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.rulesTable.setHorizontalHeaderItem(1, item)
+        self.rulesTable.horizontalHeader().setStretchLastSection(True)
+        self.gridLayout.addWidget(self.rulesTable, 4, 0, 1, 3)
+        self.addRuleButton = QtWidgets.QPushButton(SubscriptionTiersDialog)
+        self.addRuleButton.setObjectName("addRuleButton")
+        self.gridLayout.addWidget(self.addRuleButton, 5, 0, 1, 1)
+        self.removeRuleButton = QtWidgets.QPushButton(SubscriptionTiersDialog)
+        self.removeRuleButton.setObjectName("removeRuleButton")
+        self.gridLayout.addWidget(self.removeRuleButton, 5, 1, 1, 1)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.gridLayout.addItem(spacerItem1, 5, 2, 1, 1)
+        self.buttonBox = QtWidgets.QDialogButtonBox(SubscriptionTiersDialog)
+        self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
+        self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+        self.buttonBox.setObjectName("buttonBox")
+        self.gridLayout.addWidget(self.buttonBox, 6, 0, 1, 3)
+
+        self.retranslateUi(SubscriptionTiersDialog)
+        self.buttonBox.accepted.connect(SubscriptionTiersDialog.accept) # type: ignore
+        self.buttonBox.rejected.connect(SubscriptionTiersDialog.reject) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(SubscriptionTiersDialog)
+
+    def retranslateUi(self, SubscriptionTiersDialog):
+        _translate = QtCore.QCoreApplication.translate
+        SubscriptionTiersDialog.setWindowTitle(_translate("SubscriptionTiersDialog", "Subscription Tiers"))
+        self.tiersLabel.setText(_translate("SubscriptionTiersDialog", "Tiers (the first one is the default):"))
+        item = self.tiersTable.horizontalHeaderItem(0)
+        item.setText(_translate("SubscriptionTiersDialog", "Name"))
+        item = self.tiersTable.horizontalHeaderItem(1)
+        item.setText(_translate("SubscriptionTiersDialog", "Publishing Interval (ms)"))
+        item = self.tiersTable.horizontalHeaderItem(2)
+        item.setText(_translate("SubscriptionTiersDialog", "Sampling Interval (ms)"))
+        item = self.tiersTable.horizontalHeaderItem(3)
+        item.setText(_translate("SubscriptionTiersDialog", "Queue Size"))
+        item = self.tiersTable.horizontalHeaderItem(4)
+        item.setText(_translate("SubscriptionTiersDialog", "Discard Oldest"))
+        item = self.tiersTable.horizontalHeaderItem(5)
+        item.setText(_translate("SubscriptionTiersDialog", "Deadband"))
+        item = self.tiersTable.horizontalHeaderItem(6)
+        item.setText(_translate("SubscriptionTiersDialog", "Deadband Value"))
+        self.addTierButton.setText(_translate("SubscriptionTiersDialog", "Add tier"))
+        self.removeTierButton.setText(_translate("SubscriptionTiersDialog", "Remove tier"))
+        self.rulesLabel.setText(_translate("SubscriptionTiersDialog", "Rules (NodeId patterns such as ns=2;s=Line1.*, first match wins):"))
+        item = self.rulesTable.horizontalHeaderItem(0)
+        item.setText(_translate("SubscriptionTiersDialog", "Pattern"))
+        item = self.rulesTable.horizontalHeaderItem(1)
+        item.setText(_translate("SubscriptionTiersDialog", "Tier"))
+        self.addRuleButton.setText(_translate("SubscriptionTiersDialog", "Add rule"))
+        self.removeRuleButton.setText(_translate("SubscriptionTiersDialog", "Remove rule"))
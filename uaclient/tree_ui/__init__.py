@@ -1,2 +1,5 @@
+from ._address_space_cache import AddressSpaceCache  # noqa: F401
+from ._node_path import resolve_node_path  # noqa: F401
 from ._opc_tree_item import OpcTreeItem  # noqa: F401
 from ._opc_tree_model import OpcTreeModel  # noqa: F401
+from ._visible_item_tracker import VisibleItemTracker  # noqa: F401
@@ -0,0 +1,324 @@
+import concurrent.futures
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from asyncua import ua
+from asyncua.common.utils import Buffer
+from asyncua.ua.ua_binary import (
+    struct_from_binary,
+    struct_to_binary,
+    variant_from_binary,
+    variant_to_binary,
+)
+
+from . import _ua_services
+
+logger = logging.getLogger(__name__)
+
+# A cached child: the reference it was browsed through, and its other
+# attributes that don't change at runtime
+CachedChild = Tuple[ua.ReferenceDescription, Dict[ua.AttributeIds, ua.Variant]]
+
+# Bumped whenever the tables change. It's only a cache, so older ones are just
+# dropped.
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    id INTEGER PRIMARY KEY,
+    application_uri TEXT NOT NULL,
+    endpoint_url TEXT NOT NULL,
+    user TEXT NOT NULL,
+    namespaces TEXT NOT NULL,
+    namespace_versions TEXT NOT NULL,
+    UNIQUE (application_uri, endpoint_url, user, namespaces)
+);
+CREATE TABLE IF NOT EXISTS children (
+    server_id INTEGER NOT NULL,
+    parent TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    nodeid TEXT NOT NULL,
+    reference BLOB NOT NULL,
+    PRIMARY KEY (server_id, parent, position)
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    server_id INTEGER NOT NULL,
+    nodeid TEXT NOT NULL,
+    attribute INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (server_id, nodeid, attribute)
+);
+"""
+
+_TABLES = ("servers", "children", "attributes")
+
+
+class AddressSpaceCache:
+    """Browse results and static attributes of servers, kept on disk.
+
+    Servers are told apart by their ApplicationUri and namespace array, and by
+    the endpoint and user they were browsed through, as those can see
+    different parts of the address space. The cached data of a server is
+    dropped when one of its namespace versions changes; anything else is
+    caught by rebrowsing in the background, after the cached children have
+    been shown.
+
+    Writes are made on a thread of their own, so caching a large folder
+    doesn't hold up the GUI. Children written are read back as written even
+    before they reach the disk.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._connection = sqlite3.connect(path)
+        # Readers aren't blocked by the writer then
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != (
+            _SCHEMA_VERSION
+        ):
+            with self._connection:
+                for table in _TABLES:
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+        self._server_id: Optional[int] = None
+
+        # Only ever used on the writer thread
+        self._path = path
+        self._write_connection: Optional[sqlite3.Connection] = None
+        self._writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Address space cache"
+        )
+
+        # Children that haven't been written yet, keyed by server and parent.
+        # Invalidated children are an empty list. Filled on the GUI thread and
+        # emptied on the writer thread, so they're guarded by a lock.
+        self._pending_lock = threading.Lock()
+        self._pending_children: Dict[Tuple[int, str], List[CachedChild]] = {}
+
+        self._closed = False
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._server_id = None
+        self._writer.submit(self._close_writer).result()
+        self._writer.shutdown()
+        self._connection.close()
+
+    def flush(self) -> None:
+        """Wait until everything has been written"""
+        self._writer.submit(lambda: None).result()
+
+    async def load_server(
+        self, session: Any, *, endpoint_url: str = "", user: str = ""
+    ) -> None:
+        """Identify the server behind `session`, and use its cached data.
+
+        `endpoint_url` and `user` identify who it's seen by, and shouldn't
+        contain secrets: they're stored as is.
+        """
+        self._server_id = None
+
+        values = await _ua_services.read_attributes(
+            session,
+            [
+                ua.NodeId(ua.ObjectIds.Server_ServerArray),
+                ua.NodeId(ua.ObjectIds.Server_NamespaceArray),
+            ],
+            [ua.AttributeIds.Value],
+        )
+        server_array, namespace_array = [value[0].Value.Value for value in values]
+        if not server_array or not namespace_array:
+            logger.debug("Server can't be identified, not caching its address space")
+            return
+
+        try:
+            namespace_versions = await _ua_services.read_namespace_versions(session)
+        except ua.UaStatusCodeError as error:
+            logger.debug("Unable to read namespace versions: %s", error)
+            namespace_versions = {}
+
+        # ServerArray always starts with the server's own ApplicationUri
+        self.select_server(
+            server_array[0],
+            namespace_array,
+            namespace_versions,
+            endpoint_url=endpoint_url,
+            user=user,
+        )
+
+    def select_server(
+        self,
+        application_uri: str,
+        namespace_array: Sequence[str],
+        namespace_versions: Dict[str, str],
+        *,
+        endpoint_url: str = "",
+        user: str = "",
+    ) -> None:
+        # This waits for earlier writes, so nothing pending is left behind
+        self._server_id = self._writer.submit(
+            self._write_server,
+            (application_uri, endpoint_url, user, json.dumps(list(namespace_array))),
+            json.dumps(namespace_versions, sort_keys=True),
+        ).result()
+
+    def unload_server(self) -> None:
+        self._server_id = None
+
+    def children(self, nodeid: ua.NodeId) -> Optional[List[CachedChild]]:
+        """Return the cached children of a node, or None if there are none"""
+        if self._server_id is None:
+            return None
+
+        parent = nodeid.to_string()
+        with self._pending_lock:
+            pending = self._pending_children.get((self._server_id, parent))
+        if pending is not None:
+            return list(pending) or None
+
+        rows = self._connection.execute(
+            "SELECT nodeid, reference FROM children"
+            " WHERE server_id = ? AND parent = ? ORDER BY position",
+            (self._server_id, parent),
+        ).fetchall()
+        if not rows:
+            return None
+
+        attributes: Dict[str, Dict[ua.AttributeIds, ua.Variant]] = {}
+        for child, attribute, value in self._connection.execute(
+            "SELECT attributes.nodeid, attributes.attribute, attributes.value"
+            " FROM children JOIN attributes"
+            " ON attributes.server_id = children.server_id"
+            " AND attributes.nodeid = children.nodeid"
+            " WHERE children.server_id = ? AND children.parent = ?",
+            (self._server_id, parent),
+        ):
+            attributes.setdefault(child, {})[ua.AttributeIds(attribute)] = (
+                variant_from_binary(Buffer(value))
+            )
+
+        return [
+            (
+                struct_from_binary(ua.ReferenceDescription, Buffer(reference)),
+                attributes.get(child, {}),
+            )
+            for child, reference in rows
+        ]
+
+    def set_children(self, nodeid: ua.NodeId, children: List[CachedChild]) -> None:
+        if self._server_id is None:
+            return
+
+        self._write_children(nodeid, list(children))
+
+    def invalidate_children(self, nodeid: ua.NodeId) -> None:
+        """Forget the cached children of a node, e.g. after they changed"""
+        if self._server_id is None:
+            return
+
+        self._write_children(nodeid, [])
+
+    def _write_children(self, nodeid: ua.NodeId, children: List[CachedChild]) -> None:
+        assert self._server_id is not None
+        key = (self._server_id, nodeid.to_string())
+        with self._pending_lock:
+            self._pending_children[key] = children
+        self._writer.submit(self._store_children, key, children)
+
+    # The methods below run on the writer thread
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._write_connection is None:
+            self._write_connection = sqlite3.connect(self._path)
+        return self._write_connection
+
+    def _close_writer(self) -> None:
+        if self._write_connection is not None:
+            self._write_connection.close()
+            self._write_connection = None
+
+    def _write_server(self, key: Tuple[str, str, str, str], versions: str) -> int:
+        connection = self._writer_connection()
+        with connection:
+            row = connection.execute(
+                "SELECT id, namespace_versions FROM servers"
+                " WHERE application_uri = ? AND endpoint_url = ? AND user = ?"
+                " AND namespaces = ?",
+                key,
+            ).fetchone()
+
+            if row is None:
+                cursor = connection.execute(
+                    "INSERT INTO servers"
+                    " (application_uri, endpoint_url, user, namespaces,"
+                    " namespace_versions) VALUES (?, ?, ?, ?, ?)",
+                    (*key, versions),
+                )
+                assert cursor.lastrowid is not None
+                return cursor.lastrowid
+
+            server_id = row[0]
+            if row[1] != versions:
+                # The address space has been changed, none of it can be trusted
+                for table in ("children", "attributes"):
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE server_id = ?", (server_id,)
+                    )
+                connection.execute(
+                    "UPDATE servers SET namespace_versions = ? WHERE id = ?",
+                    (versions, server_id),
+                )
+            return server_id
+
+    def _store_children(
+        self, key: Tuple[int, str], children: List[CachedChild]
+    ) -> None:
+        server_id, parent = key
+        connection = self._writer_connection()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM children WHERE server_id = ? AND parent = ?",
+                    (server_id, parent),
+                )
+                connection.executemany(
+                    "INSERT INTO children"
+                    " (server_id, parent, position, nodeid, reference)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            server_id,
+                            parent,
+                            position,
+                            reference.NodeId.to_string(),
+                            struct_to_binary(reference),
+                        )
+                        for position, (reference, _attributes) in enumerate(children)
+                    ],
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO attributes"
+                    " (server_id, nodeid, attribute, value) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            server_id,
+                            reference.NodeId.to_string(),
+                            int(attribute),
+                            variant_to_binary(value),
+                        )
+                        for reference, attributes in children
+                        for attribute, value in attributes.items()
+                    ],
+                )
+        except sqlite3.Error as error:
+            logger.warning("Unable to cache children of %s: %s", parent, error)
+        finally:
+            with self._pending_lock:
+                # They may have been replaced in the meantime
+                if self._pending_children.get(key) is children:
+                    del self._pending_children[key]
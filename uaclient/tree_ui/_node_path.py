@@ -0,0 +1,55 @@
+from typing import Any, List
+
+from asyncua import ua
+
+from . import _ua_services
+
+_ROOT = ua.NodeId(ua.ObjectIds.RootFolder)
+
+# Guards against reference loops when walking up from a NodeId
+_MAX_DEPTH = 100
+
+
+async def resolve_node_path(session: Any, text: str) -> List[ua.NodeId]:
+    """Find the chain of nodes leading from the Root folder down to a node.
+
+    `text` is either a NodeId such as "ns=2;i=1234", or a browse path starting
+    below the Root folder such as "Objects/2:Line3/2:Filler/2:Speed". Names
+    without a namespace index are in namespace 0.
+
+    Raises ValueError if there's no such node below the Root folder, or
+    UaStatusCodeError if the server rejects the NodeId.
+    """
+    try:
+        nodeid = ua.NodeId.from_string(text)
+    except ua.UaStringParsingError:
+        return await _resolve_browse_path(session, text)
+
+    return await _resolve_nodeid(session, nodeid)
+
+
+async def _resolve_browse_path(session: Any, text: str) -> List[ua.NodeId]:
+    names = [ua.QualifiedName.from_string(name) for name in text.split("/") if name]
+    nodeids = await _ua_services.translate_browse_path_prefixes(session, _ROOT, names)
+
+    path = [_ROOT]
+    for name, nodeid in zip(names, nodeids):
+        if nodeid is None:
+            raise ValueError(f"{name.to_string()} not found below {path[-1]}")
+        path.append(nodeid)
+
+    return path
+
+
+async def _resolve_nodeid(session: Any, nodeid: ua.NodeId) -> List[ua.NodeId]:
+    path = [nodeid]
+    while path[0] != _ROOT:
+        if len(path) > _MAX_DEPTH:
+            raise ValueError(f"{nodeid} is too deep below the Root folder")
+
+        parent = await _ua_services.browse_parent(session, path[0])
+        if parent is None:
+            raise ValueError(f"{nodeid} is not below the Root folder")
+        path.insert(0, parent)
+
+    return path
@@ -1,142 +1,713 @@
 import asyncio
-import copy
-from typing import Optional, Any, List, Dict, cast
+import bisect
+import logging
+from enum import Enum, auto
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Any,
+    Coroutine,
+    List,
+    Dict,
+    Sequence,
+    Tuple,
+)
 from asyncua.common.ua_utils import val_to_string, data_type_to_string
 
-from PyQt5.QtCore import (
-    QObject,
-    pyqtSignal,
-    QPersistentModelIndex,
-    QModelIndex,
-    QAbstractItemModel,
-)
 from PyQt5.QtGui import QIcon
 
 from asyncua import ua, Node
 
+from . import _ua_services
+from ._address_space_cache import AddressSpaceCache, CachedChild
+
+if TYPE_CHECKING:
+    from ._opc_tree_model import OpcTreeModel
+
+logger = logging.getLogger(__name__)
+
+# Attributes that are part of every ReferenceDescription returned by Browse
+_BROWSE_ATTRIBUTES = (
+    ua.AttributeIds.NodeId,
+    ua.AttributeIds.BrowseName,
+    ua.AttributeIds.DisplayName,
+    ua.AttributeIds.NodeClass,
+)
+
+# Number of children whose attributes are read and updated together while
+# streaming them in
+_STREAM_CHUNK_SIZE = 250
+
+# Attributes that change at runtime, so they're never cached
+_DYNAMIC_ATTRIBUTES = (ua.AttributeIds.Value,)
+
+
+def _to_display_value(attribute: ua.AttributeIds, value: Any) -> Any:
+    if isinstance(value, ua.LocalizedText):
+        value = value.Text
+
+    if value is not None:
+        if attribute == ua.AttributeIds.Description:
+            value = str(value)
+        elif attribute == ua.AttributeIds.Value:
+            value = val_to_string(value)
+        elif attribute == ua.AttributeIds.DataType:
+            value = data_type_to_string(value)
+
+    return value
+
+
+_FOLDER_TYPE = ua.TwoByteNodeId(ua.ObjectIds.FolderType)
+_PROPERTY_TYPE = ua.TwoByteNodeId(ua.ObjectIds.PropertyType)
+
 
-async def _refresh_item(item):
-    await item._refresh_data()
-    return item
+class _TypeCategory(Enum):
+    """The part of a node's type definition that decides its icon"""
 
+    UNKNOWN = auto()
+    FOLDER = auto()
+    PROPERTY = auto()
+    OTHER = auto()
+
+
+_IconKey = Tuple[ua.NodeClass, _TypeCategory]
+
+_ICON_PATHS: Dict[_IconKey, str] = {
+    (ua.NodeClass.Object, _TypeCategory.FOLDER): ":/folder.svg",
+    (ua.NodeClass.Object, _TypeCategory.OTHER): ":/object.svg",
+    (ua.NodeClass.Variable, _TypeCategory.PROPERTY): ":/property.svg",
+    (ua.NodeClass.Variable, _TypeCategory.OTHER): ":/variable.svg",
+    (ua.NodeClass.Method, _TypeCategory.OTHER): ":/method.svg",
+    (ua.NodeClass.ObjectType, _TypeCategory.OTHER): ":/object_type.svg",
+    (ua.NodeClass.VariableType, _TypeCategory.OTHER): ":/variable_type.svg",
+    (ua.NodeClass.DataType, _TypeCategory.OTHER): ":/data_type.svg",
+    (ua.NodeClass.ReferenceType, _TypeCategory.OTHER): ":/reference_type.svg",
+}
+
+# Icons are requested on every paint of every visible row, so only load each
+# one once. They're created on first use, since that requires a QApplication.
+_icons: Dict[_IconKey, QIcon] = {}
+
+
+def _type_category(
+    node_class: ua.NodeClass, type_definition: Optional[ua.NodeId]
+) -> _TypeCategory:
+    if node_class not in (ua.NodeClass.Object, ua.NodeClass.Variable):
+        return _TypeCategory.OTHER
+
+    if type_definition is None:
+        return _TypeCategory.UNKNOWN
+
+    if node_class == ua.NodeClass.Object and type_definition == _FOLDER_TYPE:
+        return _TypeCategory.FOLDER
+
+    if node_class == ua.NodeClass.Variable and type_definition == _PROPERTY_TYPE:
+        return _TypeCategory.PROPERTY
+
+    return _TypeCategory.OTHER
+
+
+def _icon(key: _IconKey) -> Optional[QIcon]:
+    try:
+        return _icons[key]
+    except KeyError:
+        pass
+
+    path = _ICON_PATHS.get(key)
+    if path is None:
+        return None
 
-class OpcTreeItem(QObject):
-    data_changed = pyqtSignal(QModelIndex, QModelIndex)
-    item_added = pyqtSignal(QObject)
-    item_removed = pyqtSignal(QObject)
+    icon = QIcon(path)
+    _icons[key] = icon
+    return icon
+
+
+class _ColumnLayout:
+    """How the columns of a model map to attributes, shared by all its items"""
+
+    __slots__ = ("requested", "model_columns", "fetched")
+
+    def __init__(self, columns: List[ua.AttributeIds]) -> None:
+        self.requested = list(columns)
+        self.model_columns = {column: index for index, column in enumerate(columns)}
+
+        # The node class is always needed to determine the icon, and the browse
+        # name for sorting, even if they weren't requested
+        self.fetched = list(columns)
+        for attribute in (ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName):
+            if attribute not in self.fetched:
+                self.fetched.append(attribute)
+
+
+_column_layouts: Dict[Tuple[ua.AttributeIds, ...], _ColumnLayout] = {}
+
+
+def _column_layout(columns: List[ua.AttributeIds]) -> _ColumnLayout:
+    key = tuple(columns)
+    try:
+        return _column_layouts[key]
+    except KeyError:
+        layout = _column_layouts[key] = _ColumnLayout(columns)
+        return layout
+
+
+async def _refresh_items(
+    items: List["OpcTreeItem"],
+    *,
+    from_browse: bool = False,
+    from_cache: bool = False,
+    emit: bool = False,
+) -> None:
+    """Fetch the data of several items with a constant number of requests.
+
+    If the items were created from browse results, only the attributes Browse
+    couldn't supply are read. If they were created from the address space
+    cache, only the attributes that aren't cached are read. Either way, the
+    node classes are known, so attributes a node doesn't have aren't asked for.
+    """
+    if not items:
+        return
+
+    # Every item shares a session and the same columns, so this can be batched
+    session = items[0].node.session
+    columns = items[0]._layout.fetched
+    nodeids = [item.node.nodeid for item in items]
+
+    if from_cache:
+        columns = [column for column in columns if column in _DYNAMIC_ATTRIBUTES]
+    elif from_browse:
+        columns = [column for column in columns if column not in _BROWSE_ATTRIBUTES]
+    else:
+        type_definitions = await _ua_services.read_type_definitions(session, nodeids)
+        for item, type_definition in zip(items, type_definitions):
+            item._set_type_definition(type_definition)
+
+    item_columns = [
+        [column for column in columns if item.has_attribute(column)] for item in items
+    ]
+    values = await _ua_services.read_node_attributes(
+        session, list(zip(nodeids, item_columns))
+    )
+    for item, attributes, item_values in zip(items, item_columns, values):
+        for column, value in zip(attributes, item_values):
+            item.set_data(column, value.Value, emit=emit)
+        if not from_cache:
+            item._static_data_read = True
+
+
+async def _stream_items(
+    items: List["OpcTreeItem"], *, from_browse: bool = False, from_cache: bool = False
+) -> None:
+    """Refresh items that are already shown, a chunk at a time.
+
+    The chunks are read concurrently, and each one is updated as soon as its
+    values arrive, so the first rows fill in within a single round trip.
+    """
+    chunks = []
+    for start in range(0, len(items), _STREAM_CHUNK_SIZE):
+        end = start + _STREAM_CHUNK_SIZE
+        chunks.append(items[start:end])
+
+    await asyncio.gather(
+        *[
+            _refresh_items(
+                chunk, from_browse=from_browse, from_cache=from_cache, emit=True
+            )
+            for chunk in chunks
+        ]
+    )
+
+
+async def refresh_dynamic_data(items: List["OpcTreeItem"]) -> None:
+    """Read the attributes of items that change at runtime again"""
+    # Those are the ones items from the address space cache still need
+    await _stream_items(items, from_cache=True)
+
+
+async def _wait_for_fetch(task: asyncio.Task) -> None:
+    """Wait for a fetch to finish, returning quietly if it was cancelled"""
+    try:
+        await asyncio.wait([task])
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+    if not task.cancelled():
+        task.result()
+
+
+class OpcTreeItem:
+    """A node shown in an OpcTreeModel.
+
+    A tree can hold a great many of these, so they're plain records: changes
+    are reported straight to the model rather than through signals, and
+    everything that's the same for every item (e.g. the columns) is shared.
+    """
+
+    __slots__ = (
+        "node",
+        "_model",
+        "_cache",
+        "_parent",
+        "_children",
+        "_child_keys",
+        "_row",
+        "_rows_valid",
+        "_children_fetched",
+        "_static_data_read",
+        "_fetch_task",
+        "_page_size",
+        "_continuation_point",
+        "_page_references",
+        "_type_definition",
+        "_icon_key",
+        "_layout",
+        "_data",
+        "_display_data",
+    )
 
     def __init__(
         self,
-        model: QAbstractItemModel,
+        model: "OpcTreeModel",
         node: Node,
-        parent_index: QPersistentModelIndex,
         columns: List[ua.AttributeIds],
         *,
         parent: Optional["OpcTreeItem"] = None,
+        cache: Optional[AddressSpaceCache] = None,
+        page_size: int = 0,
     ):
-        super().__init__(parent)
         self.node = node
         self._model = model
-        self._parent_index = parent_index
+        self._cache = cache
+        self._parent = parent
         self._children: List["OpcTreeItem"] = []
 
-        self._display_name = ""
-        self._value = None
+        # Sort keys of the children, kept in step with self._children so the
+        # insert position can be found with a binary search
+        self._child_keys: List[ua.QualifiedName] = []
+
+        # Row of this item within its parent. It's only up to date while the
+        # parent's _rows_valid is set; inserting in the middle clears it and the
+        # rows are renumbered on the next lookup.
+        self._row = 0
+        self._rows_valid = True
+
         self._children_fetched = False
-        self._type_definition = None
 
-        self._requested_columns = columns
-        self._model_column_to_ua_column = dict(
-            [(index, column) for index, column in enumerate(columns)]
-        )
-        self._ua_column_to_model_column = dict(
-            [(column, index) for index, column in enumerate(columns)]
-        )
+        # Whether the attributes that don't change at runtime have been read
+        # (or restored from the cache). Rows are shown before that, so a fetch
+        # that's abandoned halfway leaves items without them.
+        self._static_data_read = False
+
+        # Fetching children takes several round trips. This is the one in
+        # flight, so it can be abandoned once its result is no longer wanted.
+        self._fetch_task: Optional[asyncio.Task] = None
 
-        self._columns = copy.deepcopy(columns)
+        # If page_size is set, children are browsed that many at a time. The
+        # continuation point is where the next page starts, and the references
+        # so far are kept to cache the children once they're all there.
+        self._page_size = page_size
+        self._continuation_point: Optional[bytes] = None
+        self._page_references: Optional[List[ua.ReferenceDescription]] = None
 
-        # We always need the node class to determine icon, even if it wasn't requested
-        if ua.AttributeIds.NodeClass not in self._columns:
-            self._columns.append(ua.AttributeIds.NodeClass)
+        self._type_definition: Optional[ua.NodeId] = None
+        self._icon_key: Optional[_IconKey] = None
 
-        # We always need the browse name for sorting, even if it wasn't requested
-        if ua.AttributeIds.BrowseName not in self._columns:
-            self._columns.append(ua.AttributeIds.BrowseName)
+        self._layout = _column_layout(columns)
 
+        # Raw attribute values, and the memoized strings shown for them. Most
+        # items are never painted, so the latter is only created when needed.
         self._data: Dict[ua.AttributeIds, Any] = {}
+        self._display_data: Optional[Dict[ua.AttributeIds, Any]] = None
 
     async def _refresh_data(self) -> None:
-        self._type_definition = await self.node.read_type_definition()
-
-        values = await self.node.read_attributes(self._columns)
-        for index, column in enumerate(self._columns):
-            self.set_data(column, values[index].Value, emit=False)
+        await _refresh_items([self])
 
     async def refresh_children(self) -> None:
         self.clear_children()  # Clear first
+        await _wait_for_fetch(self._start_fetch(self._fetch_children()))
+
+    async def revalidate_children(self, *, added: Sequence[ua.NodeId] = ()) -> None:
+        """Bring children that were fetched earlier up to date with the server.
+
+        Only the differences are applied, so children that still exist keep
+        their own children and subscriptions. `added` are children known to be
+        new, e.g. from a model change event: while only some pages of children
+        have been browsed, those are the only changes that are picked up.
+        """
+        await _wait_for_fetch(self._start_fetch(self._revalidate_children(added)))
+
+    def can_fetch_more(self) -> bool:
+        """Whether there's another page of children, and nothing is being fetched"""
+        return self._continuation_point is not None and (
+            self._fetch_task is None or self._fetch_task.done()
+        )
 
-        children = await self.node.get_children()
-        index = self.persistent_index(0)
-        items = [
-            OpcTreeItem(self._model, child, index, self._requested_columns)
-            for child in children
-        ]
+    def fetch_more(self) -> asyncio.Task:
+        """Start fetching the next page of children.
+
+        The fetch is started before this returns, so `can_fetch_more` is false
+        until it's done.
+        """
+        if self._continuation_point is None:
+            raise RuntimeError("There are no more children to fetch")
+
+        return self._start_fetch(
+            self._fetch_page(
+                _ua_services.browse_next_page(
+                    self.node.session, self._continuation_point
+                )
+            )
+        )
 
-        self._model.beginInsertRows(QModelIndex(index), 0, len(children) - 1)
+    def cancel_fetch(self) -> bool:
+        """Abandon fetching the children of this item and its descendants.
 
-        for task in asyncio.as_completed([_refresh_item(item) for item in items]):
-            item = await task
-            await self.add_child(item)
+        Returns whether a fetch was still in flight, i.e. whether some of the
+        children may be missing or incomplete.
+        """
+        interrupted = False
+        if self._fetch_task is not None:
+            interrupted = not self._fetch_task.done()
+            self._fetch_task.cancel()
+            self._fetch_task = None
 
-        self._model.endInsertRows()
+        for child in self._children:
+            if child.cancel_fetch():
+                interrupted = True
+        return interrupted
+
+    def _start_fetch(self, coroutine: Coroutine[Any, Any, None]) -> asyncio.Task:
+        # A newer fetch always supersedes the one in flight
+        if self._fetch_task is not None:
+            self._fetch_task.cancel()
+
+        self._fetch_task = asyncio.ensure_future(coroutine)
+        return self._fetch_task
+
+    async def _fetch_children(self) -> None:
+        if self._cache is not None:
+            cached_children = self._cache.children(self.node.nodeid)
+            if cached_children is not None:
+                await self._restore_children(cached_children)
+                return
+
+        if self._page_size > 0:
+            await self._fetch_page(
+                _ua_services.browse_children_page(
+                    self.node.session, self.node.nodeid, self._page_size
+                )
+            )
+            return
 
+        # Show each page of children as soon as it's browsed. Browse supplied
+        # enough to sort and name them, the other columns fill in afterwards.
+        references = []
+        items = []
+        async for page in _ua_services.browse_children_pages(
+            self.node.session, self.node.nodeid
+        ):
+            page_items = self._create_children(page)
+            self._add_children(page_items)
+            self._children_fetched = True
+            references.extend(page)
+            items.extend(page_items)
+
+        await _stream_items(items, from_browse=True)
+        self._cache_children(references)
+
+    async def _fetch_page(
+        self,
+        page: Coroutine[
+            Any, Any, Tuple[List[ua.ReferenceDescription], Optional[bytes]]
+        ],
+    ) -> None:
+        # The server is done with the old continuation point once it's been
+        # sent, whether or not a reply makes it back. If none does, the rest of
+        # the children can't be paged in; revalidating browses them afresh.
+        self._continuation_point = None
+        try:
+            references, continuation_point = await page
+        except (ua.UaError, OSError, asyncio.TimeoutError):
+            self._page_references = None
+            raise
+        self._continuation_point = continuation_point
+
+        # Children reported as added may have been inserted already
+        existing = {child.node.nodeid for child in self._children}
+        items = self._create_children(
+            [reference for reference in references if reference.NodeId not in existing]
+        )
+        self._add_children(items)
+        self._children_fetched = True
+        if self._page_references is None:
+            self._page_references = []
+        self._page_references.extend(references)
+
+        await _stream_items(items, from_browse=True)
+
+        if self._continuation_point is None:
+            self._cache_children(self._page_references)
+            self._page_references = None
+
+    def _release_continuation_point(self) -> None:
+        if self._continuation_point is None:
+            return
+
+        _ua_services.schedule_release_continuation_point(
+            self.node.session, self._continuation_point
+        )
+        self._continuation_point = None
+        self._page_references = None
+
+    async def _restore_children(self, cached_children: List[CachedChild]) -> None:
+        items = self._create_children([reference for reference, _ in cached_children])
+        for item, (_, attributes) in zip(items, cached_children):
+            for attribute, value in attributes.items():
+                if attribute in item._layout.fetched:
+                    item.set_data(attribute, ua.DataValue(value), emit=False)
+            # Only children whose attributes were all read are cached
+            item._static_data_read = True
+
+        # Show them right away, then catch up with the server
         self._children_fetched = True
+        self._add_children(items)
+        await _stream_items(items, from_cache=True)
+
+        await self._revalidate_children(())
+
+    def _add_children(self, items: List["OpcTreeItem"]) -> None:
+        """Insert items at their sorted positions.
+
+        Each run of items that ends up in consecutive rows is inserted in one
+        go, and no insert is left open, so the model is consistent afterwards.
+        """
+        if not items:
+            return
+
+        items.sort(key=lambda item: item._data[ua.AttributeIds.BrowseName])
+        index = self._model.item_index(self)
+
+        start = 0
+        while start < len(items):
+            browse_name = items[start]._data[ua.AttributeIds.BrowseName]
+            row = bisect.bisect_right(self._child_keys, browse_name)
+
+            # Everything that sorts before the next existing sibling follows on
+            end = len(items)
+            if row < len(self._child_keys):
+                next_key = self._child_keys[row]
+                end = start + 1
+                while (
+                    end < len(items)
+                    and items[end]._data[ua.AttributeIds.BrowseName] < next_key
+                ):
+                    end += 1
+
+            self._model.beginInsertRows(index, row, row + end - start - 1)
+            for item in items[start:end]:
+                self._attach_child(item, item._data[ua.AttributeIds.BrowseName])
+            self._model.endInsertRows()
+
+            start = end
+
+    def _cache_children(self, references: List[ua.ReferenceDescription]) -> None:
+        if self._cache is None:
+            return
+
+        children = {child.node.nodeid: child for child in self._children}
+        if not all(child._static_data_read for child in children.values()):
+            # They'd be restored with empty columns that are never read again
+            return
+
+        self._cache.set_children(
+            self.node.nodeid,
+            [
+                (reference, children[reference.NodeId]._static_data())
+                for reference in references
+                if reference.NodeId in children
+            ],
+        )
+
+    def _static_data(self) -> Dict[ua.AttributeIds, ua.Variant]:
+        return {
+            attribute: ua.Variant(value)
+            for attribute, value in self._data.items()
+            if attribute not in _DYNAMIC_ATTRIBUTES
+            and attribute not in _BROWSE_ATTRIBUTES
+        }
+
+    async def _revalidate_children(self, added: Sequence[ua.NodeId]) -> None:
+        if self._continuation_point is not None:
+            # Only some of the children have been browsed so far. Comparing
+            # against all of them would defeat the paging, so only the ones
+            # known to be new are added.
+            await self._insert_added_children(added)
+            await self._read_incomplete_children()
+            return
+
+        references = await _ua_services.browse_children(
+            self.node.session, self.node.nodeid
+        )
+        if not self._children_fetched:
+            # Cleared while we were browsing
+            return
+
+        nodeids = {reference.NodeId for reference in references}
+        for child in [
+            child for child in self._children if child.node.nodeid not in nodeids
+        ]:
+            self._remove_child(child)
+
+        existing = {child.node.nodeid for child in self._children}
+        items = self._create_children(
+            [reference for reference in references if reference.NodeId not in existing]
+        )
+        self._add_children(items)
+
+        # Along with the new children
+        await self._read_incomplete_children()
+
+        self._cache_children(references)
+
+    async def _read_incomplete_children(self) -> None:
+        # Children whose fetch was abandoned before their attributes were read
+        await _stream_items(
+            [child for child in self._children if not child._static_data_read],
+            from_browse=True,
+        )
+
+    async def _insert_added_children(self, nodeids: Sequence[ua.NodeId]) -> None:
+        existing = {child.node.nodeid for child in self._children}
+        items = [
+            OpcTreeItem(
+                self._model,
+                Node(self.node.session, nodeid),
+                self._layout.requested,
+                parent=self,
+                cache=self._cache,
+                page_size=self._page_size,
+            )
+            for nodeid in dict.fromkeys(nodeids)
+            if nodeid not in existing
+        ]
+        if not items:
+            return
+
+        # There's no reference description to take the browse name from
+        await _refresh_items(items)
+        if not self._children_fetched:
+            # Cleared while we were reading
+            return
+        self._add_children(items)
+
+    def _create_children(
+        self, references: List[ua.ReferenceDescription]
+    ) -> List["OpcTreeItem"]:
+        items = []
+        for reference in references:
+            item = OpcTreeItem(
+                self._model,
+                Node(self.node.session, reference.NodeId),
+                self._layout.requested,
+                parent=self,
+                cache=self._cache,
+                page_size=self._page_size,
+            )
+            item._set_reference_data(reference)
+            items.append(item)
+
+        return items
+
+    def _set_reference_data(self, reference: ua.ReferenceDescription) -> None:
+        if not reference.TypeDefinition.is_null():
+            self._set_type_definition(reference.TypeDefinition)
+
+        for attribute, value in (
+            (ua.AttributeIds.NodeId, reference.NodeId),
+            (ua.AttributeIds.BrowseName, reference.BrowseName),
+            (ua.AttributeIds.DisplayName, reference.DisplayName),
+            (ua.AttributeIds.NodeClass, reference.NodeClass),
+        ):
+            if attribute in self._layout.fetched:
+                self.set_data(attribute, ua.Variant(value), emit=False)
+
+    def _set_type_definition(self, type_definition: Optional[ua.NodeId]) -> None:
+        self._type_definition = type_definition
+        self._update_icon_key()
+
+    def _update_icon_key(self) -> None:
+        try:
+            node_class = self._data[ua.AttributeIds.NodeClass]
+        except KeyError:
+            self._icon_key = None
+            return
 
-    def set_parent_index(self, index: QPersistentModelIndex) -> None:
-        self._parent_index = index
+        self._icon_key = (
+            node_class,
+            _type_category(node_class, self._type_definition),
+        )
+
+    def has_attribute(self, attribute: ua.AttributeIds) -> bool:
+        """Whether the node has an attribute, as far as its node class tells"""
+        node_class = self._data.get(ua.AttributeIds.NodeClass)
+        if node_class is None:
+            return True
+
+        return _ua_services.has_attribute(node_class, attribute)
 
     def children_fetched(self) -> bool:
         return self._children_fetched
 
     async def add_child(self, child: "OpcTreeItem") -> None:
-        child.setParent(self)
-        child.set_parent_index(self.persistent_index(0))
-        child.data_changed.connect(self.data_changed)
-        child.item_added.connect(self.item_added)
-        child.item_removed.connect(self.item_removed)
-
         try:
             browse_name = child._data[ua.AttributeIds.BrowseName]
         except KeyError:
             await child._refresh_data()
             browse_name = child._data[ua.AttributeIds.BrowseName]
 
+        self._attach_child(child, browse_name)
+
+    def _attach_child(
+        self, child: "OpcTreeItem", browse_name: ua.QualifiedName
+    ) -> None:
+        child._parent = self
+
         # Maintain a sorted list here as we insert, so we don't have
-        # to sort after the fact. Using a sorted container would be
-        # more efficient, but it would be less clear and we really
-        # aren't dealing with that many nodes here.
-        destination_index = 0
-        for index, sibling in enumerate(self._children):
-            if browse_name < sibling._data[ua.AttributeIds.BrowseName]:
-                break
-            destination_index = index + 1
+        # to sort after the fact. Siblings with equal names keep the order
+        # they were added in.
+        destination_index = bisect.bisect_right(self._child_keys, browse_name)
+        if destination_index != len(self._children):
+            self._rows_valid = False
+        child._row = destination_index
 
         self._children.insert(destination_index, child)
-        self.item_added.emit(child)
+        self._child_keys.insert(destination_index, browse_name)
+        self._model._handle_item_added(child)
+
+    def _remove_child(self, child: "OpcTreeItem") -> None:
+        child.clear_children(recursive=True)
+
+        row = child.row()
+        self._model.beginRemoveRows(self._model.item_index(self), row, row)
+
+        child._emit_removed()
+        del self._children[row]
+        del self._child_keys[row]
+        if row != len(self._children):
+            self._rows_valid = False
+
+        self._model.endRemoveRows()
 
     def child(self, row: int) -> Optional["OpcTreeItem"]:
         return self._children[row]
 
-    def persistent_index(self, column) -> QPersistentModelIndex:
-        if not self._parent_index.isValid():
-            # This must be the root item
-            return QPersistentModelIndex(self._model.index(0, 0))
-
-        return QPersistentModelIndex(
-            self._model.index(self.row(), column, QModelIndex(self._parent_index))
-        )
+    def parent(self) -> Optional["OpcTreeItem"]:
+        return self._parent
 
     def clear_children(self, *, recursive=False) -> None:
+        self.cancel_fetch()
+        self._release_continuation_point()
         self._children_fetched = False
         children_count = self.child_count()
         if children_count == 0:
@@ -146,96 +717,84 @@ class OpcTreeItem(QObject):
             for child in self._children:
                 child.clear_children(recursive=True)
 
-        index = QModelIndex(self.persistent_index(0))
-        self._model.beginRemoveRows(index, 0, children_count - 1)
+        self._model.beginRemoveRows(self._model.item_index(self), 0, children_count - 1)
 
         for child in self._children:
-            self.item_removed.emit(child)
+            child._emit_removed()
 
         self._children.clear()
+        self._child_keys.clear()
+        self._rows_valid = True
 
         self._model.endRemoveRows()
 
+    def _emit_removed(self) -> None:
+        # Descendants that are still loaded leave the model along with this item
+        for child in self._children:
+            child._emit_removed()
+
+        self._model._handle_item_removed(self)
+
     def row(self) -> int:
-        parent = cast("OpcTreeItem", self.parent())
+        parent = self._parent
 
         if parent is None:
             return 0
 
-        return parent._children.index(self)
+        if not parent._rows_valid:
+            for row, child in enumerate(parent._children):
+                child._row = row
+            parent._rows_valid = True
+
+        return self._row
 
     def child_count(self) -> int:
         return len(self._children)
 
     def column_count(self) -> int:
-        return len(self._requested_columns)
+        return len(self._layout.requested)
 
     def data(self, column: int) -> Any:
-        return self._data[self._model_column_to_ua_column[column]]
+        attribute = self._layout.requested[column]
+
+        # Formatting is done on demand, since most values are never painted
+        # before they change again
+        if self._display_data is None:
+            self._display_data = {}
+        else:
+            try:
+                return self._display_data[attribute]
+            except KeyError:
+                pass
+
+        # Columns Browse doesn't supply are empty until they've been read
+        display_value = _to_display_value(attribute, self._data.get(attribute))
+        self._display_data[attribute] = display_value
+        return display_value
 
     def icon(self) -> Optional[QIcon]:
-        try:
-            node_class = self._data[ua.AttributeIds.NodeClass]
-        except KeyError:
+        if self._icon_key is None:
             return None
 
-        if node_class == ua.NodeClass.Object:
-            if self._type_definition is None:
-                return None
-
-            if self._type_definition == ua.TwoByteNodeId(ua.ObjectIds.FolderType):
-                return QIcon(":/folder.svg")
-            else:
-                return QIcon(":/object.svg")
-        elif node_class == ua.NodeClass.Variable:
-            if self._type_definition is None:
-                return None
-
-            if self._type_definition == ua.TwoByteNodeId(ua.ObjectIds.PropertyType):
-                return QIcon(":/property.svg")
-            else:
-                return QIcon(":/variable.svg")
-        elif node_class == ua.NodeClass.Method:
-            return QIcon(":/method.svg")
-        elif node_class == ua.NodeClass.ObjectType:
-            return QIcon(":/object_type.svg")
-        elif node_class == ua.NodeClass.VariableType:
-            return QIcon(":/variable_type.svg")
-        elif node_class == ua.NodeClass.DataType:
-            return QIcon(":/data_type.svg")
-        elif node_class == ua.NodeClass.ReferenceType:
-            return QIcon(":/reference_type.svg")
-
-        return None
+        return _icon(self._icon_key)
 
     def set_data(
         self, attribute: ua.AttributeIds, value: ua.DataValue, *, emit: bool = True
     ) -> None:
         real_value = value.Value
-        if isinstance(real_value, ua.LocalizedText):
-            real_value = real_value.Text
-        elif isinstance(real_value, ua.Variant):
+        if isinstance(real_value, ua.Variant):
             real_value = real_value.Value
 
-        if real_value is not None:
-            if attribute == ua.AttributeIds.Description:
-                real_value = str(real_value)
-            elif attribute == ua.AttributeIds.Value:
-                real_value = val_to_string(real_value)
-            elif attribute == ua.AttributeIds.DataType:
-                real_value = data_type_to_string(real_value)
-
         self._data[attribute] = real_value
+        if self._display_data is not None:
+            self._display_data.pop(attribute, None)
+        if attribute == ua.AttributeIds.NodeClass:
+            self._update_icon_key()
 
         if emit:
-            # Emit signal letting subscribers know what data has changed here
-            column = self._ua_column_to_model_column[attribute]
-            try:
-                persistent_index = self.persistent_index(column)
-            except ValueError:
-                return
-            index = QModelIndex(persistent_index)
-            self.data_changed.emit(index, index)
+            column = self._layout.model_columns.get(attribute)
+            if column is not None:
+                self._model._handle_data_changed(self, column)
 
     def __eq__(self, other) -> bool:
         if isinstance(other, OpcTreeItem):
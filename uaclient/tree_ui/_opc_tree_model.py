@@ -1,10 +1,22 @@
-from typing import Any, List, Union, Optional, overload
+import asyncio
+import collections
+import logging
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Tuple,
+    Union,
+    Optional,
+    overload,
+)
 
 from qasync import asyncSlot
 from PyQt5.QtCore import (
     Qt,
     QModelIndex,
-    QPersistentModelIndex,
     pyqtSignal,
     QAbstractItemModel,
     QVariant,
@@ -12,9 +24,13 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtWidgets import QTreeView
 
-from asyncua import Node
-from asyncua.ua import AttributeIds
-from ._opc_tree_item import OpcTreeItem
+from asyncua import Node, ua
+from asyncua.ua import AttributeIds, NodeId
+from . import _ua_services
+from ._address_space_cache import AddressSpaceCache
+from ._opc_tree_item import OpcTreeItem, refresh_dynamic_data
+
+logger = logging.getLogger(__name__)
 
 _UA_ATTRIBUTE_NAMES = {
     AttributeIds.NodeId: "Node ID",
@@ -46,18 +62,72 @@ _UA_ATTRIBUTE_NAMES = {
     AttributeIds.AccessLevelEx: "Access Level",
 }
 
+# Subscriptions can change thousands of values at once. Rather than asking the
+# view to repaint for each one, collect them and emit them at (at most) 30 Hz.
+DEFAULT_DATA_CHANGED_INTERVAL = 1 / 30
+
+# Number of collapsed subtrees kept in memory. Zero discards children as soon
+# as their parent is collapsed.
+DEFAULT_COLLAPSED_CACHE_SIZE = 0
+
+# Number of children browsed at a time. Zero browses them all at once.
+DEFAULT_BROWSE_PAGE_SIZE = 0
+
 
 class OpcTreeModel(QAbstractItemModel):
     item_added = pyqtSignal(OpcTreeItem)
     item_removed = pyqtSignal(OpcTreeItem)
 
-    def __init__(self, view: QTreeView, columns: List[AttributeIds]):
+    # Emitted for items that are kept while hidden in a collapsed subtree, and
+    # for those items once they are shown again
+    item_suspended = pyqtSignal(OpcTreeItem)
+    item_resumed = pyqtSignal(OpcTreeItem)
+
+    def __init__(
+        self,
+        view: QTreeView,
+        columns: List[AttributeIds],
+        *,
+        data_changed_interval: float = DEFAULT_DATA_CHANGED_INTERVAL,
+        collapsed_cache_size: int = DEFAULT_COLLAPSED_CACHE_SIZE,
+        address_space_cache: Optional[AddressSpaceCache] = None,
+        browse_page_size: int = DEFAULT_BROWSE_PAGE_SIZE,
+        dropped_values: Optional[Mapping[Tuple[NodeId, AttributeIds], int]] = None,
+    ):
         super().__init__()
+        self._view = view
         self._columns = columns
-        self._root_item = OpcTreeItem(self, None, QPersistentModelIndex(), columns)
-        self._root_item.data_changed.connect(self._handle_data_changed)
-        self._root_item.item_added.connect(self.item_added)
-        self._root_item.item_removed.connect(self.item_removed)
+        self._address_space_cache = address_space_cache
+        self._browse_page_size = browse_page_size
+
+        # How many values of each node's attributes were never shown because
+        # newer ones arrived first, mentioned in tooltips
+        self._dropped_values = dropped_values if dropped_values is not None else {}
+
+        # Collapsed items that kept their children, least recently used first
+        self._collapsed_items: "collections.OrderedDict[int, OpcTreeItem]" = (
+            collections.OrderedDict()
+        )
+        self._collapsed_cache_size = collapsed_cache_size
+
+        # Items with changed data that haven't been announced yet, keyed by
+        # identity, with the first and last column that changed
+        self._dirty_items: Dict[int, Tuple[OpcTreeItem, int, int]] = {}
+        self._data_changed_interval = data_changed_interval
+        self._data_changed_handle: Optional[asyncio.TimerHandle] = None
+
+        # Items report their changes through _handle_item_added,
+        # _handle_item_removed and _handle_data_changed
+        self._root_item = OpcTreeItem(self, None, columns)
+
+        # The same node can show up in several places, e.g. when it's organized
+        # by more than one folder. OpcTreeItems aren't hashable, so key them by
+        # identity.
+        self._items_by_nodeid: Dict[NodeId, Dict[int, OpcTreeItem]] = {}
+
+        # Model change events are applied one at a time, so a later one can't
+        # overtake an earlier one while it's browsing
+        self._model_changes_lock = asyncio.Lock()
 
         view.setModel(self)
         view.expanded.connect(self._handle_expanded)
@@ -127,14 +197,31 @@ class OpcTreeModel(QAbstractItemModel):
         if role == Qt.ItemDataRole.DecorationRole and index.column() == 0:
             return item.icon()
 
+        if role == Qt.ItemDataRole.ToolTipRole and item.node is not None:
+            dropped = self._dropped_values.get(
+                (item.node.nodeid, self._columns[index.column()])
+            )
+            if dropped:
+                return f"{dropped} intermediate values dropped while busy"
+
     async def set_root_node(self, node: Node):
         index = self.index(0, 0)
-        item = OpcTreeItem(self, node, QPersistentModelIndex(), self._columns)
+        item = OpcTreeItem(
+            self,
+            node,
+            self._columns,
+            cache=self._address_space_cache,
+            page_size=self._browse_page_size,
+        )
 
         self.beginInsertRows(index, 0, 0)
         await self._root_item.add_child(item)
         self.endInsertRows()
 
+    async def refresh_values(self, items: List[OpcTreeItem]) -> None:
+        """Read the values of items again, e.g. after a reconnection"""
+        await refresh_dynamic_data(items)
+
     def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
         item = parent.internalPointer()
 
@@ -143,6 +230,23 @@ class OpcTreeModel(QAbstractItemModel):
 
         return True
 
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if not parent.isValid():
+            return False
+
+        return parent.internalPointer().can_fetch_more()
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        if not parent.isValid():
+            return
+
+        task = parent.internalPointer().fetch_more()
+        task.add_done_callback(self._handle_fetch_more_done)
+
+    def _handle_fetch_more_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Unable to fetch more children: %s", task.exception())
+
     def headerData(
         self,
         section: int,
@@ -157,21 +261,282 @@ class OpcTreeModel(QAbstractItemModel):
         return QVariant()
 
     def clear(self) -> None:
+        self._collapsed_items.clear()
         self._root_item.clear_children(recursive=True)
 
-    @asyncSlot(QModelIndex, QModelIndex)
-    async def _handle_data_changed(
-        self, start_index: QModelIndex, end_index: QModelIndex
+    def browse_page_size(self) -> int:
+        return self._browse_page_size
+
+    def set_browse_page_size(self, size: int) -> None:
+        """Set the page size for nodes added from now on"""
+        self._browse_page_size = size
+
+    def collapsed_cache_size(self) -> int:
+        return self._collapsed_cache_size
+
+    def set_collapsed_cache_size(self, size: int) -> None:
+        self._collapsed_cache_size = size
+        self._evict_collapsed_items()
+
+    def items(self) -> Iterator[OpcTreeItem]:
+        """Iterate over every item currently in the model, depth first."""
+        stack = [self._root_item]
+        while stack:
+            item = stack.pop()
+            if item is not self._root_item:
+                yield item
+            stack.extend(reversed(item._children))
+
+    def find_items(self, nodeid: NodeId) -> List[OpcTreeItem]:
+        """Return the items currently in the model that represent a node"""
+        return list(self._items_by_nodeid.get(nodeid, {}).values())
+
+    async def reveal(self, path: List[NodeId]) -> QModelIndex:
+        """Show the last node of a path, and return its index.
+
+        `path` is the chain of nodes leading from the root node down to it.
+        Only the items along the path are fetched and expanded, the rest of
+        the tree is left as is.
+        """
+        item = self._root_item.child(0)
+        if item is None or not path or item.node.nodeid != path[0]:
+            raise ValueError(f"{path[0] if path else None} is not the root node")
+
+        for nodeid in path[1:]:
+            if not item.children_fetched():
+                await item.refresh_children()
+
+            child = self._find_child(item, nodeid)
+            while child is None and item.can_fetch_more():
+                await item.fetch_more()
+                child = self._find_child(item, nodeid)
+
+            if child is None:
+                raise ValueError(f"{nodeid} not found below {item.node.nodeid}")
+
+            # The children are there already, so this doesn't fetch them again
+            self._view.setExpanded(self.item_index(item), True)
+            item = child
+
+        return self.item_index(item)
+
+    @asyncSlot(list)
+    async def apply_model_changes(
+        self, changes: List[ua.ModelChangeStructureDataType]
     ) -> None:
-        self.dataChanged.emit(start_index, end_index)
+        """Update the items affected by changes to the server's address space.
+
+        `changes` are those of a GeneralModelChangeEvent. Deleted nodes are
+        removed right away; nodes whose references changed have their children
+        revalidated, so only the rows that were added or removed are touched.
+        Changes are applied in the order they're reported.
+        """
+        async with self._model_changes_lock:
+            await self._apply_model_changes(changes)
+
+    async def _apply_model_changes(
+        self, changes: List[ua.ModelChangeStructureDataType]
+    ) -> None:
+        root_item = self._root_item.child(0)
+        if root_item is None:
+            return
+
+        # Nodes whose children changed, in the order they were reported
+        changed: Dict[NodeId, None] = {}
+        added: List[NodeId] = []
+        for change in changes:
+            if change.Verb & ua.ModelChangeStructureVerbMask.NodeDeleted:
+                for item in self.find_items(change.Affected):
+                    parent_item = item.parent()
+                    if parent_item is not None and parent_item is not self._root_item:
+                        parent_item._remove_child(item)
+                        changed[parent_item.node.nodeid] = None
+
+            if change.Verb & (
+                ua.ModelChangeStructureVerbMask.ReferenceAdded
+                | ua.ModelChangeStructureVerbMask.ReferenceDeleted
+            ):
+                # The affected node is the source of the reference
+                changed[change.Affected] = None
+
+            if change.Verb & ua.ModelChangeStructureVerbMask.NodeAdded:
+                # The affected node is the new one
+                added.append(change.Affected)
+
+        # Find where the new nodes were added, all in one go
+        added_by_parent: Dict[NodeId, List[NodeId]] = {}
+        try:
+            parents = await _ua_services.browse_parents(root_item.node.session, added)
+        except ua.UaError as error:
+            logger.debug("Unable to find parents of added nodes: %s", error)
+            parents = []
+        for nodeid, parent in zip(added, parents):
+            if parent is not None:
+                changed[parent] = None
+                added_by_parent.setdefault(parent, []).append(nodeid)
+
+        for nodeid in changed:
+            if self._address_space_cache is not None:
+                self._address_space_cache.invalidate_children(nodeid)
+
+            for item in self.find_items(nodeid):
+                if item.children_fetched():
+                    await item.revalidate_children(
+                        added=added_by_parent.get(nodeid, [])
+                    )
+
+    def _find_child(self, item: OpcTreeItem, nodeid: NodeId) -> Optional[OpcTreeItem]:
+        for child in self.find_items(nodeid):
+            if child.parent() is item:
+                return child
+        return None
+
+    def item_index(self, item: OpcTreeItem, column: int = 0) -> QModelIndex:
+        if item is self._root_item:
+            return QModelIndex()
+
+        return self.createIndex(item.row(), column, item)
+
+    def _handle_item_added(self, item: OpcTreeItem) -> None:
+        self._items_by_nodeid.setdefault(item.node.nodeid, {})[id(item)] = item
+        self.item_added.emit(item)
+
+    def _handle_item_removed(self, item: OpcTreeItem) -> None:
+        # Descendants are reported too, so a cached subtree whose ancestor went
+        # away doesn't hold on to a slot of the collapsed cache
+        self._collapsed_items.pop(id(item), None)
+
+        nodeid = item.node.nodeid
+        items = self._items_by_nodeid.get(nodeid)
+        if items is not None:
+            items.pop(id(item), None)
+            if not items:
+                del self._items_by_nodeid[nodeid]
+
+        self.item_removed.emit(item)
+
+    def items_changed(self, changes: List[Tuple[OpcTreeItem, ua.AttributeIds]]) -> None:
+        """Announce attributes that were set on items without emitting.
+
+        They're coalesced with any other pending changes, so setting many values
+        with `emit=False` first and announcing them here in one go saves a call
+        per value.
+        """
+        for item, attribute in changes:
+            column = item._layout.model_columns.get(attribute)
+            if column is not None:
+                self._handle_data_changed(item, column)
+
+    def _handle_data_changed(self, item: OpcTreeItem, column: int) -> None:
+        key = id(item)
+        first_column = last_column = column
+        previous = self._dirty_items.get(key)
+        if previous is not None:
+            first_column = min(first_column, previous[1])
+            last_column = max(last_column, previous[2])
+        self._dirty_items[key] = (item, first_column, last_column)
+
+        if self._data_changed_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Nothing to wait on, so there's nothing to coalesce either
+                self._emit_data_changed()
+            else:
+                self._data_changed_handle = loop.call_later(
+                    self._data_changed_interval, self._emit_data_changed
+                )
+
+    def _emit_data_changed(self) -> None:
+        self._data_changed_handle = None
+        dirty_items = self._dirty_items
+        self._dirty_items = {}
+
+        # Collapse the changes into one range per parent: the rows and columns
+        # in between get repainted as well, but that's far cheaper than
+        # handling a signal per cell.
+        ranges: Dict[int, Tuple[OpcTreeItem, int, int, int, int]] = {}
+        for item, first_column, last_column in dirty_items.values():
+            parent_item = item.parent()
+            if parent_item is None:
+                continue
+
+            # The item may have been removed since it changed
+            row = item.row()
+            if row >= parent_item.child_count() or parent_item.child(row) is not item:
+                continue
+
+            first_row = last_row = row
+            key = id(parent_item)
+            previous = ranges.get(key)
+            if previous is not None:
+                first_row = min(first_row, previous[1])
+                last_row = max(last_row, previous[2])
+                first_column = min(first_column, previous[3])
+                last_column = max(last_column, previous[4])
+            ranges[key] = (parent_item, first_row, last_row, first_column, last_column)
+
+        for (
+            parent_item,
+            first_row,
+            last_row,
+            first_column,
+            last_column,
+        ) in ranges.values():
+            parent_index = self.item_index(parent_item)
+            self.dataChanged.emit(
+                self.index(first_row, first_column, parent_index),
+                self.index(last_row, last_column, parent_index),
+            )
+
+    @staticmethod
+    def _holds_continuation_points(item: OpcTreeItem) -> bool:
+        stack = [item]
+        while stack:
+            descendant = stack.pop()
+            if descendant._continuation_point is not None:
+                return True
+            stack.extend(descendant._children)
+        return False
+
+    def _suspend_children(self, item: OpcTreeItem) -> None:
+        stack = list(item._children)
+        while stack:
+            child = stack.pop()
+            self.item_suspended.emit(child)
+            stack.extend(child._children)
+
+    def _resume_children(self, item: OpcTreeItem) -> None:
+        for child in item._children:
+            self.item_resumed.emit(child)
+
+            # Grandchildren are only shown if the view kept their parent expanded
+            if child._children and self._view.isExpanded(self.item_index(child)):
+                self._resume_children(child)
+
+    def _evict_collapsed_items(self) -> None:
+        while len(self._collapsed_items) > self._collapsed_cache_size:
+            _, item = self._collapsed_items.popitem(last=False)
+            item.clear_children(recursive=True)
 
     @asyncSlot(QModelIndex)
     async def _handle_expanded(self, index: QModelIndex) -> None:
         if not index.isValid():
             return
 
-        # Refresh the children for the item that was just expanded
         item = index.internalPointer()
+        if self._collapsed_items.pop(id(item), None) is not None:
+            # The children were kept, so they're already shown. Just make sure
+            # they're still what the server has.
+            self._resume_children(item)
+            await item.revalidate_children()
+            return
+
+        # Items revealed along a path have their children before being expanded
+        if item.children_fetched():
+            return
+
+        # Refresh the children for the item that was just expanded
         await item.refresh_children()
 
     @asyncSlot(QModelIndex)
@@ -179,6 +544,23 @@ class OpcTreeModel(QAbstractItemModel):
         if not index.isValid():
             return
 
-        # Clear the children for the item just collapsed
         item = index.internalPointer()
-        item.clear_children()
+        interrupted = item.cancel_fetch()
+        paged = self._holds_continuation_points(item)
+        if (
+            self._collapsed_cache_size <= 0
+            or not item.children_fetched()
+            or interrupted
+            or paged
+        ):
+            # Clear the children for the item just collapsed. Ones still being
+            # fetched would be kept half loaded, so they're dropped as well.
+            # So are partly paged ones: servers only keep a few continuation
+            # points per session, which the cache would hold on to.
+            item.clear_children(recursive=paged)
+            return
+
+        self._suspend_children(item)
+        self._collapsed_items[id(item)] = item
+        self._collapsed_items.move_to_end(id(item))
+        self._evict_collapsed_items()
@@ -0,0 +1,422 @@
+import asyncio
+import itertools
+import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+# Servers advertise MaxNodesPerRead/MaxNodesPerBrowse operation limits, and many
+# embedded ones are fairly conservative. Stay well under the usual values so a
+# single request is never rejected for being too large.
+MAX_NODES_PER_READ = 1000
+MAX_NODES_PER_BROWSE = 500
+
+_T = TypeVar("_T")
+
+# Attributes only some node classes have. Every other attribute is common to
+# all of them (Part 3, 5.2 onwards).
+_NODE_CLASS_ATTRIBUTES: Dict[ua.AttributeIds, FrozenSet[ua.NodeClass]] = {
+    ua.AttributeIds.Value: frozenset(
+        (ua.NodeClass.Variable, ua.NodeClass.VariableType)
+    ),
+    ua.AttributeIds.DataType: frozenset(
+        (ua.NodeClass.Variable, ua.NodeClass.VariableType)
+    ),
+    ua.AttributeIds.ValueRank: frozenset(
+        (ua.NodeClass.Variable, ua.NodeClass.VariableType)
+    ),
+    ua.AttributeIds.ArrayDimensions: frozenset(
+        (ua.NodeClass.Variable, ua.NodeClass.VariableType)
+    ),
+    ua.AttributeIds.AccessLevel: frozenset((ua.NodeClass.Variable,)),
+    ua.AttributeIds.UserAccessLevel: frozenset((ua.NodeClass.Variable,)),
+    ua.AttributeIds.AccessLevelEx: frozenset((ua.NodeClass.Variable,)),
+    ua.AttributeIds.MinimumSamplingInterval: frozenset((ua.NodeClass.Variable,)),
+    ua.AttributeIds.Historizing: frozenset((ua.NodeClass.Variable,)),
+    ua.AttributeIds.EventNotifier: frozenset((ua.NodeClass.Object, ua.NodeClass.View)),
+    ua.AttributeIds.Executable: frozenset((ua.NodeClass.Method,)),
+    ua.AttributeIds.UserExecutable: frozenset((ua.NodeClass.Method,)),
+    ua.AttributeIds.IsAbstract: frozenset(
+        (
+            ua.NodeClass.ObjectType,
+            ua.NodeClass.VariableType,
+            ua.NodeClass.ReferenceType,
+            ua.NodeClass.DataType,
+        )
+    ),
+    ua.AttributeIds.Symmetric: frozenset((ua.NodeClass.ReferenceType,)),
+    ua.AttributeIds.InverseName: frozenset((ua.NodeClass.ReferenceType,)),
+    ua.AttributeIds.ContainsNoLoops: frozenset((ua.NodeClass.View,)),
+    ua.AttributeIds.DataTypeDefinition: frozenset((ua.NodeClass.DataType,)),
+}
+
+
+def has_attribute(node_class: ua.NodeClass, attribute: ua.AttributeIds) -> bool:
+    """Whether nodes of a class have an attribute, so it's worth asking for"""
+    node_classes = _NODE_CLASS_ATTRIBUTES.get(attribute)
+    return node_classes is None or node_class in node_classes
+
+
+def _chunks(sequence: Sequence[_T], size: int) -> Iterator[Sequence[_T]]:
+    for start in range(0, len(sequence), size):
+        end = start + size
+        yield sequence[start:end]
+
+
+def _read_value_id(nodeid: ua.NodeId, attribute: ua.AttributeIds) -> ua.ReadValueId:
+    read_value_id = ua.ReadValueId()
+    read_value_id.NodeId = nodeid
+    read_value_id.AttributeId = attribute
+    return read_value_id
+
+
+async def _read(session: Any, nodes_to_read: Sequence[ua.ReadValueId]):
+    params = ua.ReadParameters()
+    params.NodesToRead = list(nodes_to_read)
+    return await session.read(params)
+
+
+async def read_attributes(
+    session: Any, nodeids: Sequence[ua.NodeId], attributes: Sequence[ua.AttributeIds]
+) -> List[List[ua.DataValue]]:
+    """Read the same attributes of many nodes in as few Read requests as possible.
+
+    Returns one list of DataValues per node, in the order of `attributes`.
+    """
+    return await read_node_attributes(
+        session, [(nodeid, attributes) for nodeid in nodeids]
+    )
+
+
+async def read_node_attributes(
+    session: Any, nodes: Sequence[Tuple[ua.NodeId, Sequence[ua.AttributeIds]]]
+) -> List[List[ua.DataValue]]:
+    """Read some attributes of each of many nodes, in as few requests as possible.
+
+    Returns one list of DataValues per node, in the order of its attributes.
+    """
+    nodes_to_read = [
+        _read_value_id(nodeid, attribute)
+        for nodeid, attributes in nodes
+        for attribute in attributes
+    ]
+    if not nodes_to_read:
+        return [[] for _ in nodes]
+
+    results = await asyncio.gather(
+        *[_read(session, chunk) for chunk in _chunks(nodes_to_read, MAX_NODES_PER_READ)]
+    )
+    values = itertools.chain.from_iterable(results)
+
+    return [list(itertools.islice(values, len(attributes))) for _, attributes in nodes]
+
+
+async def _browse(
+    session: Any,
+    nodes_to_browse: Sequence[ua.BrowseDescription],
+    max_references: int = 0,
+) -> List[ua.BrowseResult]:
+    params = ua.BrowseParameters()
+    params.View.Timestamp = ua.get_win_epoch()
+    params.RequestedMaxReferencesPerNode = max_references
+    params.NodesToBrowse = list(nodes_to_browse)
+    return await session.browse(params)
+
+
+async def _browse_many(
+    session: Any,
+    nodes_to_browse: Sequence[ua.BrowseDescription],
+    max_references: int = 0,
+) -> List[ua.BrowseResult]:
+    if not nodes_to_browse:
+        return []
+
+    results = await asyncio.gather(
+        *[
+            _browse(session, chunk, max_references)
+            for chunk in _chunks(nodes_to_browse, MAX_NODES_PER_BROWSE)
+        ]
+    )
+    return list(itertools.chain.from_iterable(results))
+
+
+def _forward_references(
+    nodeid: ua.NodeId, reference_type: int, result_mask: ua.BrowseResultMask
+) -> ua.BrowseDescription:
+    description = ua.BrowseDescription()
+    description.NodeId = nodeid
+    description.BrowseDirection = ua.BrowseDirection.Forward
+    description.ReferenceTypeId = ua.NodeId(reference_type)
+    description.IncludeSubtypes = True
+    description.ResultMask = result_mask
+    return description
+
+
+async def read_type_definitions(
+    session: Any, nodeids: Sequence[ua.NodeId]
+) -> List[Optional[ua.NodeId]]:
+    """Browse the HasTypeDefinition reference of many nodes at once."""
+    results = await _browse_many(
+        session,
+        [
+            _forward_references(
+                nodeid, ua.ObjectIds.HasTypeDefinition, ua.BrowseResultMask.None_
+            )
+            for nodeid in nodeids
+        ],
+    )
+
+    type_definitions: List[Optional[ua.NodeId]] = []
+    for result in results:
+        if result.References:
+            type_definitions.append(result.References[0].NodeId)
+        else:
+            type_definitions.append(None)
+
+    return type_definitions
+
+
+async def read_namespace_versions(session: Any) -> Dict[str, str]:
+    """Read the NamespaceVersion of each namespace, keyed by namespace URI.
+
+    NamespaceMetadata is optional, so namespaces the server doesn't describe
+    are left out.
+    """
+    namespaces = await browse_children(
+        session, ua.NodeId(ua.ObjectIds.Server_Namespaces)
+    )
+    results = await _browse_many(
+        session,
+        [
+            _forward_references(
+                namespace.NodeId,
+                ua.ObjectIds.HasProperty,
+                ua.BrowseResultMask.BrowseName,
+            )
+            for namespace in namespaces
+        ],
+    )
+
+    uris = []
+    version_nodeids = []
+    for namespace, result in zip(namespaces, results):
+        for reference in result.References:
+            if reference.BrowseName.Name == "NamespaceVersion":
+                uris.append(namespace.BrowseName.Name)
+                version_nodeids.append(reference.NodeId)
+
+    values = await read_attributes(session, version_nodeids, [ua.AttributeIds.Value])
+    return {
+        uri: str(value[0].Value.Value)
+        for uri, value in zip(uris, values)
+        if value[0].StatusCode.is_good()
+    }
+
+
+_BrowsePage = Tuple[List[ua.ReferenceDescription], Optional[bytes]]
+
+
+async def browse_children_page(
+    session: Any, nodeid: ua.NodeId, max_references: int = 0
+) -> _BrowsePage:
+    """Browse the hierarchical children of a node, up to `max_references` of them.
+
+    Returns the references, and the continuation point to pass to
+    `browse_next_page` for the rest (None if there are no more). The references
+    carry the BrowseName, DisplayName, NodeClass and TypeDefinition of each
+    child, so none of those need to be read separately.
+    """
+    description = ua.BrowseDescription()
+    description.NodeId = nodeid
+    description.BrowseDirection = ua.BrowseDirection.Forward
+    description.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+    description.IncludeSubtypes = True
+    description.NodeClassMask = ua.NodeClass.Unspecified
+    description.ResultMask = ua.BrowseResultMask.All
+
+    result = (await _browse(session, [description], max_references))[0]
+    result.StatusCode.check()
+    return list(result.References), result.ContinuationPoint or None
+
+
+async def _browse_next(
+    session: Any, continuation_point: bytes, release: bool
+) -> ua.BrowseResult:
+    params = ua.BrowseNextParameters()
+    params.ContinuationPoints = [continuation_point]
+    params.ReleaseContinuationPoints = release
+    return (await session.browse_next(params))[0]
+
+
+async def browse_next_page(session: Any, continuation_point: bytes) -> _BrowsePage:
+    """Continue browsing where a previous page left off"""
+    result = await _browse_next(session, continuation_point, False)
+    result.StatusCode.check()
+    return list(result.References), result.ContinuationPoint or None
+
+
+async def release_continuation_point(session: Any, continuation_point: bytes) -> None:
+    """Tell the server the rest of a browse won't be needed.
+
+    Servers only keep a handful of continuation points per session, so ones
+    that are abandoned must be released.
+    """
+    await _browse_next(session, continuation_point, True)
+
+
+def _check_release(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Unable to release continuation point: %s", task.exception())
+
+
+def schedule_release_continuation_point(
+    session: Any, continuation_point: bytes
+) -> None:
+    """Release a continuation point in the background.
+
+    For when it's abandoned somewhere that can't wait for the server.
+    """
+    task = asyncio.ensure_future(
+        release_continuation_point(session, continuation_point)
+    )
+    task.add_done_callback(_check_release)
+
+
+async def browse_children_pages(
+    session: Any, nodeid: ua.NodeId
+) -> AsyncIterator[List[ua.ReferenceDescription]]:
+    """Browse all the hierarchical children of a node, a page at a time.
+
+    Every continuation point is followed, but each page is yielded as soon as
+    it arrives.
+    """
+    references, continuation_point = await browse_children_page(session, nodeid)
+    try:
+        yield references
+
+        while continuation_point is not None:
+            # The server is done with it once it's been sent
+            sent, continuation_point = continuation_point, None
+            references, continuation_point = await browse_next_page(session, sent)
+            yield references
+    finally:
+        # The caller stopped (e.g. was cancelled) before the last page
+        if continuation_point is not None:
+            schedule_release_continuation_point(session, continuation_point)
+
+
+async def browse_children(
+    session: Any, nodeid: ua.NodeId
+) -> List[ua.ReferenceDescription]:
+    """Browse all the hierarchical children of a node"""
+    references = []
+    async for page in browse_children_pages(session, nodeid):
+        references.extend(page)
+
+    return references
+
+
+async def translate_browse_path_prefixes(
+    session: Any, start: ua.NodeId, names: Sequence[ua.QualifiedName]
+) -> List[Optional[ua.NodeId]]:
+    """Resolve every prefix of a hierarchical browse path with a single request.
+
+    Returns the node each prefix leads to (None if it leads nowhere), i.e. the
+    nodes the path passes through on the way to its target.
+    """
+    browse_paths = []
+    for length in range(1, len(names) + 1):
+        elements = []
+        for name in names[:length]:
+            element = ua.RelativePathElement()
+            element.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            element.IsInverse = False
+            element.IncludeSubtypes = True
+            element.TargetName = name
+            elements.append(element)
+
+        browse_path = ua.BrowsePath()
+        browse_path.StartingNode = start
+        browse_path.RelativePath.Elements = elements
+        browse_paths.append(browse_path)
+
+    if not browse_paths:
+        return []
+
+    results = await session.translate_browsepaths_to_nodeids(browse_paths)
+    return [
+        (
+            result.Targets[0].TargetId
+            if result.StatusCode.is_good() and result.Targets
+            else None
+        )
+        for result in results
+    ]
+
+
+def _parent_reference(nodeid: ua.NodeId) -> ua.BrowseDescription:
+    description = ua.BrowseDescription()
+    description.NodeId = nodeid
+    description.BrowseDirection = ua.BrowseDirection.Inverse
+    description.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+    description.IncludeSubtypes = True
+    description.NodeClassMask = ua.NodeClass.Unspecified
+    description.ResultMask = ua.BrowseResultMask.None_
+    return description
+
+
+async def browse_parent(session: Any, nodeid: ua.NodeId) -> Optional[ua.NodeId]:
+    """Return the node a node is organized under, if any"""
+    result = (await _browse(session, [_parent_reference(nodeid)], 1))[0]
+    result.StatusCode.check()
+    if result.ContinuationPoint:
+        await release_continuation_point(session, result.ContinuationPoint)
+
+    if not result.References:
+        return None
+
+    return result.References[0].NodeId
+
+
+async def browse_parents(
+    session: Any, nodeids: Sequence[ua.NodeId]
+) -> List[Optional[ua.NodeId]]:
+    """Return the node each of many nodes is organized under, browsing them at once.
+
+    Nodes without a parent, or that couldn't be browsed (e.g. they're already
+    gone again), have None.
+    """
+    results = await _browse_many(
+        session, [_parent_reference(nodeid) for nodeid in nodeids], 1
+    )
+
+    continuation_points = [
+        result.ContinuationPoint for result in results if result.ContinuationPoint
+    ]
+    if continuation_points:
+        params = ua.BrowseNextParameters()
+        params.ContinuationPoints = continuation_points
+        params.ReleaseContinuationPoints = True
+        await session.browse_next(params)
+
+    return [
+        (
+            result.References[0].NodeId
+            if result.StatusCode.is_good() and result.References
+            else None
+        )
+        for result in results
+    ]
@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional, Tuple, cast
+
+from PyQt5.QtCore import (
+    QAbstractItemModel,
+    QObject,
+    QEvent,
+    QPoint,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt5.QtWidgets import QScrollBar, QTreeView, QWidget
+
+from ._opc_tree_item import OpcTreeItem
+
+DEFAULT_PREFETCH_ROWS = 20
+DEFAULT_RELEASE_ROWS = 100
+DEFAULT_UPDATE_INTERVAL = 100
+
+
+class VisibleItemTracker(QObject):
+    """Keeps track of the tree items that are scrolled into view.
+
+    Items within `prefetch_rows` of the viewport are reported as shown. They
+    aren't reported as hidden again until they are more than `release_rows`
+    away from it, so scrolling back and forth doesn't thrash.
+    """
+
+    item_shown = pyqtSignal(OpcTreeItem)
+    item_hidden = pyqtSignal(OpcTreeItem)
+
+    def __init__(
+        self,
+        view: QTreeView,
+        *,
+        prefetch_rows: int = DEFAULT_PREFETCH_ROWS,
+        release_rows: int = DEFAULT_RELEASE_ROWS,
+        update_interval: int = DEFAULT_UPDATE_INTERVAL,
+    ):
+        super().__init__(view)
+        self._view = view
+        self._prefetch_rows = prefetch_rows
+        self._release_rows = max(release_rows, prefetch_rows)
+        self._enabled = False
+
+        # OpcTreeItems aren't hashable, so key them by identity
+        self._shown: Dict[int, OpcTreeItem] = {}
+
+        # Scrolling emits a lot of signals, only look at the view once it settles
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(update_interval)
+        self._update_timer.timeout.connect(self.update)
+
+        self._viewport = cast(QWidget, view.viewport())
+        self._viewport.installEventFilter(self)
+
+        scroll_bar = cast(QScrollBar, view.verticalScrollBar())
+        scroll_bar.valueChanged.connect(self._schedule_update)
+        view.expanded.connect(self._schedule_update)
+        view.collapsed.connect(self._schedule_update)
+
+        model = cast(QAbstractItemModel, view.model())
+        model.rowsInserted.connect(self._schedule_update)
+        model.rowsRemoved.connect(self._schedule_update)
+        model.layoutChanged.connect(self._schedule_update)
+        model.modelReset.connect(self._schedule_update)
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        if enabled == self._enabled:
+            return
+
+        self._enabled = enabled
+        if enabled:
+            self.update()
+        else:
+            self._update_timer.stop()
+            shown = list(self._shown.values())
+            self._shown.clear()
+            for item in shown:
+                self.item_hidden.emit(item)
+
+    def shown_items(self) -> List[OpcTreeItem]:
+        return list(self._shown.values())
+
+    def visible_items(self) -> List[OpcTreeItem]:
+        """Return the items scrolled into view (and the ones prefetched
+        around them), whether or not tracking is enabled
+        """
+        return self._visible_window()[0]
+
+    def eventFilter(self, watched: Optional[QObject], event: Optional[QEvent]) -> bool:
+        if event is not None and event.type() == QEvent.Type.Resize:
+            self._schedule_update()
+        return False
+
+    def update(self) -> None:
+        if not self._enabled:
+            return
+
+        wanted, kept = self._visible_window()
+
+        shown = {id(item): item for item in wanted}
+        for item in kept:
+            key = id(item)
+            if key in self._shown:
+                shown[key] = item
+
+        hidden = [item for key, item in self._shown.items() if key not in shown]
+        added = [item for key, item in shown.items() if key not in self._shown]
+        self._shown = shown
+
+        for item in hidden:
+            self.item_hidden.emit(item)
+        for item in added:
+            self.item_shown.emit(item)
+
+    def _schedule_update(self, *_args) -> None:
+        if self._enabled and not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def _visible_window(self) -> Tuple[List[OpcTreeItem], List[OpcTreeItem]]:
+        """Return the items to show, and the items that may stay shown."""
+        top = self._view.indexAt(QPoint(0, 0))
+        if not top.isValid():
+            return [], []
+
+        above = []
+        index = top
+        for _ in range(self._release_rows):
+            index = self._view.indexAbove(index)
+            if not index.isValid():
+                break
+            above.append(index)
+
+        visible = []
+        index = top
+        height = self._viewport.height()
+        while index.isValid() and self._view.visualRect(index).top() < height:
+            visible.append(index)
+            index = self._view.indexBelow(index)
+
+        below = []
+        for _ in range(self._release_rows):
+            if not index.isValid():
+                break
+            below.append(index)
+            index = self._view.indexBelow(index)
+
+        prefetch = self._prefetch_rows
+        wanted = above[:prefetch] + visible + below[:prefetch]
+        kept = above + visible + below
+        return (
+            [index.internalPointer() for index in wanted],
+            [index.internalPointer() for index in kept],
+        )